@@ -4,6 +4,7 @@ from django.db import models
 from accounts.managers import BDAManager, BDMManager, SurveyorManager, TechManager
 from core.models.abstract import AbstractPhoneNumber
 from core.models.constants import PhoneNumberType
+from lib.search import get_trigram_index
 
 
 class User(AbstractUser):
@@ -18,6 +19,12 @@ class User(AbstractUser):
     surveyors = SurveyorManager()
     techs = TechManager()
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            get_trigram_index("full_name", "user_full_name_trgm_idx"),
+            get_trigram_index("email", "user_email_trgm_idx"),
+        ]
+
     def get_initials(self):
         if self.first_name and self.last_name:
             return self.first_name[0].upper() + self.last_name[0].upper()
@@ -1,31 +1,41 @@
 import django_filters
 from django.contrib.auth import get_user_model
-from django.db.models import Q
 
 from core.models import Territory
 from customers.constants import Segment
 from customers.models import Contact, Customer
+from lib.search import search
 from repairs.models import Project, ProjectManagementDashboardView
 
 User = get_user_model()
 
 
-class ContactTableFilter(django_filters.FilterSet):
-    """Contact data table filters"""
+class SearchMixin:
+    """Mixin to search (and rank) the rows by the search_fields for the q filter"""
 
-    q = django_filters.CharFilter(method="filter_q")
+    search_fields = ()
 
     def filter_q(self, queryset, name, value):
-        return queryset.filter(Q(name__icontains=value) | Q(email__icontains=value))
+        # An explicit sort takes precedence over the search rank
+        rank = not (self.request and self.request.GET.get("sort"))
+        return search(queryset, value, self.search_fields, rank=rank)
+
+
+class ContactTableFilter(SearchMixin, django_filters.FilterSet):
+    """Contact data table filters"""
+
+    search_fields = ("name", "email")
+    q = django_filters.CharFilter(method="filter_q")
 
     class Meta:
         model = Contact
         fields = ("customer", "q")
 
 
-class CustomerTableFilter(django_filters.FilterSet):
+class CustomerTableFilter(SearchMixin, django_filters.FilterSet):
     """Customer data table filters"""
 
+    search_fields = ("name",)
     q = django_filters.CharFilter(method="filter_q")
     business_development_manager = django_filters.ModelMultipleChoiceFilter(
         queryset=User.objects.all(),
@@ -38,9 +48,6 @@ class CustomerTableFilter(django_filters.FilterSet):
         queryset=Territory.objects.all(),
     )
 
-    def filter_q(self, queryset, name, value):
-        return queryset.filter(name__icontains=value)
-
     class Meta:
         model = Customer
         fields = (
@@ -51,9 +58,16 @@ class CustomerTableFilter(django_filters.FilterSet):
         )
 
 
-class ProjectTableFilter(django_filters.FilterSet):
+class ProjectTableFilter(SearchMixin, django_filters.FilterSet):
     """Project data table filters"""
 
+    search_fields = (
+        "name",
+        "business_development_manager__full_name",
+        "customer__segment",
+        "territory__label",
+        "territory__name",
+    )
     q = django_filters.CharFilter(method="filter_q")
     active = django_filters.BooleanFilter(method="filter_active")
     status = django_filters.MultipleChoiceFilter(choices=Project.Status.choices)
@@ -68,15 +82,6 @@ class ProjectTableFilter(django_filters.FilterSet):
         queryset=Territory.objects.all(),
     )
 
-    def filter_q(self, queryset, name, value):
-        return queryset.filter(
-            Q(name__icontains=value)
-            | Q(business_development_manager__full_name__icontains=value)
-            | Q(customer__segment__icontains=value)
-            | Q(territory__label__icontains=value)
-            | Q(territory__name__icontains=value)
-        )
-
     def filter_active(self, queryset, name, value):
         if value is True:
             return queryset.exclude(status=Project.Status.COMPLETE)
@@ -98,24 +103,21 @@ class ProjectTableFilter(django_filters.FilterSet):
         )
 
 
-class UserTableFilter(django_filters.FilterSet):
+class UserTableFilter(SearchMixin, django_filters.FilterSet):
     """User data table filters"""
 
+    search_fields = ("full_name", "email")
     q = django_filters.CharFilter(method="filter_q")
 
-    def filter_q(self, queryset, name, value):
-        return queryset.filter(
-            Q(full_name__icontains=value) | Q(email__icontains=value)
-        )
-
     class Meta:
         model = User
         fields = ("q",)
 
 
-class DashboardTableFilter(django_filters.FilterSet):
+class DashboardTableFilter(SearchMixin, django_filters.FilterSet):
     """Dashboard data table filters"""
 
+    search_fields = ("name", "customer_name", "bd_name")
     q = django_filters.CharFilter(method="filter_q")
     business_development_manager = django_filters.ModelMultipleChoiceFilter(
         queryset=User.objects.all(),
@@ -129,13 +131,6 @@ class DashboardTableFilter(django_filters.FilterSet):
         field_name="status", choices=Project.Status.choices
     )
 
-    def filter_q(self, queryset, name, value):
-        return queryset.filter(
-            Q(name__icontains=value)
-            | Q(customer_name__icontains=value)
-            | Q(bd_name__icontains=value)
-        )
-
     def filter_business_development_manager(self, queryset, name, value):
         if value:
             bd_ids = [bd.id for bd in value]
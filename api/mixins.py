@@ -0,0 +1,72 @@
+import gzip
+
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from rest_framework.renderers import JSONRenderer
+
+
+class SortMixin:
+    """
+    Mixin to dynamically handle the sort order. Only the sort_fields can be
+    sorted on, and the primary key breaks any ties so that the order (and
+    the keyset pagination) is stable.
+    """
+
+    sort_fields = ()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        sort = self.request.GET.get("sort")
+
+        if sort and sort.lstrip("-") in self.sort_fields:
+            tiebreaker = "-pk" if sort.startswith("-") else "pk"
+            queryset = queryset.order_by(sort, tiebreaker)
+
+        return queryset
+
+
+class CachedDataMixin:
+    """
+    Mixin to serve the serialized project data from the cache. The payload
+    is cached (gzipped) by the project's data version, so an unchanged
+    project is not serialized again, and is not modified (304) if the
+    client's ETag matches.
+    """
+
+    data_serializer_class = None
+    data_cache_prefix = None
+    data_cache_timeout = 24 * 60 * 60
+
+    def get_cached_data_response(self, request, project):
+        version = project.get_data_version()
+        etag = f'"{version}"'
+        response = get_conditional_response(request, etag=etag)
+
+        if response is None:
+            payload = self.get_cached_data(project, version)
+
+            if "gzip" in request.headers.get("Accept-Encoding", ""):
+                response = HttpResponse(payload, content_type="application/json")
+                response.headers["Content-Encoding"] = "gzip"
+            else:
+                response = HttpResponse(
+                    gzip.decompress(payload), content_type="application/json"
+                )
+
+        response.headers["ETag"] = etag
+        patch_vary_headers(response, ("Accept-Encoding",))
+        return response
+
+    def get_cached_data(self, project, version):
+        """Return the gzipped payload from the cache (or serialize it)"""
+        cache = caches["documents"]
+        key = f"{self.data_cache_prefix}:{project.pk}:{version}"
+        payload = cache.get(key)
+
+        if payload is None:
+            data = self.data_serializer_class(project).data
+            payload = gzip.compress(JSONRenderer().render(data))
+            cache.set(key, payload, self.data_cache_timeout)
+
+        return payload
@@ -1,9 +1,245 @@
+import base64
+import json
+from datetime import datetime
+
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.db.models import F, Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def estimate_count(queryset):
+    """
+    Return the PostgreSQL estimated row count of the queryset: the table's
+    pg_class.reltuples if unfiltered, otherwise the planner's row estimate
+    """
+    table = queryset.model._meta.db_table
+
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute(
+                """
+                    SELECT reltuples FROM pg_class
+                    WHERE oid = to_regclass(%s)
+                        AND relkind IN ('r', 'm', 'p')
+                """,
+                [table],
+            )
+            row = cursor.fetchone()
+
+            # The reltuples is -1 if the table has never been analyzed
+            if row and row[0] >= 0:
+                return int(row[0])
+
+        sql, params = queryset.query.sql_with_params()
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator using the estimated (rather than exact) count"""
+
+    @cached_property
+    def count(self):
+        return estimate_count(self.object_list)
+
+
+class KeysetEncoder(DjangoJSONEncoder):
+    """
+    JSON encoder of the cursor values. The datetimes are encoded with the
+    microseconds (which DjangoJSONEncoder truncates), so the position is
+    exact.
+    """
+
+    def default(self, o):
+        if isinstance(o, datetime):
+            return {"datetime": o.isoformat()}
+
+        return super().default(o)
+
+
+def decode_keyset_value(data):
+    """Decode the JSON objects of the KeysetEncoder"""
+    if "datetime" in data:
+        return datetime.fromisoformat(data["datetime"])
+
+    return data
+
+
+class KeysetPaginator:
+    """
+    Keyset (cursor) paginator on the queryset's (sort field, primary key)
+    ordering. Each page is filtered to the rows after the previous page's
+    last row, so deep pages do not require an OFFSET scan.
+    """
+
+    def __init__(self, queryset, page_size):
+        self.page_size = page_size
+        self.field, self.descending, self.pk_descending = self.get_ordering(queryset)
+
+        # Order by the keys explicitly, since the pk may not have been given
+        ordering = ["-pk" if self.pk_descending else "pk"]
+
+        if self.field:
+            ordering.insert(0, f"-{self.field}" if self.descending else self.field)
+
+        self.queryset = queryset.order_by(*ordering)
+
+    @staticmethod
+    def get_ordering(queryset):
+        """
+        Return the sort field (None if only the pk), its direction, and the
+        pk (tiebreaker) direction. Only one sort field (before the pk) is
+        supported; the pk follows the sort field's direction if not given.
+        """
+        pk = queryset.model._meta.pk.name
+        field, descending, pk_descending = None, False, None
+
+        for key in list(queryset.query.order_by) or ["pk"]:
+            if not isinstance(key, str):
+                raise ValueError("The keyset pagination requires named sort keys.")
+
+            name = key.lstrip("-")
+
+            if name in ("pk", pk):
+                pk_descending = key.startswith("-")
+                break
+
+            if field is not None:
+                raise ValueError("The keyset pagination supports one sort field.")
+
+            field, descending = name, key.startswith("-")
+
+        if pk_descending is None:
+            pk_descending = descending
+
+        return field, descending, pk_descending
+
+    def page(self, cursor=None):
+        """Return the rows (and the next cursor) after the cursor"""
+        queryset = self.queryset
+
+        if self.field:
+            queryset = queryset.annotate(keyset_value=F(self.field))
+
+        if cursor is not None:
+            queryset = queryset.filter(self.get_filter(*self.decode(cursor)))
+
+        rows = list(queryset[: self.page_size + 1])
+        next_cursor = None
+
+        if len(rows) > self.page_size:
+            rows = rows[: self.page_size]
+            last = rows[-1]
+            next_cursor = self.encode(getattr(last, "keyset_value", None), last.pk)
+
+        return rows, next_cursor
+
+    def get_filter(self, value, pk):
+        """Return the filter for the rows after the (value, pk) position"""
+        after = Q(pk__lt=pk) if self.pk_descending else Q(pk__gt=pk)
+
+        if not self.field:
+            return after
+
+        # PostgreSQL sorts the nulls last (or first if descending)
+        isnull = f"{self.field}__isnull"
+
+        if value is None:
+            same = Q(**{isnull: True}) & after
+            return (same | Q(**{isnull: False})) if self.descending else same
+
+        same = Q(**{self.field: value}) & after
+
+        if self.descending:
+            return Q(**{f"{self.field}__lt": value}) | same
+
+        return Q(**{f"{self.field}__gt": value}) | same | Q(**{isnull: True})
+
+    @staticmethod
+    def encode(value, pk):
+        """Encode the cursor position"""
+        data = json.dumps([value, pk], cls=KeysetEncoder)
+        return base64.urlsafe_b64encode(data.encode()).decode()
+
+    @staticmethod
+    def decode(cursor):
+        """Decode the cursor position"""
+        try:
+            data = base64.urlsafe_b64decode(cursor.encode())
+            value, pk = json.loads(data, object_hook=decode_keyset_value)
+        except (TypeError, ValueError):
+            raise NotFound("Invalid cursor.")
+
+        return value, pk
 
 
 class DefaultPagination(PageNumberPagination):
-    """Default API response pagination"""
+    """
+    Default API response pagination. The keyset (cursor) pagination is used
+    with ?pagination=cursor (or a cursor), which only counts the rows with
+    ?count=exact. The count can be estimated instead with ?count=estimate.
+    """
 
     page_size = 1000
     page_size_query_param = "per_page"
     max_page_size = 1000
+
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.count_mode = request.query_params.get(self.count_query_param)
+        cursor = request.query_params.get(self.cursor_query_param)
+
+        if cursor is None and request.query_params.get("pagination") != "cursor":
+            self.keyset = None
+
+            if self.count_mode == "estimate":
+                self.django_paginator_class = EstimatedCountPaginator
+
+            return super().paginate_queryset(queryset, request, view=view)
+
+        # Unless requested, the keyset pagination does not count the rows
+        if self.count_mode == "exact":
+            self.count = queryset.count()
+        elif self.count_mode == "estimate":
+            self.count = estimate_count(queryset)
+        else:
+            self.count = None
+
+        page_size = self.get_page_size(request)
+
+        try:
+            self.keyset = KeysetPaginator(queryset, page_size)
+        except ValueError as exc:
+            raise ValidationError({"pagination": str(exc)})
+
+        rows, self.next_cursor = self.keyset.page(cursor)
+
+        return rows
+
+    def get_paginated_response(self, data):
+        if self.keyset is None:
+            return super().get_paginated_response(data)
+
+        next_link = None
+
+        if self.next_cursor is not None:
+            url = self.request.build_absolute_uri()
+            next_link = replace_query_param(
+                url, self.cursor_query_param, self.next_cursor
+            )
+
+        return Response({"count": self.count, "next": next_link, "results": data})
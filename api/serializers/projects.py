@@ -5,6 +5,7 @@ from api.serializers.core import TerritorySerializer
 from api.serializers.customers import CustomerSerializer
 from repairs.models import (
     Measurement,
+    MeasurementImport,
     PricingSheet,
     PricingSheetContact,
     Project,
@@ -82,6 +83,22 @@ class MeasurementSerializer(serializers.ModelSerializer):
         )
 
 
+class MeasurementImportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = MeasurementImport
+        fields = (
+            "request_id",
+            "project",
+            "stage",
+            "status",
+            "rows_total",
+            "rows_processed",
+            "error",
+            "created_at",
+            "updated_at",
+        )
+
+
 class PricingSheetContactSerializer(serializers.ModelSerializer):
     class Meta:
         model = PricingSheetContact
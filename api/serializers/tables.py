@@ -9,6 +9,11 @@ from repairs.models import Project, ProjectManagementDashboardView
 User = get_user_model()
 
 
+def get_first_phone(phone_numbers):
+    """Return the first of the (prefetched) phone numbers as a string"""
+    return str(phone_numbers[0]) if phone_numbers else None
+
+
 class ContactTableSerializer(serializers.ModelSerializer):
     name = serializers.SerializerMethodField()
     phone_work = serializers.SerializerMethodField()
@@ -20,12 +25,10 @@ class ContactTableSerializer(serializers.ModelSerializer):
         return mark_safe(html)
 
     def get_phone_work(self, obj):
-        number = obj.get_work_phone()
-        return str(number) if number else None
+        return get_first_phone(obj.work_phone_numbers)
 
     def get_phone_cell(self, obj):
-        number = obj.get_cell_phone()
-        return str(number) if number else None
+        return get_first_phone(obj.cell_phone_numbers)
 
     class Meta:
         model = Contact
@@ -64,10 +67,10 @@ class CustomerTableSerializer(serializers.ModelSerializer):
         return obj.get_segment_display()
 
     def get_active_projects(self, obj):
-        return obj.active_projects.count()
+        return obj.active_projects_count
 
     def get_completed_projects(self, obj):
-        return obj.completed_projects.count()
+        return obj.completed_projects_count
 
     def get_created(self, obj):
         return obj.created_at.strftime("%-m/%-d/%Y")
@@ -168,12 +171,10 @@ class UserTableSerializer(serializers.ModelSerializer):
         return mark_safe(html)
 
     def get_phone_work(self, obj):
-        phone = obj.get_work_phone()
-        return str(phone) if phone else None
+        return get_first_phone(obj.work_phone_numbers)
 
     def get_phone_cell(self, obj):
-        phone = obj.get_cell_phone()
-        return str(phone) if phone else None
+        return get_first_phone(obj.cell_phone_numbers)
 
     def get_last_login(self, obj):
         if obj.last_login:
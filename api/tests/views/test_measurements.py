@@ -0,0 +1,89 @@
+import math
+
+from django.shortcuts import reverse
+
+from lib.test_helpers import IntegrationTestBase
+from repairs.factories import ProjectFactory
+from repairs.models import Measurement, Project
+from repairs.models.constants import Stage
+
+
+class TestMeasurementTiles(IntegrationTestBase):
+    """Unit tests for the measurement vector tiles"""
+
+    def setUp(self):
+        super().setUp()
+        self.project = ProjectFactory()
+
+        filename = "repairs/tests/fixtures/survey_template.csv"
+
+        with open(filename, "r", encoding="utf-8-sig") as f:
+            Measurement.import_from_csv(f, self.project, Stage.SURVEY)
+
+    def get_url(self, z, lon, lat):
+        """Return the tile URL containing the coordinate"""
+        n = 2**z
+        x = int((lon + 180) / 360 * n)
+        y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+        return reverse("measurement-tiles", kwargs={"z": z, "x": x, "y": y})
+
+    def test_tile(self):
+        """Test the tile contains the measurements"""
+        coordinate = self.project.measurements.first().coordinate
+        url = self.get_url(14, coordinate.x, coordinate.y)
+
+        resp = self.client.get(url, {"project": self.project.pk})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp["Content-Type"], "application/vnd.mapbox-vector-tile")
+        self.assertTrue(resp.content)
+
+        resp = self.client.get(url, {"project": self.project.pk + 1})
+        self.assertEqual(resp.status_code, 200)
+        self.assertFalse(resp.content)
+
+    def test_tile_invalidated(self):
+        """Test the cached tile is invalidated when the measurements change"""
+        coordinate = self.project.measurements.first().coordinate
+        url = self.get_url(14, coordinate.x, coordinate.y)
+
+        resp = self.client.get(url)
+        self.assertTrue(resp.content)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.measurements.all().delete()
+            Measurement.schedule_changed()
+
+        resp = self.client.get(url)
+        self.assertFalse(resp.content)
+
+    def test_tile_invalidated_project(self):
+        """Test the cached tile is invalidated when the project status changes"""
+        coordinate = self.project.measurements.first().coordinate
+        url = self.get_url(14, coordinate.x, coordinate.y)
+        params = {"status": self.project.status}
+
+        resp = self.client.get(url, params)
+        self.assertTrue(resp.content)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.status = Project.Status.COMPLETE
+            self.project.save()
+
+        resp = self.client.get(url, params)
+        self.assertFalse(resp.content)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.delete()
+
+        resp = self.client.get(url)
+        self.assertFalse(resp.content)
+
+    def test_tile_invalid(self):
+        """Test the invalid tile requests"""
+        url = reverse("measurement-tiles", kwargs={"z": 1, "x": 2, "y": 0})
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 404)
+
+        url = reverse("measurement-tiles", kwargs={"z": 1, "x": 0, "y": 0})
+        resp = self.client.get(url, {"project": "abc"})
+        self.assertEqual(resp.status_code, 400)
@@ -0,0 +1,438 @@
+import gzip
+import json
+import uuid
+from datetime import timedelta
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.shortcuts import reverse
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from lib.test_helpers import IntegrationTestBase
+from repairs.factories import ProjectFactory
+from repairs.models import (
+    InstructionDocumentRequest,
+    Measurement,
+    MeasurementImport,
+    ProjectLayer,
+)
+from repairs.models.constants import Stage
+from third_party.models import ArcGISItem
+
+
+class TestProjectLayerFeatures(IntegrationTestBase):
+    """Unit tests for the project layer features sync"""
+
+    def setUp(self):
+        super().setUp()
+        self.project = ProjectFactory()
+        self.layer = ProjectLayer.objects.create(
+            project=self.project,
+            stage=Stage.PRODUCTION,
+            arcgis_item=ArcGISItem.objects.create(
+                item_id="layer",
+                item_type=ArcGISItem.ItemType.FEATURE_SERVICE,
+                title="PSS Repair Layer",
+            ),
+        )
+        self.url = reverse("project-layers-features", kwargs={"pk": self.layer.pk})
+
+    def get_features(self, object_ids, **properties):
+        """Return a GeoJSON FeatureCollection for the object ids"""
+        features = []
+
+        for object_id in object_ids:
+            features.append(
+                {
+                    "type": "Feature",
+                    "geometry": {
+                        "type": "Point",
+                        "coordinates": [-78.766 + object_id / 1e5, 35.800],
+                    },
+                    "properties": {
+                        "OBJECTID": object_id,
+                        "CreationDate": 1706659200000,
+                        "Creator": "a.tech_PSSPIMS",
+                        "Length": 5,
+                        "Width": 5,
+                        "InchFeet": 2.5,
+                        "HazardSize": "Small",
+                        **properties,
+                    },
+                }
+            )
+
+        return {"type": "FeatureCollection", "features": features}
+
+    def sync(self, data):
+        """Post the features to the sync endpoint"""
+        resp = self.client.post(self.url, data, content_type="application/json")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()["status"], ProjectLayer.Status.COMPLETE)
+
+    def test_sync(self):
+        self.sync(self.get_features(range(1, 11)))
+        self.assertEqual(self.project.measurements.count(), 10)
+
+    def test_sync_update_delete(self):
+        self.sync(self.get_features(range(1, 11)))
+        Measurement.objects.filter(object_id=1).update(geocoded_address="1 Main St")
+
+        self.sync(self.get_features(range(1, 6), Length=7, SpecialCase="Curb"))
+        measurements = self.project.measurements.order_by("object_id")
+        self.assertEqual(measurements.count(), 5)
+
+        for measurement in measurements:
+            self.assertEqual(measurement.length, 0.5)  # production curb rule
+
+        self.assertEqual(measurements.first().geocoded_address, "1 Main St")
+
+    def test_sync_moved(self):
+        """Test the geocoded address is cleared if the coordinate moved"""
+        self.sync(self.get_features(range(1, 3)))
+        self.project.measurements.update(geocoded_address="1 Main St")
+
+        data = self.get_features(range(1, 3), Length=7)
+        data["features"][1]["geometry"]["coordinates"][1] = 35.801
+        self.sync(data)
+
+        measurements = self.project.measurements.order_by("object_id")
+        self.assertEqual(measurements[0].geocoded_address, "1 Main St")
+        self.assertIsNone(measurements[1].geocoded_address)
+
+    def test_sync_num_queries(self):
+        """Test the number of queries does not grow with the feature count"""
+        num_queries = []
+
+        for count in (10, 200):
+            with CaptureQueriesContext(connection) as queries:
+                self.sync(self.get_features(range(1, count + 1)))
+                num_queries.append(len(queries))
+
+        self.assertEqual(self.project.measurements.count(), 200)
+        self.assertEqual(num_queries[0], num_queries[1])
+
+    def test_patch(self):
+        """Test applying the changed features incrementally"""
+        features = self.get_features(range(1, 11), StartStreetArea="Main St")
+        features["features"][0]["properties"]["EditDate"] = 1706659200000
+        self.sync(features)
+
+        self.layer.refresh_from_db()
+        self.assertEqual(self.layer.last_object_id, 10)
+        self.assertIsNotNone(self.layer.last_edited_at)
+
+        data = {
+            "features": self.get_features([2, 11], Length=7)["features"],
+            "object_ids": [1, 2, 3, 11],
+        }
+        resp = self.client.patch(self.url, data, content_type="application/json")
+        self.assertEqual(resp.status_code, 200)
+
+        measurements = self.project.measurements.order_by("object_id")
+        self.assertEqual(
+            list(measurements.values_list("object_id", flat=True)), [1, 2, 3, 11]
+        )
+        self.assertEqual(measurements.get(object_id=2).length, 7)
+        self.assertEqual(measurements.get(object_id=2).survey_group, "Main St")
+
+        self.layer.refresh_from_db()
+        self.assertEqual(self.layer.last_object_id, 11)
+
+    def test_patch_pages(self):
+        """Test a sync sent in pages is only completed by the last request"""
+        self.sync(self.get_features(range(1, 11)))
+        self.layer.last_object_id = 100
+        self.layer.save()
+
+        object_ids = list(range(1, 6))
+        mark = {}
+
+        for page in ([1, 2], [3, 4, 5]):
+            features = self.get_features(page, Length=7)["features"]
+            features[-1]["properties"]["EditDate"] = 1706659200000 + 1000 * page[0]
+            data = {"features": features, "object_ids": object_ids, "more": True}
+            resp = self.client.patch(
+                self.url, {**data, **mark}, content_type="application/json"
+            )
+            self.assertEqual(resp.json()["status"], ProjectLayer.Status.IN_PROGRESS)
+            mark = {k: resp.json()[k] for k in ("last_edited_at", "last_object_id")}
+
+        self.assertEqual(mark["last_object_id"], 5)
+        self.layer.refresh_from_db()
+        self.assertEqual(self.layer.last_object_id, 100)
+
+        data = {"features": [], "object_ids": object_ids, "full": True, **mark}
+        resp = self.client.patch(self.url, data, content_type="application/json")
+        self.assertEqual(resp.json()["status"], ProjectLayer.Status.COMPLETE)
+
+        self.assertEqual(self.project.measurements.count(), 5)
+        self.assertEqual(self.project.measurements.filter(length=7).count(), 5)
+
+        # The full sync resets the high-water mark to the synced pages
+        self.layer.refresh_from_db()
+        self.assertEqual(self.layer.last_object_id, 5)
+        self.assertEqual(self.layer.last_edited_at.timestamp(), 1706659203)
+
+    def test_patch_requires_object_ids(self):
+        data = {"features": self.get_features([1])["features"]}
+        resp = self.client.patch(self.url, data, content_type="application/json")
+        self.assertEqual(resp.status_code, 400)
+
+
+class TestProjectGeoJSON(IntegrationTestBase):
+    """Unit tests for the project measurements GeoJSON"""
+
+    def setUp(self):
+        super().setUp()
+        self.project = ProjectFactory()
+        self.url = reverse("projects-geojson", kwargs={"pk": self.project.pk})
+
+        filename = "repairs/tests/fixtures/survey_template.csv"
+
+        with open(filename, "r", encoding="utf-8-sig") as f:
+            Measurement.import_from_csv(f, self.project, Stage.SURVEY)
+
+    def get_data(self, resp):
+        """Return the JSON data of the streamed response"""
+        return json.loads(b"".join(resp.streaming_content))
+
+    def test_geojson(self):
+        """Test the features are built with the symbology"""
+        resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, 200)
+
+        data = self.get_data(resp)
+        self.assertEqual(data["type"], "FeatureCollection")
+        self.assertEqual(len(data["features"]), 165)
+
+        measurements = Measurement.objects.in_bulk()
+
+        for feature in data["features"]:
+            measurement = measurements[feature["id"]]
+            properties = feature["properties"]
+
+            self.assertEqual(feature["geometry"]["type"], "Point")
+            self.assertEqual(properties["symbol"], measurement.get_symbol())
+            self.assertEqual(properties["color"], measurement.get_color())
+            self.assertEqual(
+                properties["special_case"], measurement.get_special_case_display()
+            )
+            self.assertEqual(
+                properties["hazard_size"], measurement.get_hazard_size_display()
+            )
+
+    def test_geojson_not_modified(self):
+        """Test the features are not returned if unchanged"""
+        resp = self.client.get(self.url)
+        etag = resp.headers["ETag"]
+
+        resp = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+
+        self.project.measurements.first().delete()
+
+        resp = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(self.get_data(resp)["features"]), 164)
+
+
+class TestProjectHazards(IntegrationTestBase):
+    """Unit tests for the project hazard statistics"""
+
+    def test_hazards(self):
+        """Test the hazard statistics and totals"""
+        project = ProjectFactory()
+
+        filename = "repairs/tests/fixtures/survey_template.csv"
+
+        with open(filename, "r", encoding="utf-8-sig") as f:
+            Measurement.import_from_csv(f, project, Stage.SURVEY)
+
+        url = reverse("projects-hazards", kwargs={"pk": project.pk})
+        resp = self.client.get(url, {"stage": Stage.SURVEY})
+        self.assertEqual(resp.status_code, 200)
+
+        data = resp.json()
+        count = project.measurements.filter(hazard_size__isnull=False).count()
+        self.assertEqual(data["total"]["count"], count)
+        self.assertEqual(
+            sum(values["count"] for values in data["hazard_sizes"].values()), count
+        )
+
+
+class TestInstructionDocuments(IntegrationTestBase):
+    """Tests for the asynchronous instructions document generation"""
+
+    def setUp(self):
+        super().setUp()
+        self.project = ProjectFactory()
+        self.instruction = self.project.instructions.get(stage=Stage.SURVEY)
+        self.url = reverse(
+            "documents-survey-instructions", kwargs={"pk": self.instruction.pk}
+        )
+
+    def test_generate(self):
+        """Test the document is generated by the worker"""
+        resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, 202)
+        request_id = resp.json()["request_id"]
+
+        resp = self.client.get(self.url, {"request_id": request_id})
+        self.assertEqual(resp.status_code, 202)
+
+        call_command("generate_instruction_documents", "--once")
+
+        resp = self.client.get(self.url, {"request_id": request_id})
+        self.assertEqual(resp.status_code, 200)
+
+        resp = self.client.get(resp.json()["url"])
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp["Content-Type"], "application/pdf")
+        self.assertTrue(resp.content.startswith(b"%PDF"))
+
+    def test_unchanged(self):
+        """Test an unchanged document is not requested again"""
+        first = self.client.get(self.url).json()["request_id"]
+        second = self.client.get(self.url).json()["request_id"]
+        self.assertEqual(first, second)
+
+        self.instruction.save()
+        third = self.client.get(self.url).json()["request_id"]
+        self.assertNotEqual(first, third)
+
+    def test_reused_timeout(self):
+        """Test the timeout of a reused request is from the new request"""
+        request_id = self.client.get(self.url).json()["request_id"]
+        InstructionDocumentRequest.objects.update(
+            created_at=timezone.now() - timedelta(minutes=3),
+            requested_at=timezone.now() - timedelta(minutes=3),
+        )
+
+        self.assertEqual(self.client.get(self.url).json()["request_id"], request_id)
+
+        resp = self.client.get(self.url, {"request_id": request_id})
+        self.assertEqual(resp.status_code, 202)
+
+    def test_stale(self):
+        """Test an abandoned request is not reused and is marked as failed"""
+        first = self.client.get(self.url).json()["request_id"]
+        InstructionDocumentRequest.objects.update(
+            status=InstructionDocumentRequest.Status.IN_PROGRESS,
+            updated_at=timezone.now() - timedelta(minutes=10),
+        )
+
+        second = self.client.get(self.url).json()["request_id"]
+        self.assertNotEqual(first, second)
+
+        call_command("generate_instruction_documents", "--once")
+
+        statuses = dict(
+            InstructionDocumentRequest.objects.values_list("request_id", "status")
+        )
+        self.assertEqual(
+            statuses,
+            {
+                uuid.UUID(first): InstructionDocumentRequest.Status.FAILED,
+                uuid.UUID(second): InstructionDocumentRequest.Status.COMPLETE,
+            },
+        )
+
+
+class TestProjectData(IntegrationTestBase):
+    """Tests for the cached pricing sheet/project summary data"""
+
+    def setUp(self):
+        super().setUp()
+        self.project = ProjectFactory()
+
+    def test_data(self):
+        """Test the data is cached by the project data version"""
+        for name in ("documents-pricing-sheet-data", "documents-project-summary-data"):
+            url = reverse(name, kwargs={"pk": self.project.pk})
+
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(resp.json()["id"], self.project.pk)
+            etag = resp["ETag"]
+
+            resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(resp.status_code, 304)
+
+            resp = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+            self.assertEqual(resp["Content-Encoding"], "gzip")
+            data = json.loads(gzip.decompress(resp.content))
+            self.assertEqual(data["id"], self.project.pk)
+
+    def test_data_changed(self):
+        """Test the data version changes with the pricing sheet"""
+        url = reverse("documents-pricing-sheet-data", kwargs={"pk": self.project.pk})
+        etag = self.client.get(url)["ETag"]
+
+        self.project.pricing_sheet.base_rate = 10
+        self.project.pricing_sheet.save()
+
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp["ETag"], etag)
+        self.assertEqual(resp.json()["pricing"]["base_rate"], 10)
+
+
+class TestMeasurementImports(IntegrationTestBase):
+    """Tests for the measurement import status"""
+
+    def setUp(self):
+        super().setUp()
+        self.project = ProjectFactory()
+
+        with open("repairs/tests/fixtures/survey_template.csv", "rb") as f:
+            self.data = f.read()
+
+    def get_upload(self):
+        """Return the uploaded survey CSV file"""
+        return SimpleUploadedFile("survey.csv", self.data, content_type="text/csv")
+
+    def test_status(self):
+        """Test the import status is polled until the worker completes it"""
+        job = MeasurementImport.request(self.project, Stage.SURVEY, self.get_upload())
+        url = reverse("project-imports-detail", kwargs={"request_id": job.request_id})
+
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()["status"], MeasurementImport.Status.PENDING)
+        self.assertEqual(resp.json()["rows_total"], 165)
+
+        call_command("import_measurements", "--once")
+
+        resp = self.client.get(url)
+        self.assertEqual(resp.json()["status"], MeasurementImport.Status.COMPLETE)
+        self.assertEqual(resp.json()["rows_processed"], 165)
+
+    def test_claim_in_progress(self):
+        """Test an import is not claimed while its project/stage is importing"""
+        first = MeasurementImport.request(self.project, Stage.SURVEY, self.get_upload())
+        self.assertEqual(MeasurementImport.claim_next(), first)
+
+        MeasurementImport.request(self.project, Stage.SURVEY, self.get_upload())
+        self.assertIsNone(MeasurementImport.claim_next())
+
+        other = MeasurementImport.request(
+            self.project, Stage.PRODUCTION, self.get_upload()
+        )
+        self.assertEqual(MeasurementImport.claim_next(), other)
+
+    def test_complete_abandoned(self):
+        """Test an import marked as abandoned is not completed by its worker"""
+        job = MeasurementImport.request(self.project, Stage.SURVEY, self.get_upload())
+        self.assertEqual(MeasurementImport.claim_next(), job)
+
+        stale = timezone.now() - MeasurementImport.STALE_AFTER * 2
+        MeasurementImport.objects.filter(pk=job.pk).update(updated_at=stale)
+        self.assertIsNone(MeasurementImport.claim_next())
+
+        job.complete(165)
+        job.refresh_from_db()
+        self.assertEqual(job.status, MeasurementImport.Status.FAILED)
+        self.assertEqual(job.rows_processed, 0)
@@ -0,0 +1,219 @@
+import re
+from datetime import timedelta
+
+from django.db import connection
+from django.shortcuts import reverse
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from accounts.factories import UserFactory
+from accounts.models import UserPhoneNumber
+from api.pagination import KeysetPaginator
+from core.models.constants import PhoneNumberType
+from customers.factories import ContactFactory, CustomerFactory
+from customers.models import ContactPhoneNumber, Customer
+from lib.search import search
+from lib.test_helpers import IntegrationTestBase, QueryPlanMixin
+from repairs.factories import ProjectFactory
+from repairs.models import Project
+
+
+class TestTableQueryCounts(IntegrationTestBase):
+    """Tests that the data table queries do not grow with the rows"""
+
+    def get_num_queries(self, name):
+        """Return the number of queries to list the table"""
+        with CaptureQueriesContext(connection) as context:
+            resp = self.client.get(reverse(f"{name}-list"))
+            self.assertEqual(resp.status_code, 200)
+
+        return len(context.captured_queries)
+
+    def assertConstantQueries(self, name, create):
+        """Assert the number of queries is the same for 1 and 10 rows"""
+        create()
+        num_queries = self.get_num_queries(name)
+
+        for _ in range(9):
+            create()
+
+        self.assertEqual(self.get_num_queries(name), num_queries)
+
+    def test_contacts(self):
+        """Test listing the contacts table"""
+        customer = CustomerFactory()
+
+        def create():
+            contact = ContactFactory(customer=customer)
+
+            for number_type in (PhoneNumberType.WORK, PhoneNumberType.CELL):
+                ContactPhoneNumber.objects.create(
+                    contact=contact,
+                    number_type=number_type,
+                    phone_number="919-555-0100",
+                )
+
+        self.assertConstantQueries("tables-contacts", create)
+
+    def test_customers(self):
+        """Test listing the customers table"""
+
+        def create():
+            customer = CustomerFactory()
+            ProjectFactory(customer=customer)
+            ProjectFactory(customer=customer, status=Project.Status.COMPLETE)
+
+        self.assertConstantQueries("tables-customers", create)
+
+        resp = self.client.get(reverse("tables-customers-list"))
+        row = resp.json()["results"][0]
+        self.assertEqual(row["active_projects"], 1)
+        self.assertEqual(row["completed_projects"], 1)
+
+    def test_projects(self):
+        """Test listing the projects table"""
+        self.assertConstantQueries("tables-projects", ProjectFactory)
+
+    def test_users(self):
+        """Test listing the users table"""
+
+        def create():
+            user = UserFactory()
+            UserPhoneNumber.objects.create(
+                user=user,
+                number_type=PhoneNumberType.WORK,
+                phone_number="919-555-0100",
+            )
+
+        self.assertConstantQueries("tables-users", create)
+
+
+class TestTableCursorPagination(IntegrationTestBase):
+    """Tests for the data table keyset (cursor) pagination"""
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse("tables-customers-list")
+
+        # Include duplicate sort values to test the tiebreaker
+        for name in ["b", "a", "c", "a", "b", "d", "a"]:
+            CustomerFactory(name=name)
+
+    def get_pks(self, sort):
+        """Return the customer pks from paging through the table with the cursor"""
+        pks = []
+        url = self.url
+        params = {"pagination": "cursor", "per_page": 2, "sort": sort}
+
+        while url:
+            resp = self.client.get(url, params)
+            self.assertEqual(resp.status_code, 200)
+
+            data = resp.json()
+            self.assertIsNone(data["count"])
+
+            for row in data["results"]:
+                pks.append(int(re.search(r"/(\d+)/", row["name"]).group(1)))
+
+            url, params = data["next"], {}
+
+        return pks
+
+    def test_cursor(self):
+        """Test paging through the sorted table with the cursor"""
+        for sort in ["name", "-name", "created_at", "-created_at"]:
+            tiebreaker = "-pk" if sort.startswith("-") else "pk"
+            expected = Customer.objects.order_by(sort, tiebreaker)
+            pks = list(expected.values_list("pk", flat=True))
+            self.assertEqual(self.get_pks(sort), pks)
+
+    def test_cursor_microseconds(self):
+        """Test paging through the timestamps that differ by microseconds"""
+        created_at = timezone.now().replace(microsecond=123000)
+
+        pks = Customer.objects.order_by("pk").values_list("pk", flat=True)
+
+        # Include duplicate timestamps to test the tiebreaker
+        for i, pk in enumerate(pks):
+            delta = timedelta(microseconds=(i // 2) * 7)
+            Customer.objects.filter(pk=pk).update(created_at=created_at + delta)
+
+        for sort in ["created_at", "-created_at"]:
+            tiebreaker = "-pk" if sort.startswith("-") else "pk"
+            expected = Customer.objects.order_by(sort, tiebreaker)
+            pks = list(expected.values_list("pk", flat=True))
+            self.assertEqual(self.get_pks(sort), pks)
+
+    def test_cursor_count(self):
+        """Test the exact and estimated counts"""
+        params = {"pagination": "cursor", "count": "exact"}
+        resp = self.client.get(self.url, params)
+        self.assertEqual(resp.json()["count"], 7)
+
+        params = {"pagination": "cursor", "count": "estimate"}
+        resp = self.client.get(self.url, params)
+        self.assertIsInstance(resp.json()["count"], int)
+
+    def test_invalid_cursor(self):
+        """Test an invalid cursor is not found"""
+        resp = self.client.get(self.url, {"cursor": "invalid"})
+        self.assertEqual(resp.status_code, 404)
+
+    def test_cursor_search(self):
+        """Test paging through a ranked search with tied ranks"""
+        for name in ["Cary", "Cary", "Scary", "Cary", "Scary"]:
+            CustomerFactory(name=name)
+
+        pks = []
+        url = self.url
+        params = {"pagination": "cursor", "per_page": 2, "q": "cary"}
+
+        while url:
+            resp = self.client.get(url, params)
+            self.assertEqual(resp.status_code, 200)
+
+            for row in resp.json()["results"]:
+                pks.append(int(re.search(r"/(\d+)/", row["name"]).group(1)))
+
+            url, params = resp.json()["next"], {}
+
+        expected = search(Customer.objects.all(), "cary", ("name",))
+        self.assertEqual(pks, list(expected.values_list("pk", flat=True)))
+        self.assertEqual(len(set(pks)), 5)
+
+    def test_cursor_multiple_sort_fields(self):
+        """Test the keyset pagination refuses more than one sort field"""
+        queryset = Customer.objects.order_by("name", "created_at")
+
+        with self.assertRaises(ValueError):
+            KeysetPaginator(queryset, 2)
+
+    def test_invalid_sort(self):
+        """Test sorting on a field that is not sortable is ignored"""
+        resp = self.client.get(self.url, {"sort": "notes"})
+        self.assertEqual(resp.status_code, 200)
+
+
+class TestTableSearch(QueryPlanMixin, IntegrationTestBase):
+    """Tests for the data table q search"""
+
+    def setUp(self):
+        super().setUp()
+
+        for name in ["Scary Sidewalks", "Town of Apex", "Cary"]:
+            CustomerFactory(name=name)
+
+    def test_search(self):
+        """Test the search results are ranked by similarity"""
+        resp = self.client.get(reverse("tables-customers-list"), {"q": "cary"})
+        self.assertEqual(resp.status_code, 200)
+
+        names = [row["name"] for row in resp.json()["results"]]
+        self.assertEqual(len(names), 2)
+        self.assertIn(">Cary<", names[0])
+        self.assertIn(">Scary Sidewalks<", names[1])
+
+    def test_search_index(self):
+        """Test the search uses the trigram index"""
+        queryset = Customer.objects.filter(name__icontains="cary")
+        self.assertUsesIndex("customer_name_trgm_idx", queryset)
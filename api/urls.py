@@ -47,6 +47,11 @@ router.register(
 )
 
 # Project API views
+router.register(
+    "projects/imports",
+    repairs.MeasurementImportViewSet,
+    basename="project-imports",
+)
 router.register(
     "projects/layers",
     repairs.ProjectLayerViewSet,
@@ -76,6 +81,11 @@ router.register(
 )
 
 urlpatterns = router.urls + [
+    path(
+        "tiles/measurements/<int:z>/<int:x>/<int:y>.mvt",
+        measurements.MeasurementTileAPIView.as_view(),
+        name="measurement-tiles",
+    ),
     path(
         "documents/instructions/survey/<int:pk>/",
         repairs.SurveyInstructionsAPIView.as_view(),
@@ -86,4 +96,9 @@ urlpatterns = router.urls + [
         repairs.ProjectInstructionsAPIView.as_view(),
         name="documents-project-instructions",
     ),
+    path(
+        "documents/instructions/download/<uuid:request_id>/",
+        repairs.InstructionsDownloadAPIView.as_view(),
+        name="documents-instructions-download",
+    ),
 ]
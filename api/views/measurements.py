@@ -1,19 +1,27 @@
+import hashlib
+
+from django.core.cache import cache
+from django.http import Http404, HttpResponse
+from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.viewsets import ReadOnlyModelViewSet, ViewSet
 
 from api.filters.measurements import MeasurementFilter
+from api.mixins import SortMixin
 from api.serializers.measurements import MeasurementSerializer
 from repairs.models import Measurement
 from repairs.models.constants import SYMBOLS
 
 
-class MeasurementViewSet(ReadOnlyModelViewSet):
+class MeasurementViewSet(SortMixin, ReadOnlyModelViewSet):
     """Read-only view set for a Project's Measurements"""
 
     queryset = Measurement.objects.order_by("id")
     serializer_class = MeasurementSerializer
     filterset_class = MeasurementFilter
+    sort_fields = ("object_id", "measured_at")
 
 
 class SymbologyViewSet(ViewSet):
@@ -29,3 +37,45 @@ class SymbologyViewSet(ViewSet):
                 data.append({"name": icon, "url": url})
 
         return Response(data)
+
+
+class MeasurementTileAPIView(APIView):
+    """Mapbox vector tiles (MVT) of the Measurements"""
+
+    max_zoom = 22
+    cache_timeout = 60 * 60 * 24
+
+    # Tile filter query parameters (and whether the values are integers)
+    filters = {
+        "project": ("projects", True),
+        "stage": ("stages", False),
+        "territory": ("territories", True),
+        "status": ("statuses", True),
+    }
+
+    def get(self, request, z, x, y):
+        if z > self.max_zoom or x >= 2**z or y >= 2**z:
+            raise Http404
+
+        kwargs = {}
+
+        for param, (name, is_int) in self.filters.items():
+            values = sorted(request.GET.getlist(param))
+
+            try:
+                kwargs[name] = [int(v) for v in values] if is_int else values
+            except ValueError:
+                data = {param: "A valid integer is required."}
+                return Response(data, status=status.HTTP_400_BAD_REQUEST)
+
+        # Cache the tiles by the filters, until the Measurements change
+        version = Measurement.get_tiles_version()
+        key = hashlib.md5(f"{z}/{x}/{y}:{kwargs}".encode()).hexdigest()
+        key = f"measurement-tile:{version}:{key}"
+        tile = cache.get(key)
+
+        if tile is None:
+            tile = Measurement.get_tile(z, x, y, **kwargs)
+            cache.set(key, tile, self.cache_timeout)
+
+        return HttpResponse(tile, content_type="application/vnd.mapbox-vector-tile")
@@ -1,20 +1,27 @@
-import io
+import hashlib
 import logging
 from datetime import datetime, timedelta
 from datetime import timezone as tz
+from itertools import islice
 
 from django.contrib.gis.geos import Point
 from django.db import transaction
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from api.filters.projects import ProjectFilter
+from api.mixins import CachedDataMixin
 from api.serializers.projects import (
+    MeasurementImportSerializer,
     PricingSheetCompleteSerializer,
     PricingSheetSerializer,
     ProjectLayerSerializer,
@@ -25,66 +32,110 @@ from api.serializers.projects import (
 from repairs.documents import ProjectInstructionsGenerator, SurveyInstructionsGenerator
 from repairs.models import (
     Instruction,
+    InstructionDocumentRequest,
     Measurement,
+    MeasurementImport,
     PricingSheetRequest,
     Project,
     ProjectLayer,
     ProjectSummaryRequest,
 )
 from repairs.models.constants import PricingModel, QuickDescription, SpecialCase, Stage
-from utils.aws import invoke_lambda_function
 from utils.choices import value_of
+from utils.dispatch import dispatch
 
 LOGGER = logging.getLogger(__name__)
 
 
-class SurveyInstructionsAPIView(APIView):
-    """Generate the survey instructions document for download"""
+class BaseInstructionsAPIView(APIView):
+    """
+    Base instructions document API view. The document is generated by the
+    worker, so a new request returns the request id for polling (or the
+    download URL once the document has been generated).
+    """
+
+    generator_class = None
 
     def get(self, request, pk):
         instruction = get_object_or_404(Instruction, pk=pk)
         preview = str(self.request.GET.get("preview")).lower() == "true"
-        generator = SurveyInstructionsGenerator(instruction)
+        request_id = request.GET.get("request_id")
 
         if preview:
+            generator = self.generator_class(instruction)
             content = generator.render()
             return HttpResponse(content)
 
-        with io.BytesIO() as f:
-            generator.generate(f)
-            f.seek(0)
+        # If the request id is not supplied, this is a new request to
+        # generate the document (unless the version has been generated)
+        if not request_id:
+            req = InstructionDocumentRequest.get_or_request(instruction)
+            data = {"request_id": req.request_id}
+            return Response(data, status=status.HTTP_202_ACCEPTED)
 
-            filename = f"SI - {instruction.project.name}.pdf"
-            resp = HttpResponse(f, content_type="application/pdf")
-            resp["Content-Disposition"] = f'attachment; filename="{filename}"'
-            return resp
+        # If the request id is supplied, check if the request has been
+        # completed by the worker
+        req = get_object_or_404(
+            instruction.document_requests.defer("document"), request_id=request_id
+        )
+
+        if req.status == InstructionDocumentRequest.Status.COMPLETE:
+            url = reverse(
+                "documents-instructions-download",
+                kwargs={"request_id": req.request_id},
+            )
+            return Response({"url": url})
+
+        if req.status == InstructionDocumentRequest.Status.FAILED:
+            data = {"detail": "The document could not be generated."}
+            return Response(data, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        # A request may be reused, so the timeout is from the last request
+        elapsed = timezone.now() - req.requested_at
+        data = {"elapsed": elapsed.seconds}
+
+        # If the maximum timeout has been reached, indicate to the client
+        # that the request has failed and polling should be terminated
+        if elapsed.seconds >= 120:
+            return Response(data, status=status.HTTP_408_REQUEST_TIMEOUT)
 
+        return Response(data, status=status.HTTP_202_ACCEPTED)
+
+
+class SurveyInstructionsAPIView(BaseInstructionsAPIView):
+    """Generate the survey instructions document for download"""
 
-class ProjectInstructionsAPIView(APIView):
+    generator_class = SurveyInstructionsGenerator
+
+
+class ProjectInstructionsAPIView(BaseInstructionsAPIView):
     """Generate the project instructions document for download"""
 
-    def get(self, request, pk):
-        instruction = get_object_or_404(Instruction, pk=pk)
-        preview = str(self.request.GET.get("preview")).lower() == "true"
-        generator = ProjectInstructionsGenerator(instruction)
+    generator_class = ProjectInstructionsGenerator
 
-        if preview:
-            content = generator.render()
-            return HttpResponse(content)
 
-        with io.BytesIO() as f:
-            generator.generate(f)
-            f.seek(0)
+class InstructionsDownloadAPIView(APIView):
+    """Download the generated instructions document"""
+
+    def get(self, request, request_id):
+        req = get_object_or_404(
+            InstructionDocumentRequest.objects.select_related("instruction__project"),
+            request_id=request_id,
+            status=InstructionDocumentRequest.Status.COMPLETE,
+        )
 
-            filename = f"PI - {instruction.project.name}.pdf"
-            resp = HttpResponse(f, content_type="application/pdf")
-            resp["Content-Disposition"] = f'attachment; filename="{filename}"'
-            return resp
+        filename = req.get_filename()
+        resp = HttpResponse(bytes(req.document), content_type="application/pdf")
+        resp["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return resp
 
 
-class PricingSheetViewSet(viewsets.ViewSet):
+class PricingSheetViewSet(CachedDataMixin, viewsets.ViewSet):
     """Pricing sheet API view set"""
 
+    data_serializer_class = PricingSheetSerializer
+    data_cache_prefix = "pricing_sheet"
+
     def retrieve(self, request, pk=None):
         project = get_object_or_404(Project, pk=pk)
         request_id = request.GET.get("request_id")
@@ -120,8 +171,7 @@ class PricingSheetViewSet(viewsets.ViewSet):
     @action(methods=["GET"], detail=True)
     def data(self, request, pk=None):
         project = get_object_or_404(Project, pk=pk)
-        serializer = PricingSheetSerializer(project)
-        return Response(serializer.data)
+        return self.get_cached_data_response(request, project)
 
     @action(methods=["POST"], detail=True)
     def complete(self, request, pk=None):
@@ -140,9 +190,12 @@ class PricingSheetViewSet(viewsets.ViewSet):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class ProjectSummaryViewSet(viewsets.ViewSet):
+class ProjectSummaryViewSet(CachedDataMixin, viewsets.ViewSet):
     """Project summary API viewset"""
 
+    data_serializer_class = ProjectSummarySerializer
+    data_cache_prefix = "project_summary"
+
     def retrieve(self, request, pk=None):
         project = get_object_or_404(Project, pk=pk)
         request_id = request.GET.get("request_id")
@@ -176,8 +229,7 @@ class ProjectSummaryViewSet(viewsets.ViewSet):
     @action(methods=["GET"], detail=True)
     def data(self, request, pk=None):
         project = get_object_or_404(Project, pk=pk)
-        serializer = ProjectSummarySerializer(project)
-        return Response(serializer.data)
+        return self.get_cached_data_response(request, project)
 
     @action(methods=["POST"], detail=True)
     def complete(self, request, pk=None):
@@ -213,6 +265,75 @@ class ProjectViewSet(viewsets.ModelViewSet):
         ).exists()
         return Response({"complete": complete})
 
+    @action(methods=["GET"], detail=True)
+    def hazards(self, request, pk=None):
+        """Return the hazard statistics by hazard size (and the totals)"""
+        project = self.get_object()
+        stage = request.GET.get("stage", Stage.SURVEY)
+        stats = project.get_hazard_stats(stage)
+
+        total = {"count": 0, "square_feet": 0, "inch_feet": 0}
+
+        for values in stats.values():
+            for key in total:
+                total[key] += values[key]
+
+        return Response({"stage": stage, "hazard_sizes": stats, "total": total})
+
+    @action(methods=["GET"], detail=True)
+    def geojson(self, request, pk=None):
+        """
+        Stream the project Measurements as a GeoJSON FeatureCollection. The
+        response is not modified (304) if the Measurements have not changed.
+        """
+        project = self.get_object()
+        stage = request.GET.get("stage") or None
+        count, max_id, last_modified = Measurement.get_geojson_version(
+            project, stage=stage
+        )
+
+        key = f"{project.pk}:{stage}:{count}:{max_id}:{last_modified}"
+        etag = f'"{hashlib.md5(key.encode()).hexdigest()}"'
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+
+        if response is None:
+            features = Measurement.iter_geojson_features(project, stage=stage)
+            response = StreamingHttpResponse(
+                self._stream_feature_collection(features),
+                content_type="application/json",
+            )
+
+        response.headers["ETag"] = etag
+
+        if timestamp is not None:
+            response.headers["Last-Modified"] = http_date(timestamp)
+
+        return response
+
+    @staticmethod
+    def _stream_feature_collection(features, chunk_size=1000):
+        """Yield the chunks of a GeoJSON FeatureCollection"""
+        features = iter(features)
+        separator = ""
+
+        yield '{"type": "FeatureCollection", "features": ['
+
+        while chunk := list(islice(features, chunk_size)):
+            yield separator + ",".join(chunk)
+            separator = ","
+
+        yield "]}"
+
+
+class MeasurementImportViewSet(viewsets.ReadOnlyModelViewSet):
+    """Measurement import (status) API view set, polled by the project page"""
+
+    queryset = MeasurementImport.objects.defer("file").order_by("id")
+    serializer_class = MeasurementImportSerializer
+    lookup_field = "request_id"
+    filterset_fields = ("project", "stage", "status")
+
 
 class ProjectLayerViewSet(viewsets.ModelViewSet):
     """Project Layer API view set"""
@@ -220,6 +341,26 @@ class ProjectLayerViewSet(viewsets.ModelViewSet):
     queryset = ProjectLayer.objects.order_by("id")
     serializer_class = ProjectLayerSerializer
 
+    # Measurement fields that are synchronized from the layer features
+    feature_fields = (
+        "length",
+        "width",
+        "coordinate",
+        "h1",
+        "h2",
+        "curb_length",
+        "measured_hazard_length",
+        "inch_feet",
+        "area",
+        "special_case",
+        "hazard_size",
+        "tech",
+        "note",
+        "survey_group",
+        "slope",
+        "measured_at",
+    )
+
     @action(methods=["POST"], detail=True)
     def sync(self, request, pk=None):
         """Synchronize the layer with ArcGIS"""
@@ -237,13 +378,64 @@ class ProjectLayerViewSet(viewsets.ModelViewSet):
 
         layer.status = ProjectLayer.Status.IN_PROGRESS
         layer.save()
-        invoke_lambda_function("arcgis_sync", {"layer_id": layer.id})
+        dispatch("arcgis_sync", {"layer_id": layer.id})
 
         return Response({"status": layer.status})
 
     @action(methods=["POST"], detail=True)
     def features(self, request, pk=None):
         """Set the layer features from a GeoJSON FeatureCollection"""
+        features = request.data.get("features", [])
+        return self._sync_features(features)
+
+    @features.mapping.patch
+    def patch_features(self, request, pk=None):
+        """
+        Apply the features changed since the last sync (GeoJSON features) and
+        delete any Measurements whose object id is no longer in the layer.
+
+        The features may be sent in pages: the pages with "more" set are only
+        upserted and return the high-water mark so far, which is passed on
+        with the next page. The last request (without "more") completes the
+        sync, and resets the high-water mark if "full" is set.
+        """
+        features = request.data.get("features", [])
+        object_ids = request.data.get("object_ids")
+
+        # Without the full set of object ids the deletions cannot be
+        # reconciled, so reject the request rather than deleting everything
+        if object_ids is None:
+            data = {"object_ids": "This field is required."}
+            return Response(data, status=status.HTTP_400_BAD_REQUEST)
+
+        last_edited_at = request.data.get("last_edited_at")
+
+        if last_edited_at is not None:
+            last_edited_at = parse_datetime(str(last_edited_at))
+
+            if last_edited_at is None:
+                data = {"last_edited_at": "A valid datetime is required."}
+                return Response(data, status=status.HTTP_400_BAD_REQUEST)
+
+        return self._sync_features(
+            features,
+            object_ids=object_ids,
+            more=bool(request.data.get("more")),
+            full=bool(request.data.get("full")),
+            last_edited_at=last_edited_at,
+            last_object_id=request.data.get("last_object_id"),
+        )
+
+    def _sync_features(
+        self,
+        features,
+        object_ids=None,
+        more=False,
+        full=False,
+        last_edited_at=None,
+        last_object_id=None,
+    ):
+        """Synchronize the layer Measurements with the features"""
 
         # Set the layer status to IN_PROGRESS to signal that the
         # synchronization has started
@@ -251,69 +443,103 @@ class ProjectLayerViewSet(viewsets.ModelViewSet):
         layer.status = ProjectLayer.Status.IN_PROGRESS
         layer.save()
 
+        # For incremental updates, the survey group of a feature cannot be
+        # carried forward from the previous feature, so keep the existing
+        is_partial = object_ids is not None and not full
+        keep_existing = ("survey_group",) if is_partial else ()
+
         try:
-            with transaction.atomic():
-                invalid = set(
-                    layer.project.measurements.filter(stage=layer.stage).values_list(
-                        "id", flat=True
-                    )
-                )
+            measurements = {}
+            survey_group = None
 
-                survey_group = None
+            for feature in features:
+                geometry = feature["geometry"]
+                properties = feature["properties"]
 
-                for feature in request.data.get("features", []):
-                    geometry = feature["geometry"]
-                    properties = feature["properties"]
+                timestamp = properties["CreationDate"] / 1000
+                measured_at = datetime.fromtimestamp(timestamp, tz=tz.utc)
 
-                    timestamp = properties["CreationDate"] / 1000
-                    measured_at = datetime.fromtimestamp(timestamp, tz=tz.utc)
+                if is_partial:
+                    survey_group = properties.get("StartStreetArea")
+                else:
                     survey_group = properties.get("StartStreetArea") or survey_group
 
-                    defaults = {
-                        "length": properties.get("Length"),
-                        "width": properties.get("Width"),
-                        "coordinate": Point(geometry["coordinates"], srid=4326),
-                        "h1": properties.get("H1"),
-                        "h2": properties.get("H2"),
-                        "curb_length": properties.get("CurbLength"),
-                        "measured_hazard_length": properties.get(
-                            "MeasuredHazardLength"
-                        ),
-                        "inch_feet": properties.get("InchFeet"),
-                        "area": properties.get("SQFT"),
-                        "special_case": value_of(
-                            SpecialCase, properties.get("SpecialCase")
-                        ),
-                        "hazard_size": value_of(
-                            QuickDescription,
-                            properties.get("HazardSize"),
-                        ),
-                        "tech": properties["Creator"],
-                        "note": properties.get("Notes"),
-                        "survey_group": survey_group,
-                        "slope": properties.get("Slope"),
-                        "measured_at": measured_at,
-                    }
+                defaults = {
+                    "length": properties.get("Length"),
+                    "width": properties.get("Width"),
+                    "coordinate": Point(geometry["coordinates"], srid=4326),
+                    "h1": properties.get("H1"),
+                    "h2": properties.get("H2"),
+                    "curb_length": properties.get("CurbLength"),
+                    "measured_hazard_length": properties.get("MeasuredHazardLength"),
+                    "inch_feet": properties.get("InchFeet"),
+                    "area": properties.get("SQFT"),
+                    "special_case": value_of(
+                        SpecialCase, properties.get("SpecialCase")
+                    ),
+                    "hazard_size": value_of(
+                        QuickDescription,
+                        properties.get("HazardSize"),
+                    ),
+                    "tech": properties["Creator"],
+                    "note": properties.get("Notes"),
+                    "survey_group": survey_group,
+                    "slope": properties.get("Slope"),
+                    "measured_at": measured_at,
+                }
+
+                for key in list(defaults):
+                    if defaults[key] is None:
+                        defaults.pop(key)
+
+                # If an object id is repeated, the last feature wins
+                object_id = properties["OBJECTID"]
+                measurements[object_id] = Measurement(
+                    project=layer.project,
+                    stage=layer.stage,
+                    object_id=object_id,
+                    **defaults,
+                )
 
-                    for key in list(defaults):
-                        if defaults[key] is None:
-                            defaults.pop(key)
+                # Track the high-water mark for the next incremental sync
+                last_object_id = max(object_id, last_object_id or object_id)
 
-                    obj, _ = Measurement.objects.update_or_create(
-                        project=layer.project,
-                        stage=layer.stage,
-                        object_id=properties["OBJECTID"],
-                        defaults=defaults,
-                    )
+                if edit_date := properties.get("EditDate"):
+                    edited_at = datetime.fromtimestamp(edit_date / 1000, tz=tz.utc)
+                    last_edited_at = max(edited_at, last_edited_at or edited_at)
+
+            # Parse the features before opening the transaction so the
+            # Measurements table is only locked for the set-based writes
+            with transaction.atomic():
+                # Upsert the Measurements by object id and delete any that
+                # were in the original set for the project/stage but not in
+                # the latest sync
+                Measurement.bulk_upsert(
+                    layer.project,
+                    layer.stage,
+                    measurements.values(),
+                    fields=self.feature_fields,
+                    object_ids=object_ids,
+                    keep_existing=keep_existing,
+                )
+
+                # More pages follow, so the sync is completed by the last
+                if more:
+                    data = {
+                        "status": layer.status,
+                        "last_edited_at": last_edited_at,
+                        "last_object_id": last_object_id,
+                    }
+                    return Response(data)
 
-                    if obj.id in invalid:
-                        invalid.remove(obj.id)
+                Measurement.schedule_changed()
 
-                # Delete any Measurements that where in the original set
-                # for the project/stage but not in the latest sync
-                Measurement.objects.filter(id__in=invalid).delete()
+                # Update the last synced time, high-water mark, and status
+                if not is_partial:
+                    layer.last_edited_at = None
+                    layer.last_object_id = None
 
-                # Update the last synced time and status
+                layer.set_high_water_mark(last_edited_at, last_object_id)
                 layer.last_synced_at = timezone.now()
                 layer.status = ProjectLayer.Status.COMPLETE
                 layer.save()
@@ -327,7 +553,7 @@ class ProjectLayerViewSet(viewsets.ModelViewSet):
                 # based on the coordinates by adding the (project_id, stage) to
                 # the SQS queue
                 payload = {"project_id": layer.project_id, "stage": layer.stage}
-                invoke_lambda_function("geocoding", payload)
+                dispatch("geocoding", payload)
 
         # If the transaction failed, set the layer status to FAILED
         except Exception as exc:
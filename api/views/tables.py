@@ -1,7 +1,11 @@
+from datetime import date
+
 from django.contrib.auth import get_user_model
-from rest_framework import viewsets
+from django.db.models import Count, Prefetch, Q
+from rest_framework import status, viewsets
 from rest_framework.response import Response
 
+from accounts.models import UserPhoneNumber
 from api.filters.tables import (
     ContactTableFilter,
     CustomerTableFilter,
@@ -9,6 +13,7 @@ from api.filters.tables import (
     ProjectTableFilter,
     UserTableFilter,
 )
+from api.mixins import SortMixin
 from api.serializers.tables import (
     ContactTableSerializer,
     CustomerTableSerializer,
@@ -16,52 +21,102 @@ from api.serializers.tables import (
     ProjectTableSerializer,
     UserTableSerializer,
 )
-from customers.models import Contact, Customer
+from core.models.constants import PhoneNumberType
+from customers.models import Contact, ContactPhoneNumber, Customer
 from lib.pay_periods import get_pay_period_dates
 from repairs.models import Measurement, Project, ProjectManagementDashboardView
 
 User = get_user_model()
 
 
-class SortMixin:
-    """Mixin to dynamically handle sort order"""
-
-    def get_queryset(self):
-        queryset = super().get_queryset()
+def get_phone_prefetches(model):
+    """
+    Return the work/cell phone number prefetches (to the work_phone_numbers
+    and cell_phone_numbers attributes) for the phone number model
+    """
+    prefetches = []
 
-        if sort := self.request.GET.get("sort"):
-            queryset = queryset.order_by(sort)
+    for number_type, to_attr in (
+        (PhoneNumberType.WORK, "work_phone_numbers"),
+        (PhoneNumberType.CELL, "cell_phone_numbers"),
+    ):
+        queryset = model.objects.filter(number_type=number_type).order_by("id")
+        prefetches.append(Prefetch("phone_numbers", queryset, to_attr=to_attr))
 
-        return queryset
+    return prefetches
 
 
 class ContactTableViewSet(SortMixin, viewsets.ReadOnlyModelViewSet):
-    queryset = Contact.objects.order_by("id")
+    queryset = Contact.objects.prefetch_related(
+        *get_phone_prefetches(ContactPhoneNumber)
+    ).order_by("id")
     serializer_class = ContactTableSerializer
+    sort_fields = ("name", "title", "email", "created_at")
     filterset_class = ContactTableFilter
 
 
 class CustomerTableViewSet(SortMixin, viewsets.ReadOnlyModelViewSet):
-    queryset = Customer.objects.order_by("id")
+    queryset = (
+        Customer.objects.select_related("business_development_manager", "territory")
+        .annotate(
+            active_projects_count=Count(
+                "projects", filter=~Q(projects__status=Project.Status.COMPLETE)
+            ),
+            completed_projects_count=Count(
+                "projects", filter=Q(projects__status=Project.Status.COMPLETE)
+            ),
+        )
+        .order_by("id")
+    )
     serializer_class = CustomerTableSerializer
+    sort_fields = (
+        "name",
+        "business_development_manager__full_name",
+        "territory__name",
+        "segment",
+        "created_at",
+    )
     filterset_class = CustomerTableFilter
 
 
 class ProjectTableViewSet(SortMixin, viewsets.ReadOnlyModelViewSet):
-    queryset = Project.objects.order_by("id")
+    queryset = Project.objects.select_related(
+        "customer", "territory", "business_development_manager"
+    ).order_by("id")
     serializer_class = ProjectTableSerializer
+    sort_fields = (
+        "customer__name",
+        "name",
+        "status",
+        "business_development_manager",
+        "customer__segment",
+        "territory__name",
+        "created_at",
+    )
     filterset_class = ProjectTableFilter
 
 
 class UserTableViewSet(SortMixin, viewsets.ReadOnlyModelViewSet):
-    queryset = User.objects.order_by("id")
+    queryset = User.objects.prefetch_related(
+        *get_phone_prefetches(UserPhoneNumber)
+    ).order_by("id")
     serializer_class = UserTableSerializer
+    sort_fields = ("full_name", "email", "last_login")
     filterset_class = UserTableFilter
 
 
 class DashboardTableViewSet(SortMixin, viewsets.ReadOnlyModelViewSet):
     queryset = ProjectManagementDashboardView.objects.order_by("project_id")
     serializer_class = DashboardTableSerializer
+    sort_fields = (
+        "customer_name",
+        "bd_name",
+        "name",
+        "status",
+        "start_date",
+        "last_date",
+        "territory_label",
+    )
     filterset_class = DashboardTableFilter
 
 
@@ -78,10 +133,14 @@ class TechProductionDashboardTableViewSet(viewsets.ViewSet):
 
     def list(self, request):
         """List the tech production between the start/end dates"""
-        period = int(request.GET.get("period", 0))
         techs = request.GET.getlist("tech", [])
 
-        start_date, end_date = get_pay_period_dates(period)
+        # An arbitrary date range takes precedence over the pay period
+        try:
+            start_date, end_date = self.get_date_range(request)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
         data = Measurement.get_tech_production(start_date, end_date, techs=techs)
 
         for row in data:
@@ -105,3 +164,23 @@ class TechProductionDashboardTableViewSet(viewsets.ViewSet):
                     row[label] = round(row[label], 2)
 
         return Response(data)
+
+    def get_date_range(self, request):
+        """Return the start/end dates from the date range or pay period"""
+        start_date = request.GET.get("start_date")
+        end_date = request.GET.get("end_date")
+
+        if not start_date and not end_date:
+            period = int(request.GET.get("period", 0))
+            return get_pay_period_dates(period)
+
+        if not start_date or not end_date:
+            raise ValueError("Both start_date and end_date are required.")
+
+        start_date = date.fromisoformat(start_date)
+        end_date = date.fromisoformat(end_date)
+
+        if end_date < start_date:
+            raise ValueError("The end_date must not be before the start_date.")
+
+        return start_date, end_date
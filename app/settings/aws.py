@@ -22,3 +22,12 @@ LAMBDA = {
         "enabled": True,
     },
 }
+
+# Backend that dispatches the function invocations: "lambda" (invoke the AWS
+# Lambda functions), "local" (run the Python handlers in a process pool), or
+# "outbox" (queue them in the database for the dispatch_tasks worker, which
+# delivers them with the DISPATCH_OUTBOX_BACKEND)
+DISPATCH_BACKEND = os.environ.get("DISPATCH_BACKEND", "lambda")
+DISPATCH_OUTBOX_BACKEND = os.environ.get("DISPATCH_OUTBOX_BACKEND", "lambda")
+DISPATCH_LOCAL_WORKERS = int(os.environ.get("DISPATCH_LOCAL_WORKERS", 2))
+DISPATCH_MAX_ATTEMPTS = int(os.environ.get("DISPATCH_MAX_ATTEMPTS", 5))
@@ -5,6 +5,7 @@ from pathlib import Path
 from app.settings.arcgis import *
 from app.settings.auth import *
 from app.settings.aws import *
+from app.settings.cache import *
 from app.settings.cors import *
 from app.settings.db import *
 from app.settings.drf import *
@@ -35,6 +36,7 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
     "django.contrib.sites",
     "django.contrib.gis",
+    "django.contrib.postgres",
     "django_extensions",
     "compressor",
     "corsheaders",
@@ -105,6 +107,9 @@ STATICFILES_FINDERS = [
     "compressor.finders.CompressorFinder",
 ]
 
+# Uploaded files (e.g. the measurement imports)
+MEDIA_ROOT = os.environ.get("MEDIA_ROOT", BASE_DIR / "media")
+
 COMPRESS_PRECOMPILERS = [
     ("text/x-scss", "django_libsass.SassCompiler"),
 ]
@@ -0,0 +1,24 @@
+import os
+
+# The database cache is shared by all of the app processes (e.g. so that the
+# cached measurement tiles are invalidated everywhere). The cache table is
+# created with the createcachetable command.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "django_cache",
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.environ.get("CACHE_MAX_ENTRIES", 10000)),
+        },
+    },
+    # The rendered documents (PDFs) are cached separately so that the large
+    # entries do not evict (or count against) the default cache entries
+    "documents": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "django_document_cache",
+        "TIMEOUT": 7 * 24 * 60 * 60,
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.environ.get("DOCUMENT_CACHE_MAX_ENTRIES", 500)),
+        },
+    },
+}
@@ -1,5 +1,6 @@
 from django.contrib import admin
 
-from core.models import Territory
+from core.models import DispatchTask, Territory
 
+admin.site.register(DispatchTask)
 admin.site.register(Territory)
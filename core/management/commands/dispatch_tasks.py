@@ -0,0 +1,86 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from core.models import DispatchTask
+from utils.dispatch import OutboxBackend, get_backend
+
+LOGGER = logging.getLogger(__name__)
+
+# How long the dispatched tasks are kept (and how often they are purged)
+PURGE_AFTER = timedelta(days=7)
+PURGE_INTERVAL = timedelta(hours=1)
+
+
+def dispatch_task(task, backend):
+    """Deliver the queued invocation (or schedule it to be retried)"""
+    # The tasks are claimed in batches, so refresh the task before delivering
+    # it (otherwise the rest of a slow batch could be retried as stale)
+    task.start()
+
+    try:
+        backend.dispatch(task.function, task.payload, wait=True)
+    except Exception as exc:
+        LOGGER.exception(f"Error dispatching {task.function} {task.pk}: {exc}")
+        task.retry(exc, max_attempts=settings.DISPATCH_MAX_ATTEMPTS)
+    else:
+        task.complete()
+
+
+class Command(BaseCommand):
+    help = "Deliver the queued function invocations of the dispatch outbox (worker)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once there are no pending tasks",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait between polls for pending tasks",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Maximum number of tasks claimed per poll",
+        )
+
+    def handle(self, *args, **options):
+        backend = get_backend(settings.DISPATCH_OUTBOX_BACKEND)
+
+        if isinstance(backend, OutboxBackend):
+            raise ImproperlyConfigured("The outbox cannot be delivered to itself")
+
+        purged_at = None
+
+        while True:
+            close_old_connections()
+            DispatchTask.retry_stale(max_attempts=settings.DISPATCH_MAX_ATTEMPTS)
+            tasks = DispatchTask.claim(limit=options["batch_size"])
+
+            for task in tasks:
+                dispatch_task(task, backend)
+
+            if tasks:
+                continue
+
+            now = timezone.now()
+
+            if purged_at is None or now - purged_at >= PURGE_INTERVAL:
+                DispatchTask.purge(now - PURGE_AFTER)
+                purged_at = now
+
+            if options["once"]:
+                break
+
+            time.sleep(options["interval"])
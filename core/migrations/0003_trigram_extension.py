@@ -0,0 +1,14 @@
+# Generated by Django 4.2.4 on 2026-10-18 13:00
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0002_territory_royalty_rate_territory_updated_at"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+    ]
@@ -1,2 +1,3 @@
 # ruff: noqa
+from core.models.dispatch import DispatchTask
 from core.models.territories import Territory
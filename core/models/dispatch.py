@@ -0,0 +1,154 @@
+import hashlib
+import json
+from datetime import timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
+
+
+class DispatchTask(models.Model):
+    """Function invocation queued in the dispatch outbox"""
+
+    class Status(models.TextChoices):
+        """Dispatch status"""
+
+        PENDING = ("PENDING", "Pending")
+        IN_PROGRESS = ("IN_PROGRESS", "In Progress")
+        COMPLETE = ("COMPLETE", "Complete")
+        FAILED = ("FAILED", "Failed")
+
+    # An in progress task that has not been updated for this long is assumed
+    # to have been interrupted (i.e. the worker stopped), so it is retried
+    STALE_AFTER = timedelta(minutes=15)
+
+    function = models.CharField(max_length=50)
+    payload = models.JSONField(encoder=DjangoJSONEncoder, default=dict)
+    payload_key = models.CharField(max_length=32, help_text="Payload hash")
+    status = models.CharField(
+        max_length=25, choices=Status.choices, default=Status.PENDING
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    run_at = models.DateTimeField(default=timezone.now)
+    error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            # A duplicate of a pending invocation (e.g. the geocoding of the
+            # same project/stage) is redundant, so only one can be pending
+            models.UniqueConstraint(
+                fields=["function", "payload_key"],
+                name="dispatch_task_pending_uniq",
+                condition=models.Q(status="PENDING"),
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["run_at"],
+                name="dispatch_task_pending_idx",
+                condition=models.Q(status="PENDING"),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.function} - {self.payload}"
+
+    @staticmethod
+    def get_payload_key(payload):
+        """Return the hash of the payload (for the duplicate detection)"""
+        data = json.dumps(payload, cls=DjangoJSONEncoder, sort_keys=True)
+        return hashlib.md5(data.encode()).hexdigest()
+
+    @classmethod
+    def enqueue(cls, function, payload):
+        """Queue the invocation (unless the same invocation is pending)"""
+        task = cls(
+            function=function,
+            payload=payload,
+            payload_key=cls.get_payload_key(payload),
+        )
+        cls.objects.bulk_create([task], ignore_conflicts=True)
+
+    @classmethod
+    def claim(cls, limit=100):
+        """
+        Claim the pending tasks that are due, skipping any locked by another
+        worker so that several workers can run concurrently
+        """
+        with transaction.atomic():
+            tasks = list(
+                cls.objects.select_for_update(skip_locked=True)
+                .filter(status=cls.Status.PENDING, run_at__lte=timezone.now())
+                .order_by("run_at")[:limit]
+            )
+
+            cls.objects.filter(pk__in=[task.pk for task in tasks]).update(
+                status=cls.Status.IN_PROGRESS, updated_at=timezone.now()
+            )
+
+        for task in tasks:
+            task.status = cls.Status.IN_PROGRESS
+
+        return tasks
+
+    @classmethod
+    def retry_stale(cls, max_attempts):
+        """Retry the interrupted (stale) in progress tasks"""
+        stale = timezone.now() - cls.STALE_AFTER
+
+        with transaction.atomic():
+            tasks = cls.objects.select_for_update(skip_locked=True).filter(
+                status=cls.Status.IN_PROGRESS, updated_at__lt=stale
+            )
+
+            for task in tasks:
+                task.retry("The dispatch was interrupted.", max_attempts)
+
+    def start(self):
+        """Mark the task as being delivered (now)"""
+        self.save(update_fields=["updated_at"])
+
+    def complete(self):
+        """Mark the task as dispatched"""
+        self.attempts += 1
+        self.error = None
+        self.status = self.Status.COMPLETE
+        self.save(update_fields=["attempts", "error", "status", "updated_at"])
+
+    def retry(self, error, max_attempts):
+        """
+        Schedule the task to be retried (with an exponential backoff) or mark
+        it as failed once the maximum attempts have been made
+        """
+        self.attempts += 1
+        self.error = str(error)
+
+        if self.attempts >= max_attempts:
+            self.status = self.Status.FAILED
+            self.save(update_fields=["attempts", "error", "status", "updated_at"])
+            return
+
+        self.status = self.Status.PENDING
+        self.run_at = timezone.now() + timedelta(seconds=2**self.attempts)
+
+        # If the same invocation has been queued since, it supersedes the retry
+        try:
+            with transaction.atomic():
+                self.save(
+                    update_fields=[
+                        "attempts",
+                        "error",
+                        "status",
+                        "run_at",
+                        "updated_at",
+                    ]
+                )
+        except IntegrityError:
+            self.delete()
+
+    @classmethod
+    def purge(cls, before):
+        """Delete the tasks dispatched before the time"""
+        cls.objects.filter(status=cls.Status.COMPLETE, updated_at__lt=before).delete()
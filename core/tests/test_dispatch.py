@@ -0,0 +1,85 @@
+from datetime import timedelta
+
+from django.test import override_settings
+from django.utils import timezone
+
+from core.models import DispatchTask
+from lib.test_helpers import IntegrationTestBase
+from utils.aws import get_lambda_client
+from utils.dispatch import dispatch
+
+
+@override_settings(DISPATCH_BACKEND="outbox")
+class TestDispatchOutbox(IntegrationTestBase):
+    """Tests for the dispatch outbox"""
+
+    def test_dispatch_duplicates(self):
+        """Test the duplicate pending invocations are collapsed"""
+        for _ in range(3):
+            dispatch("arcgis_sync", {"layer_id": 1})
+
+        dispatch("arcgis_sync", {"layer_id": 2})
+
+        tasks = DispatchTask.objects.filter(status=DispatchTask.Status.PENDING)
+        self.assertEqual(tasks.count(), 2)
+
+        # Once claimed, a new invocation is queued again
+        self.assertEqual(len(DispatchTask.claim()), 2)
+        dispatch("arcgis_sync", {"layer_id": 1})
+        self.assertEqual(tasks.count(), 1)
+
+    def test_retry(self):
+        """Test the failed invocations are retried until the maximum attempts"""
+        dispatch("arcgis_sync", {"layer_id": 1})
+        (task,) = DispatchTask.claim()
+
+        task.retry("error", max_attempts=2)
+        self.assertEqual(task.status, DispatchTask.Status.PENDING)
+        self.assertEqual(task.attempts, 1)
+
+        # The retry is not due yet
+        self.assertEqual(DispatchTask.claim(), [])
+
+        task.retry("error", max_attempts=2)
+        task.refresh_from_db()
+        self.assertEqual(task.status, DispatchTask.Status.FAILED)
+        self.assertEqual(task.error, "error")
+
+    def test_retry_stale(self):
+        """Test the tasks of a stopped worker are retried"""
+        dispatch("arcgis_sync", {"layer_id": 1})
+        (task,) = DispatchTask.claim()
+
+        # The task is not retried while it is being delivered
+        DispatchTask.retry_stale(max_attempts=5)
+        task.refresh_from_db()
+        self.assertEqual(task.status, DispatchTask.Status.IN_PROGRESS)
+
+        DispatchTask.objects.update(
+            updated_at=timezone.now() - DispatchTask.STALE_AFTER - timedelta(minutes=1)
+        )
+        DispatchTask.retry_stale(max_attempts=5)
+
+        task.refresh_from_db()
+        self.assertEqual(task.status, DispatchTask.Status.PENDING)
+        self.assertEqual(task.attempts, 1)
+        self.assertEqual(task.error, "The dispatch was interrupted.")
+
+    def test_retry_superseded(self):
+        """Test a retry is dropped if the same invocation is pending"""
+        dispatch("arcgis_sync", {"layer_id": 1})
+        (task,) = DispatchTask.claim()
+
+        dispatch("arcgis_sync", {"layer_id": 1})
+        task.retry("error", max_attempts=5)
+
+        self.assertFalse(DispatchTask.objects.filter(pk=task.pk).exists())
+        self.assertEqual(DispatchTask.objects.count(), 1)
+
+
+class TestDispatchLambda(IntegrationTestBase):
+    """Tests for the Lambda dispatch"""
+
+    def test_lambda_client(self):
+        """Test the Lambda client is shared between the invocations"""
+        self.assertIs(get_lambda_client(), get_lambda_client())
@@ -5,6 +5,7 @@ from core.models import Territory
 from core.models.abstract import AbstractPhoneNumber
 from core.models.constants import PhoneNumberType, States
 from customers.constants import Segment
+from lib.search import get_trigram_index
 
 User = get_user_model()
 
@@ -30,6 +31,9 @@ class Customer(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [get_trigram_index("name", "customer_name_trgm_idx")]
+
     def __str__(self):
         return self.name
 
@@ -78,6 +82,12 @@ class Contact(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            get_trigram_index("name", "contact_name_trgm_idx"),
+            get_trigram_index("email", "contact_email_trgm_idx"),
+        ]
+
     def get_phone_number(self):
         """Return the Work or Cell phone number"""
         if phone := self.get_work_phone():
@@ -51,6 +51,11 @@ def set_project_layer_features(layer_id, data):
     return _request("POST", f"/api/projects/layers/{layer_id}/features/", data=data)
 
 
+def patch_project_layer_features(layer_id, data):
+    """Apply the ProjectLayer's changed features"""
+    return _request("PATCH", f"/api/projects/layers/{layer_id}/features/", data=data)
+
+
 def _request(method, path, query=None, data=None, raise_exception=True):
     """Perform an HTTP request to the API"""
     token = os.environ.get("API_KEY")
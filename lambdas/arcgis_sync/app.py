@@ -10,8 +10,8 @@ from api import (
     get_project_by_item,
     get_project_layer,
     match_items,
+    patch_project_layer_features,
     set_item_parent,
-    set_project_layer_features,
     upsert_item,
 )
 
@@ -19,13 +19,17 @@ LOGGER = logging.getLogger(__name__)
 RE_LAYER_TYPE = re.compile(r"^PSS\s+(?P<layer_type>Survey|Repair)")
 
 
+class SyncError(Exception):
+    """Error synchronizing the layer features"""
+
+
 def handler(event, context):
     """Synchronize the ArcGIS data"""
 
     # If the event contains a layer_id, the request is to sync
     # the data for the particular layer
     if layer_id := event.get("layer_id"):
-        sync_layer(layer_id)
+        sync_layer(layer_id, full=event.get("full", False))
 
     # Otherwise, the request is to sync the ArcGIS items, match
     # them to deals, and sync any layers that have been modified
@@ -37,14 +41,91 @@ def handler(event, context):
     return {"StatusCode": 200}
 
 
-def sync_layer(layer_id):
+def sync_layer(layer_id, full=False):
     """Synchronize the ArcGIS data for a project layer"""
     project_layer = get_project_layer(layer_id)
     arcgis_layer = get_item(project_layer["arcgis_item"])
+    where = get_delta_where(project_layer)
 
     client = ArcGISClient()
-    features = client.get_features_by_url(arcgis_layer["url"])
-    set_project_layer_features(layer_id, features)
+    url = arcgis_layer["url"]
+
+    # If the layer has not been synced (or a full sync is requested), send
+    # every feature. Otherwise, only send the features edited since the last
+    # sync. The features are sent a page at a time (so the layer is never
+    # held in memory), with the current object ids to reconcile any
+    # deletions, and the sync is completed once the last page is sent.
+    full = full or where is None
+
+    if full:
+        where = "1=1"
+
+    object_ids = client.get_object_ids_by_url(url)
+    pages = client.iter_features_by_url(url, where=where)
+
+    # The pages are sent as separate requests, so a full sync carries the
+    # blank survey groups forward across the pages itself
+    if full:
+        pages = carry_survey_groups(pages)
+
+    # The high-water mark so far (returned by each page)
+    mark = {}
+    count = 0
+
+    for features in pages:
+        data = {"features": features, "object_ids": object_ids, "more": True}
+        resp = check_sync(patch_project_layer_features(layer_id, {**data, **mark}))
+        mark = {key: resp[key] for key in ("last_edited_at", "last_object_id")}
+        count += len(features)
+
+    data = {"features": [], "object_ids": object_ids, "full": full}
+    check_sync(patch_project_layer_features(layer_id, {**data, **mark}))
+
+    LOGGER.info(f"Synced {count} features")
+
+
+def check_sync(resp):
+    """Return the layer features response, or raise an error if it failed"""
+    if resp["status"] == "FAILED":
+        raise SyncError("The layer features sync failed")
+
+    return resp
+
+
+def carry_survey_groups(pages):
+    """Yield the pages of features with the blank survey groups filled in"""
+    survey_group = None
+
+    for features in pages:
+        for feature in features:
+            properties = feature["properties"]
+
+            if properties.get("StartStreetArea"):
+                survey_group = properties["StartStreetArea"]
+            else:
+                properties["StartStreetArea"] = survey_group
+
+        yield features
+
+
+def get_delta_where(project_layer):
+    """Return the where clause for the features changed since the last sync"""
+    last_edited_at = project_layer.get("last_edited_at")
+    last_object_id = project_layer.get("last_object_id")
+
+    if not (project_layer.get("last_synced_at") and last_edited_at):
+        return None
+
+    # Query from the high-water mark inclusively, since the EditDate is
+    # compared at second precision (re-syncing a feature is harmless)
+    edited_at = datetime.fromisoformat(last_edited_at.replace("Z", "+00:00"))
+    edited_at = edited_at.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    where = f"EditDate >= TIMESTAMP '{edited_at}'"
+
+    if last_object_id:
+        where += f" OR OBJECTID > {last_object_id}"
+
+    return where
 
 
 def sync_items(days=1):
@@ -115,4 +196,8 @@ def sync_items(days=1):
             }
             project_layer = create_project_layer(data)
 
-        sync_layer(project_layer["id"])
+        # A failed layer is left FAILED (to be synced again), not the rest
+        try:
+            sync_layer(project_layer["id"])
+        except SyncError as exc:
+            LOGGER.error(f"Error syncing layer {project_layer['id']}: {exc}")
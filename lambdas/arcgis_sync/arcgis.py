@@ -1,5 +1,7 @@
 import os
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 from urllib.parse import urlencode
 
@@ -13,11 +15,14 @@ class ArcGISClient:
         WEB_MAP = "Web Map"
         FEATURE_SERVICE = "Feature Service"
 
-    def __init__(self):
+    def __init__(self, page_size=None, max_workers=4):
         self._auth_url = "https://www.arcgis.com/sharing/rest/generateToken"
         self._base_url = "https://psspims.maps.arcgis.com"
         self._token = None
         self._token_expires = -1
+        self._page_size = page_size
+        self._max_workers = max_workers
+        self._session = requests.Session()
 
     def _request(self, method, path, query=None, json=None, base_url=None):
         """Perform an API request"""
@@ -36,7 +41,7 @@ class ArcGISClient:
         params = urlencode(query)
         url = f"{base_url}{path}?{params}"
 
-        resp = requests.request(method, url, json=json, timeout=60)
+        resp = self._session.request(method, url, json=json, timeout=60)
         resp.raise_for_status()
         data = resp.json()
 
@@ -62,7 +67,7 @@ class ArcGISClient:
             "f": "json",
         }
 
-        resp = requests.post(self._auth_url, data, timeout=60)
+        resp = self._session.post(self._auth_url, data, timeout=60)
         resp.raise_for_status()
         data = resp.json()
 
@@ -132,15 +137,95 @@ class ArcGISClient:
 
         return self.get_features_by_url(url)
 
-    def get_features_by_url(self, url):
+    def get_features_by_url(self, url, where="1=1"):
         """Fetch a Layer's features by its feature server URL"""
+        features = []
+
+        for page in self.iter_features_by_url(url, where=where):
+            features += page
+
+        return {"type": "FeatureCollection", "features": features}
+
+    def iter_features_by_url(self, url, where="1=1"):
+        """
+        Yield a Layer's features in pages (ordered by object id). The pages
+        are fetched by object id range, concurrently, and sized by the layer's
+        maxRecordCount (unless a page size is given), so the layer is not
+        truncated by the server.
+        """
+        field, object_ids = self._get_object_ids(url, where)
+        object_ids = sorted(object_ids)
+        size = self._page_size or self.get_max_record_count(url)
+
+        # Refresh the token up front so the worker threads share it
+        if self.is_token_expired():
+            self.refresh_token()
+
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            futures = deque()
+
+            for i in range(0, len(object_ids), size):
+                page = object_ids[i : i + size]
+                futures.append(
+                    executor.submit(self._get_features_page, url, where, field, page)
+                )
+
+                # Bound the number of pages in flight (and held in memory)
+                if len(futures) >= self._max_workers:
+                    yield futures.popleft().result()
+
+            while futures:
+                yield futures.popleft().result()
+
+    def get_max_record_count(self, url, default=1000):
+        """Return a Layer's maximum number of features returned by a query"""
+        return self._get("", base_url=url).get("maxRecordCount") or default
+
+    def get_object_ids_by_url(self, url, where="1=1"):
+        """Fetch a Layer's object ids by its feature server URL"""
+        _, object_ids = self._get_object_ids(url, where)
+        return object_ids
+
+    def _get_object_ids(self, url, where):
+        """Return the object id field name and object ids"""
+        query = {
+            "where": where,
+            "returnIdsOnly": True,
+        }
+
+        data = self._get("/query", query=query, base_url=url)
+        field = data.get("objectIdFieldName") or "OBJECTID"
+        return field, data.get("objectIds") or []
+
+    def _get_features_page(self, url, where, field, object_ids):
+        """
+        Fetch a page of a Layer's features by the (sorted) object ids. If the
+        server truncates the page, the range is split and fetched again.
+        """
         query = {
-            "where": "1=1",
+            "where": (
+                f"({where}) AND {field} >= {object_ids[0]} "
+                f"AND {field} <= {object_ids[-1]}"
+            ),
             "returnGeometry": True,
-            "orderByFields": "OBJECTID ASC",
+            "orderByFields": f"{field} ASC",
             "outFields": "*",
             "outSR": 4326,
             "f": "geojson",
         }
 
-        return self._get("/query", query=query, base_url=url)
+        data = self._get("/query", query=query, base_url=url)
+
+        # The GeoJSON format reports the limit in the properties
+        exceeded = data.get("exceededTransferLimit") or data.get("properties", {}).get(
+            "exceededTransferLimit"
+        )
+
+        if exceeded and len(object_ids) > 1:
+            middle = len(object_ids) // 2
+
+            return self._get_features_page(
+                url, where, field, object_ids[:middle]
+            ) + self._get_features_page(url, where, field, object_ids[middle:])
+
+        return data.get("features", [])
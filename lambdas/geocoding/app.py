@@ -1,9 +1,20 @@
 import json
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 
 import psycopg2
 from mapbox import Geocoder
-from psycopg2.extras import execute_batch
+from psycopg2.extras import execute_batch, execute_values
+
+# Number of decimal places to round the coordinates to before geocoding
+# (5 decimal places is ~1 meter). Measurements that round to the same
+# coordinate share a single lookup.
+PRECISION = int(os.environ.get("GEOCODING_PRECISION", 5))
+MAX_WORKERS = int(os.environ.get("GEOCODING_MAX_WORKERS", 8))
+MAX_RETRIES = int(os.environ.get("GEOCODING_MAX_RETRIES", 5))
 
 
 def handler(event, context):
@@ -25,7 +36,7 @@ def handler(event, context):
 
 
 def get_measurements(project_id, stage):
-    """Return the measurement records for the project/stage"""
+    """Return the measurement records for the project/stage (not geocoded)"""
     query = """
         SELECT
             id,
@@ -34,6 +45,7 @@ def get_measurements(project_id, stage):
         FROM repairs_measurement
         WHERE project_id = %(project_id)s
             AND stage = %(stage)s
+            AND geocoded_address IS NULL
     """
 
     with get_db().cursor() as cursor:
@@ -45,43 +57,157 @@ def get_measurements(project_id, stage):
 
 
 def get_geocoded_addresses(measurements):
-    """Return the Mapbox geocoded addresses"""
-    geocoder = Geocoder()
-    addresses = []
+    """Return the geocoded addresses (cached or from Mapbox)"""
+    index = {}
 
     for measurement in measurements:
-        pk = measurement["id"]
-        lat = measurement["lat"]
-        lon = measurement["lon"]
+        key = (
+            round(measurement["lon"], PRECISION),
+            round(measurement["lat"], PRECISION),
+        )
+        index.setdefault(key, []).append(measurement["id"])
 
-        address = None
-        resp = geocoder.reverse(lat=lat, lon=lon, limit=1, types=["address"])
+    cache = get_cached_addresses(list(index))
+    missing = [key for key in index if key not in cache]
 
-        if resp.ok:
-            features = resp.json()["features"]
+    if missing:
+        geocoder = Geocoder()
 
-            if features:
-                feature = features[0]
-                address = feature.get("text")
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            results = executor.map(lambda key: reverse_geocode(geocoder, *key), missing)
+            geocoded = dict(zip(missing, results))
 
-                if "address" in feature:
-                    address = f"{feature['address']} {address}"
+        # Only cache the successful lookups (failures return False)
+        geocoded = {k: v for k, v in geocoded.items() if v is not False}
+        set_cached_addresses(geocoded)
+        cache.update(geocoded)
 
-        else:
-            error = resp.json()
-            print(f"Error geocoding measurement={pk}: {error}")
+    addresses = []
 
-        addresses.append({"id": pk, "address": address})
+    for key, pks in index.items():
+        for pk in pks:
+            addresses.append({"id": pk, "address": cache.get(key) or None})
 
     return addresses
 
 
+def get_retry_delay(retry_after, attempt):
+    """
+    Return the seconds to wait from the Retry-After header (either seconds or
+    an HTTP date), falling back to the exponential backoff for the attempt
+    """
+    if retry_after:
+        try:
+            return max(float(retry_after), 0)
+        except ValueError:
+            pass
+
+        try:
+            retry_at = parsedate_to_datetime(retry_after)
+        except (TypeError, ValueError):
+            retry_at = None
+
+        if retry_at is not None:
+            if retry_at.tzinfo is None:
+                retry_at = retry_at.replace(tzinfo=timezone.utc)
+
+            return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0)
+
+    return 2**attempt
+
+
+def reverse_geocode(geocoder, lon, lat):
+    """
+    Return the Mapbox geocoded address for the coordinate (None if there is
+    no address, False if the request failed)
+    """
+    for attempt in range(MAX_RETRIES):
+        resp = geocoder.reverse(lat=lat, lon=lon, limit=1, types=["address"])
+
+        # If rate limited, back off for the requested (or exponential) delay
+        if resp.status_code == 429:
+            time.sleep(get_retry_delay(resp.headers.get("Retry-After"), attempt))
+            continue
+
+        if not resp.ok:
+            error = resp.json()
+            print(f"Error geocoding ({lon}, {lat}): {error}")
+            return False
+
+        features = resp.json()["features"]
+
+        if not features:
+            return None
+
+        feature = features[0]
+        address = feature.get("text")
+
+        if "address" in feature:
+            address = f"{feature['address']} {address}"
+
+        return address
+
+    print(f"Error geocoding ({lon}, {lat}): rate limit retries exceeded")
+    return False
+
+
+def get_cached_addresses(keys):
+    """Return the cached addresses for the rounded coordinates"""
+    if not keys:
+        return {}
+
+    query = """
+        SELECT
+            c.longitude,
+            c.latitude,
+            c.address
+        FROM mapbox_geocoded_address c
+            JOIN UNNEST(%(lons)s::float[], %(lats)s::float[]) AS k(lon, lat)
+                ON c.longitude = k.lon AND c.latitude = k.lat
+    """
+
+    with get_db().cursor() as cursor:
+        params = {"lons": [k[0] for k in keys], "lats": [k[1] for k in keys]}
+        cursor.execute(query, params)
+        return {(lon, lat): address for (lon, lat, address) in cursor.fetchall()}
+
+
+def set_cached_addresses(addresses):
+    """Insert the geocoded addresses into the cache"""
+    if not addresses:
+        return
+
+    query = """
+        INSERT INTO mapbox_geocoded_address (longitude, latitude, address, created_at)
+        VALUES %s
+        ON CONFLICT (longitude, latitude) DO NOTHING
+    """
+
+    values = [(lon, lat, address) for (lon, lat), address in addresses.items()]
+
+    with get_db() as conn:
+        with conn.cursor() as cursor:
+            execute_values(cursor, query, values, template="(%s, %s, %s, NOW())")
+            conn.commit()
+
+
 def update_measurements(addresses):
-    """Update the measurement geocoded addresses"""
+    """
+    Update the measurement geocoded addresses. The measurements without an
+    address (or with the same address) are not updated, so their updated_at
+    (and the cached payloads) are unchanged.
+    """
+    addresses = [a for a in addresses if a["address"] is not None]
+
+    if not addresses:
+        return
+
     query = """
         UPDATE repairs_measurement
-            SET geocoded_address = %(address)s
+            SET geocoded_address = %(address)s,
+                updated_at = NOW()
         WHERE id = %(id)s
+            AND geocoded_address IS DISTINCT FROM %(address)s
     """
 
     with get_db() as conn:
@@ -0,0 +1,44 @@
+import csv
+import io
+import time
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+
+@contextmanager
+def rollback():
+    """Run the block in a transaction that is always rolled back"""
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+def measure(func, *args, **kwargs):
+    """Return the wall time (seconds) and query count of a function call"""
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        func(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+
+    return {"seconds": elapsed, "queries": len(queries)}
+
+
+def scale_csv(filename, factor, id_column="OBJECTID"):
+    """Return a CSV file object with the rows repeated N times (renumbered)"""
+    with open(filename, "r", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        fieldnames = reader.fieldnames
+        rows = list(reader)
+
+    file_obj = io.StringIO()
+    writer = csv.DictWriter(file_obj, fieldnames=fieldnames)
+    writer.writeheader()
+
+    for i in range(factor):
+        for j, row in enumerate(rows):
+            writer.writerow({**row, id_column: i * len(rows) + j + 1})
+
+    file_obj.seek(0)
+    return file_obj
@@ -0,0 +1,75 @@
+def apply_nested_diff(
+    queryset, rows, key, new_rows=(), create=True, delete=True, **defaults
+):
+    """
+    Apply the submitted nested form rows to the queryset's (related) rows.
+
+    The rows are a dict of the key (a tuple of the key field values) to the
+    field values. The existing rows are loaded once and diffed against the
+    submitted rows: the changed rows are bulk updated, the new rows (and any
+    new_rows, which have no key) are bulk created with the defaults and the
+    rows that were not submitted are deleted, so that the whole set is
+    written in at most one query per operation.
+    """
+    model = queryset.model
+    auto_now = [
+        field
+        for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False)
+    ]
+
+    existing = {}
+    removed = []
+
+    for obj in queryset:
+        obj_key = tuple(getattr(obj, name) for name in key)
+
+        # Only one row is kept per key, so remove any duplicates
+        if obj_key in existing:
+            removed.append(existing[obj_key])
+
+        existing[obj_key] = obj
+
+    created = [model(**defaults, **values) for values in new_rows]
+    updated = []
+    update_fields = set()
+
+    for row_key, values in rows.items():
+        obj = existing.pop(row_key, None)
+
+        if obj is None:
+            if create:
+                fields = dict(zip(key, row_key))
+                created.append(model(**defaults, **fields, **values))
+            continue
+
+        changed = [
+            name for name, value in values.items() if getattr(obj, name) != value
+        ]
+
+        if changed:
+            for name in changed:
+                setattr(obj, name, values[name])
+
+            updated.append(obj)
+            update_fields.update(changed)
+
+    if delete:
+        removed.extend(existing.values())
+
+    if removed:
+        model.objects.filter(pk__in=[obj.pk for obj in removed]).delete()
+
+    if created:
+        model.objects.bulk_create(created)
+
+    if updated:
+        # The bulk update does not set the auto_now fields (i.e. updated_at)
+        for obj in updated:
+            for field in auto_now:
+                field.pre_save(obj, add=False)
+
+        update_fields.update(field.name for field in auto_now)
+        model.objects.bulk_update(updated, sorted(update_fields))
+
+    return {"created": len(created), "updated": len(updated), "deleted": len(removed)}
@@ -0,0 +1,64 @@
+import uuid
+
+from django.contrib.gis.db.models import GeometryField
+from django.db import connection
+
+
+def get_bulk_fields(model, exclude=("id",)):
+    """Return the concrete fields to bulk load for a model"""
+    return [
+        field
+        for field in model._meta.concrete_fields
+        if field.attname not in exclude and field.name not in exclude
+    ]
+
+
+def get_bulk_row(obj, fields):
+    """Return the database values for an unsaved model instance"""
+    row = []
+
+    for field in fields:
+        value = field.pre_save(obj, add=True)
+
+        # COPY cannot adapt the GEOS geometries, so send the EWKT and
+        # let PostGIS parse it on the server.
+        if isinstance(field, GeometryField):
+            row.append(value.ewkt if value is not None else None)
+        else:
+            row.append(field.get_db_prep_save(value, connection))
+
+    return row
+
+
+def create_staging_table(cursor, model, columns):
+    """Create a temporary staging table (dropped on commit) for a model"""
+    table = model._meta.db_table
+    staging = f"{table}_staging_{uuid.uuid4().hex[:8]}"
+
+    cursor.execute(
+        f"""
+            CREATE TEMPORARY TABLE {staging} ON COMMIT DROP AS
+                SELECT {", ".join(columns)} FROM {table} WITH NO DATA
+        """
+    )
+
+    return staging
+
+
+def copy_rows(cursor, table, columns, rows):
+    """Stream the rows into the table using COPY FROM STDIN"""
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+    error = None
+
+    with cursor.copy(sql) as copy:
+        try:
+            for row in rows:
+                copy.write_row(row)
+        except Exception as exc:
+            # End the COPY cleanly and re-raise the original error, otherwise
+            # the server's cancellation of the COPY would mask it. The caller's
+            # transaction discards the partially staged rows.
+            error = exc
+
+    if error is not None:
+        raise error
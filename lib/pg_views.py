@@ -6,11 +6,40 @@ LOGGER = logging.getLogger(__name__)
 
 
 def create_or_replace_views(models):
-    """Create or replace the PostgreSQL views"""
+    """Create or replace the PostgreSQL views (in order of dependency)"""
 
     with transaction.atomic():
         with connection.cursor() as cursor:
             for model in models:
-                LOGGER.info(f"Syncing PostgreSQL view: {model._meta.db_table}")
-                sql = f"CREATE OR REPLACE VIEW {model._meta.db_table} AS {model.sql}"
-                cursor.execute(sql)
+                table = model._meta.db_table
+                LOGGER.info(f"Syncing PostgreSQL view: {table}")
+
+                # Materialized views cannot be replaced, so drop and recreate
+                # them (dependent views are recreated after them). The unique
+                # index is required to refresh them concurrently.
+                if getattr(model, "materialized", False):
+                    columns = ", ".join(model.unique_key)
+                    cursor.execute(f"DROP MATERIALIZED VIEW IF EXISTS {table} CASCADE")
+                    cursor.execute(f"CREATE MATERIALIZED VIEW {table} AS {model.sql}")
+                    cursor.execute(
+                        f"CREATE UNIQUE INDEX {table}_key ON {table} ({columns})"
+                    )
+                else:
+                    sql = f"CREATE OR REPLACE VIEW {table} AS {model.sql}"
+                    cursor.execute(sql)
+
+
+def refresh_materialized_view(model, concurrently=True):
+    """Refresh a PostgreSQL materialized view (if it has been created)"""
+    table = model._meta.db_table
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [table])
+
+        if not cursor.fetchone()[0]:
+            LOGGER.warning(f"PostgreSQL view {table} does not exist. Run sync_pgviews.")
+            return
+
+        LOGGER.info(f"Refreshing PostgreSQL materialized view: {table}")
+        option = "CONCURRENTLY " if concurrently else ""
+        cursor.execute(f"REFRESH MATERIALIZED VIEW {option}{table}")
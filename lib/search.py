@@ -0,0 +1,39 @@
+from functools import reduce
+from operator import or_
+
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db.models import Q
+from django.db.models.functions import Greatest, Upper
+
+
+def get_trigram_index(field, name):
+    """
+    Return the pg_trgm GIN index for the icontains lookups of a field (which
+    are compiled to UPPER(field) LIKE UPPER('%value%'))
+    """
+    return GinIndex(OpClass(Upper(field), name="gin_trgm_ops"), name=name)
+
+
+def search(queryset, value, fields, rank=True):
+    """
+    Filter the queryset to the rows where any of the fields contain the
+    value and (optionally) order them by the best trigram word similarity
+    """
+    value = value.strip()
+
+    if not value:
+        return queryset
+
+    condition = reduce(or_, [Q(**{f"{field}__icontains": value}) for field in fields])
+    queryset = queryset.filter(condition)
+
+    if not rank:
+        return queryset
+
+    similarities = [TrigramWordSimilarity(value, field) for field in fields]
+    similarity = Greatest(*similarities) if len(similarities) > 1 else similarities[0]
+
+    # The (newest) pk breaks the ties in the rank, so that the order (and the
+    # keyset pagination) is stable
+    return queryset.annotate(search_rank=similarity).order_by("-search_rank", "-pk")
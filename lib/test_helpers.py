@@ -1,7 +1,55 @@
+from django.db import connection
 from django.test import Client, TestCase
 
 from accounts.factories import UserFactory
 from accounts.models import UserRole
+from customers.factories import ContactFactory
+from repairs.factories import ProjectFactory
+from repairs.models import InstructionNote, InstructionSpecification
+from repairs.models.constants import (
+    DRSpecification,
+    Hazard,
+    ProjectSpecification,
+    QuickDescription,
+    SpecialCase,
+)
+
+# The instruction specification choices by type (see create_instructions)
+SPECIFICATIONS = {
+    InstructionSpecification.SpecificationType.HAZARD: Hazard,
+    InstructionSpecification.SpecificationType.HAZARD_SIZE: QuickDescription,
+    InstructionSpecification.SpecificationType.SPECIAL_CASE: SpecialCase,
+    InstructionSpecification.SpecificationType.DR: DRSpecification,
+    InstructionSpecification.SpecificationType.PROJECT: ProjectSpecification,
+}
+
+
+def create_instructions(specifications=True):
+    """Create a project with (every) instruction specification set"""
+    project = ProjectFactory()
+    project.primary_contact = ContactFactory(customer=project.customer)
+    project.secondary_contact = ContactFactory(customer=project.customer)
+    project.save()
+
+    if not specifications:
+        return project
+
+    for instruction in project.instructions.all():
+        InstructionSpecification.objects.bulk_create(
+            InstructionSpecification(
+                instruction=instruction,
+                specification_type=spec_type,
+                specification=value,
+                note=f"Note for {value}",
+            )
+            for spec_type, choices in SPECIFICATIONS.items()
+            for value in choices.values
+        )
+        InstructionNote.objects.bulk_create(
+            InstructionNote(instruction=instruction, note=f"Note {i}") for i in range(3)
+        )
+
+    return project
 
 
 class IntegrationTestBase(TestCase):
@@ -17,3 +65,28 @@ class IntegrationTestBase(TestCase):
         self.bdm = UserFactory.create_with_roles([UserRole.Role.BDM])
         self.bda = UserFactory.create_with_roles([UserRole.Role.BDA])
         self.surveyor = UserFactory.create_with_roles([UserRole.Role.SURVEYOR])
+
+
+class QueryPlanMixin:
+    """Mixin to assert that queries are planned with the expected indexes"""
+
+    def get_query_plan(self, sql, params=None):
+        """Return the EXPLAIN output for a query (or queryset)"""
+        if hasattr(sql, "query"):
+            sql, params = sql.query.sql_with_params()
+
+        # The test tables are too small for the planner to prefer an index,
+        # so disable sequential scans while explaining the query
+        with connection.cursor() as cursor:
+            cursor.execute("SET enable_seqscan = off")
+
+            try:
+                cursor.execute(f"EXPLAIN {sql}", params)
+                return "\n".join(row[0] for row in cursor.fetchall())
+            finally:
+                cursor.execute("RESET enable_seqscan")
+
+    def assertUsesIndex(self, index, sql, params=None):
+        """Assert that the query plan scans the index"""
+        plan = self.get_query_plan(sql, params)
+        self.assertIn(index, plan, msg=f"Index {index} not used:\n{plan}")
@@ -0,0 +1,64 @@
+import codecs
+import io
+
+from chardet.universaldetector import UniversalDetector
+
+# Size of the file prefix that the encoding is detected from (so that the
+# detection time does not grow with the file size)
+SAMPLE_SIZE = 64 * 1024
+CHUNK_SIZE = 4 * 1024
+
+
+def decode_cp1252(exc):
+    """
+    Decode the invalid UTF-8 bytes as Windows-1252, for a file whose prefix
+    is UTF-8 (e.g. ASCII) but has a legacy character after the prefix
+    """
+    if not isinstance(exc, UnicodeDecodeError):
+        raise exc
+
+    text = exc.object[exc.start : exc.end].decode("cp1252", errors="replace")
+    return text, exc.end
+
+
+codecs.register_error("cp1252-fallback", decode_cp1252)
+
+
+def detect_encoding(file_obj, sample_size=SAMPLE_SIZE):
+    """
+    Return the encoding of the binary file from its prefix: UTF-8 (with or
+    without the BOM) if the prefix decodes, otherwise the encoding detected
+    incrementally by chardet. The file position is restored.
+    """
+    position = file_obj.tell()
+    sample = file_obj.read(sample_size)
+    file_obj.seek(position)
+
+    # The sample may end part way through a character, so it is not final
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8-sig"
+    except UnicodeDecodeError:
+        pass
+
+    detector = UniversalDetector()
+
+    for start in range(0, len(sample), CHUNK_SIZE):
+        detector.feed(sample[start : start + CHUNK_SIZE])
+
+        if detector.done:
+            break
+
+    detector.close()
+    return detector.result["encoding"] or "utf-8"
+
+
+def open_text(file_obj, sample_size=SAMPLE_SIZE):
+    """
+    Return the (CSV) text stream of the binary file (e.g. an upload), which
+    is decoded lazily rather than read into memory. Only the prefix has been
+    checked, so the invalid UTF-8 bytes after it are decoded as Windows-1252.
+    """
+    encoding = detect_encoding(file_obj, sample_size=sample_size)
+    errors = "cp1252-fallback" if encoding == "utf-8-sig" else "strict"
+    return io.TextIOWrapper(file_obj, encoding=encoding, errors=errors, newline="")
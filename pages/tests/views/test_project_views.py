@@ -1,10 +1,16 @@
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
 from django.shortcuts import reverse
+from django.test.utils import CaptureQueriesContext
 
 from core.factories import TerritoryFactory
 from customers.factories import ContactFactory, CustomerFactory
 from lib.test_helpers import IntegrationTestBase
+from lib.uploads import SAMPLE_SIZE
 from repairs.factories import ProjectFactory
-from repairs.models import Measurement
+from repairs.models import InstructionChecklistQuestion, Measurement, MeasurementImport
+from repairs.models.constants import DRSpecification, Hazard, SpecialCase, Stage
 
 
 class TestProjectListView(IntegrationTestBase):
@@ -114,7 +120,11 @@ class TestProjectMeasurementsImportView(IntegrationTestBase):
             data = {"file": f}
             resp = self.client.post(url, data)
             self.assertEqual(resp.status_code, 302)
-            self.assertEqual(project.measurements.count(), 165)
+
+        # The import is run by the worker
+        self.assertEqual(project.measurements.count(), 0)
+        call_command("import_measurements", "--once")
+        self.assertEqual(project.measurements.count(), 165)
 
     def test_import_production(self):
         project = ProjectFactory()
@@ -129,7 +139,108 @@ class TestProjectMeasurementsImportView(IntegrationTestBase):
             data = {"file": f}
             resp = self.client.post(url, data)
             self.assertEqual(resp.status_code, 302)
-            self.assertEqual(project.measurements.count(), 59)
+
+        # The import is run by the worker
+        self.assertEqual(project.measurements.count(), 0)
+        call_command("import_measurements", "--once")
+        self.assertEqual(project.measurements.count(), 59)
+
+    def test_import_latin_1(self):
+        project = ProjectFactory()
+
+        filename = "repairs/tests/fixtures/survey_template.csv"
+        url = reverse(
+            "project-measurements-import", kwargs={"pk": project.pk, "stage": "survey"}
+        )
+
+        with open(filename, "r", encoding="utf-8-sig") as f:
+            data = f.read().replace("104 Aisling Ct,,", "104 Aisling Ct,Café,", 1)
+
+        upload = SimpleUploadedFile("survey.csv", data.encode("latin-1"))
+        resp = self.client.post(url, {"file": upload})
+        self.assertEqual(resp.status_code, 302)
+
+        call_command("import_measurements", "--once")
+        self.assertEqual(project.measurements.count(), 165)
+
+        measurement = project.measurements.get(object_id=1)
+        self.assertEqual(measurement.note, "Café")
+
+    def test_import_cp1252_past_sample(self):
+        """Test a legacy character after the encoding detection prefix"""
+        project = ProjectFactory()
+
+        filename = "repairs/tests/fixtures/survey_template.csv"
+        url = reverse(
+            "project-measurements-import", kwargs={"pk": project.pk, "stage": "survey"}
+        )
+
+        # The (ASCII) prefix is detected as UTF-8
+        with open(filename, "r", encoding="utf-8-sig") as f:
+            data = f.read().replace(
+                "104 Aisling Ct,,", f"104 Aisling Ct,{'x' * SAMPLE_SIZE},", 1
+            )
+            data = data.replace("106 Aisling Ct,,", "106 Aisling Ct,Café,", 1)
+
+        upload = SimpleUploadedFile("survey.csv", data.encode("cp1252"))
+        self.client.post(url, {"file": upload})
+
+        call_command("import_measurements", "--once")
+        self.assertEqual(project.measurements.count(), 165)
+
+        measurement = project.measurements.get(object_id=3)
+        self.assertEqual(measurement.note, "Café")
+
+    def test_import_error(self):
+        project = ProjectFactory()
+
+        filename = "repairs/tests/fixtures/survey_template.csv"
+        url = reverse(
+            "project-measurements-import", kwargs={"pk": project.pk, "stage": "survey"}
+        )
+
+        with open(filename, "rb") as f:
+            data = f.read().replace(b",Curb,", b",Unknown,", 1)
+
+        upload = SimpleUploadedFile("survey.csv", data)
+        resp = self.client.post(url, {"file": upload})
+
+        job = MeasurementImport.objects.get(project=project)
+        self.assertRedirects(
+            resp,
+            reverse("project-detail", kwargs={"pk": project.pk})
+            + f"?import={job.request_id}",
+            fetch_redirect_response=False,
+        )
+
+        call_command("import_measurements", "--once")
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, MeasurementImport.Status.FAILED)
+        self.assertIn("Special Case", job.error)
+        self.assertEqual(project.measurements.count(), 0)
+
+    def test_import_retry(self):
+        project = ProjectFactory()
+
+        filename = "repairs/tests/fixtures/survey_template.csv"
+        url = reverse(
+            "project-measurements-import", kwargs={"pk": project.pk, "stage": "survey"}
+        )
+
+        # A retried upload replaces the pending import
+        for _ in range(3):
+            with open(filename, "rb") as f:
+                self.client.post(url, {"file": f})
+
+        self.assertEqual(project.measurement_imports.count(), 1)
+
+        call_command("import_measurements", "--once")
+
+        job = project.measurement_imports.get()
+        self.assertEqual(job.status, MeasurementImport.Status.COMPLETE)
+        self.assertEqual(job.rows_processed, 165)
+        self.assertFalse(job.file)
 
 
 class TestProjectMeasurementsExportView(IntegrationTestBase):
@@ -148,7 +259,8 @@ class TestProjectMeasurementsExportView(IntegrationTestBase):
         )
         resp = self.client.get(url)
 
-        data = resp.content.decode("utf-8").strip().split("\n")
+        content = b"".join(resp.streaming_content)
+        data = content.decode("utf-8").strip().split("\n")
         self.assertEqual(len(data), 166)  # 165 measurements + header
 
     def test_export_production(self):
@@ -165,7 +277,8 @@ class TestProjectMeasurementsExportView(IntegrationTestBase):
         )
         resp = self.client.get(url)
 
-        data = resp.content.decode("utf-8").strip().split("\n")
+        content = b"".join(resp.streaming_content)
+        data = content.decode("utf-8").strip().split("\n")
         self.assertEqual(len(data), 60)  # 59 measurements + header
 
 
@@ -229,3 +342,54 @@ class TestProjectInstructionsView(IntegrationTestBase):
         resp = self.client.post(url, data)
         self.assertEqual(resp.status_code, 302)
         self.assertEqual(resp.url, redirect_url)
+
+    def test_save_num_queries(self):
+        """Test saving the full form in a constant number of queries"""
+        for order in range(20):
+            InstructionChecklistQuestion.objects.create(
+                order=order, question=f"Question {order}"
+            )
+
+        project = ProjectFactory()
+        project.primary_contact = ContactFactory(customer=project.customer)
+        project.save()
+
+        instruction = project.instructions.get(stage=Stage.PRODUCTION)
+        url = reverse("project-pi", kwargs={"pk": project.pk})
+        data = {"contact_note:primary": "Call ahead", "note:new:0": "New note"}
+
+        for prefix, choices in (
+            ("hazard", Hazard),
+            ("special_case", SpecialCase),
+            ("dr", DRSpecification),
+        ):
+            for value in choices.values:
+                data[f"{prefix}:state:{value}"] = "on"
+                data[f"{prefix}:note:{value}"] = f"Note for {value}"
+
+        for obj in instruction.checklist.all():
+            data[f"checklist:{obj.pk}"] = "Yes"
+
+        with CaptureQueriesContext(connection) as queries:
+            resp = self.client.post(url, data)
+
+        self.assertEqual(resp.status_code, 302)
+        self.assertLess(len(queries), 20)
+
+        self.assertEqual(instruction.contact_notes.get().note, "Call ahead")
+        self.assertEqual(instruction.notes.get().note, "New note")
+        self.assertEqual(instruction.checklist.filter(response="Yes").count(), 20)
+        self.assertEqual(
+            instruction.specifications.count(),
+            len(Hazard) + len(SpecialCase) + len(DRSpecification),
+        )
+
+        # The specifications and contact notes not submitted are deleted
+        note = instruction.notes.get()
+        data = {f"note:{note.pk}": "Updated note"}
+        resp = self.client.post(url, data)
+
+        self.assertEqual(resp.status_code, 302)
+        self.assertEqual(instruction.specifications.count(), 0)
+        self.assertEqual(instruction.contact_notes.count(), 0)
+        self.assertEqual(instruction.notes.get().note, "Updated note")
@@ -1,12 +1,10 @@
-import io
 import json
 import logging
 from datetime import datetime
 
-import chardet
 from django.contrib.auth import get_user_model
 from django.db import transaction
-from django.http import HttpResponse
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, reverse
 from django.utils.text import slugify
 from django.views import View
@@ -18,11 +16,11 @@ from django.views.generic import (
     TemplateView,
     UpdateView,
 )
-from pydantic import ValidationError
 
 from core.models import Territory
 from customers.constants import Segment
 from customers.models import Customer
+from lib.forms import apply_nested_diff
 from pages.forms.projects import (
     PricingSheetContactForm,
     PricingSheetInchFootForm,
@@ -31,10 +29,9 @@ from pages.forms.projects import (
     ProjectMeasurementsForm,
 )
 from repairs.models import (
-    InstructionContactNote,
-    InstructionNote,
     InstructionSpecification,
     Measurement,
+    MeasurementImport,
     Project,
     ProjectLayer,
 )
@@ -51,7 +48,7 @@ from repairs.models.constants import (
     Stage,
 )
 from third_party.models import ArcGISItem
-from utils.aws import invoke_lambda_function
+from utils.dispatch import dispatch
 
 LOGGER = logging.getLogger(__name__)
 
@@ -118,19 +115,22 @@ class ProjectDetailView(DetailView):
 
     def get_map_legend(self):
         """Return the map legend"""
-        queryset = self.get_object().measurements.all()
+        queryset = self.get_object().measurements.values_list(
+            "stage", "hazard_size", "special_case"
+        )
+        used = [set(values) for values in zip(*queryset.distinct())] or [set()] * 3
         legend = {"stages": [], "hazard_sizes": [], "special_cases": []}
 
         for stage, label in Stage.choices:
-            if queryset.filter(stage=stage).exists():
+            if stage in used[0]:
                 legend["stages"].append(label)
 
         for hazard_size, label in QuickDescription.choices:
-            if queryset.filter(hazard_size=hazard_size).exists():
+            if hazard_size in used[1]:
                 legend["hazard_sizes"].append(label)
 
         for special_case, label in SpecialCase.choices:
-            if queryset.filter(special_case=special_case).exists():
+            if special_case in used[2]:
                 legend["special_cases"].append(label)
 
         return legend
@@ -205,6 +205,7 @@ class ProjectWebMapView(DetailView):
 
                 project.layers.all().delete()
                 project.measurements.all().delete()
+                Measurement.schedule_changed()
 
                 for child in item.children.all():
                     if child.title.startswith("PSS Survey"):
@@ -220,7 +221,7 @@ class ProjectWebMapView(DetailView):
                         layers.append(layer.id)
 
         for layer in layers:
-            invoke_lambda_function("arcgis_sync", {"layer_id": layer})
+            dispatch("arcgis_sync", {"layer_id": layer})
 
         redirect_url = reverse("project-detail", kwargs={"pk": self.kwargs["pk"]})
         return redirect(redirect_url)
@@ -246,33 +247,16 @@ class ProjectMeasurementsImportView(FormView):
 
         return context
 
-    def get_success_url(self):
-        return reverse("project-detail", kwargs={"pk": self.kwargs["pk"]})
-
     def form_valid(self, form):
         project = get_object_or_404(Project, pk=self.kwargs["pk"])
         stage = self.kwargs["stage"].strip().upper()
 
-        raw_data = form.cleaned_data["file"].read()
-        encoding = chardet.detect(raw_data)["encoding"]
-        data = raw_data.decode(encoding)
-
-        try:
-            with io.StringIO() as file_obj:
-                file_obj.write(data)
-                Measurement.import_from_csv(file_obj, project=project, stage=stage)
-        except ValidationError as exc:
-            error = exc.errors()[0]
-            reason = error.get("msg", "Unable to parse the file")
-            columns = ", ".join(error.get("loc", []))
-            message = f"[{columns}]: {reason}"
-
-            LOGGER.error(f"Error importing measurements: {exc}")
-            redirect_url = f"{self.request.path}?error={message}"
-
-            return redirect(redirect_url)
+        # The import is run by the worker, and the project page polls its
+        # status (and progress) with the request id
+        job = MeasurementImport.request(project, stage, form.cleaned_data["file"])
 
-        return super().form_valid(form)
+        url = reverse("project-detail", kwargs={"pk": project.pk})
+        return redirect(f"{url}?import={job.request_id}")
 
 
 class ProjectMeasurementsExportView(View):
@@ -282,12 +266,11 @@ class ProjectMeasurementsExportView(View):
         project = get_object_or_404(Project, pk=pk)
         filename = f"{slugify(project.name)}_data_{stage}.csv"
 
-        with io.StringIO() as f:
-            Measurement.export_to_csv(f, project, stage.upper())
-
-            resp = HttpResponse(f, content_type="text/csv")
-            resp["Content-Disposition"] = f'attachment; filename="{filename}"'
-            return resp
+        # Stream the CSV rather than building the whole file in memory
+        rows = Measurement.iter_csv(project, stage.upper())
+        resp = StreamingHttpResponse(rows, content_type="text/csv")
+        resp["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return resp
 
 
 class ProjectMeasurementsClearView(View):
@@ -297,6 +280,7 @@ class ProjectMeasurementsClearView(View):
 
         with transaction.atomic():
             project.measurements.filter(stage=stage).delete()
+            Measurement.schedule_changed()
 
             # If the layer with a matching stage exists, update
             # the sync status to reflect the deleted data.
@@ -428,19 +412,21 @@ class BaseInstructionsView(TemplateView):
 
     def process_contact_notes(self, instruction):
         """Process the instruction contact notes"""
-        keep = []
+        rows = {}
 
         for key in ("primary", "secondary"):
             note = self.request.POST.get(f"contact_note:{key}", "").strip()
-            contact = getattr(instruction.project, f"{key}_contact", None)
+            contact_id = getattr(instruction.project, f"{key}_contact_id", None)
 
-            if note and contact:
-                obj, _ = InstructionContactNote.objects.update_or_create(
-                    instruction=instruction, contact=contact, note=note
-                )
-                keep.append(obj.pk)
+            if note and contact_id:
+                rows[(contact_id,)] = {"note": note}
 
-        instruction.contact_notes.exclude(pk__in=keep).delete()
+        apply_nested_diff(
+            instruction.contact_notes.all(),
+            rows,
+            key=("contact_id",),
+            instruction=instruction,
+        )
 
     def process_specifications(self, instruction):
         """Process the instruction special cases"""
@@ -452,7 +438,7 @@ class BaseInstructionsView(TemplateView):
             "project": InstructionSpecification.SpecificationType.PROJECT,
         }
 
-        keep = []
+        rows = {}
 
         for form_key in self.request.POST:
             for spec_prefix, spec_type in index.items():
@@ -470,16 +456,14 @@ class BaseInstructionsView(TemplateView):
                     if spec_prefix == "dr" and spec in ("C1", "C2"):
                         defaults["note"] = self.request.POST.get(f"dr:state:{spec}")
 
-                    obj, _ = InstructionSpecification.objects.update_or_create(
-                        instruction=instruction,
-                        specification_type=spec_type,
-                        specification=spec,
-                        defaults=defaults,
-                    )
+                    rows[(spec_type, spec)] = defaults
 
-                    keep.append(obj.pk)
-
-        instruction.specifications.exclude(pk__in=keep).delete()
+        apply_nested_diff(
+            instruction.specifications.all(),
+            rows,
+            key=("specification_type", "specification"),
+            instruction=instruction,
+        )
 
     def process_reference_images(self, instruction):
         """Process the reference images"""
@@ -501,25 +485,28 @@ class BaseInstructionsView(TemplateView):
 
     def process_notes(self, instruction):
         """Process the instruction notes"""
-        keep = []
+        rows = {}
+        new_rows = []
 
         for form_key in self.request.POST:
             if form_key.startswith("note:new:"):
                 if note := self.request.POST.get(form_key).strip():
-                    obj = InstructionNote.objects.create(
-                        instruction=instruction, note=note
-                    )
-                    keep.append(obj.pk)
+                    new_rows.append({"note": note})
 
             elif form_key.startswith("note:"):
                 if note := self.request.POST.get(form_key).strip():
                     pk = int(form_key.replace("note:", ""))
-                    InstructionNote.objects.filter(
-                        instruction=instruction, pk=pk
-                    ).update(note=note)
-                    keep.append(pk)
-
-        instruction.notes.exclude(pk__in=keep).delete()
+                    rows[(pk,)] = {"note": note}
+
+        # Only the existing notes can be edited (by their primary key)
+        apply_nested_diff(
+            instruction.notes.all(),
+            rows,
+            key=("pk",),
+            new_rows=new_rows,
+            create=False,
+            instruction=instruction,
+        )
 
     def process_debris_notes(self, instruction):
         """Process the debris and trailer parking notes"""
@@ -527,13 +514,21 @@ class BaseInstructionsView(TemplateView):
 
     def process_checklist(self, instruction):
         """Process the instruction checklist"""
+        rows = {}
 
         for form_key in self.request.POST:
             if form_key.startswith("checklist:"):
                 pk = int(form_key.replace("checklist:", ""))
-                obj = instruction.checklist.get(pk=pk)
-                obj.response = self.request.POST.get(form_key, "").strip()
-                obj.save()
+                rows[(pk,)] = {"response": self.request.POST.get(form_key, "").strip()}
+
+        # The checklist questions are fixed, so the responses are only updated
+        apply_nested_diff(
+            instruction.checklist.all(),
+            rows,
+            key=("pk",),
+            create=False,
+            delete=False,
+        )
 
     def process_published(self, instruction):
         """Process the instruction published status"""
@@ -1,10 +1,14 @@
+import functools
+import hashlib
 import io
 from abc import abstractmethod
 from base64 import b64encode
 
 from django.contrib.staticfiles import finders
+from django.core.cache import caches
 from django.template import loader
-from pypdf import PdfWriter
+from django.utils.functional import cached_property
+from pypdf import PdfReader, PdfWriter
 from weasyprint import CSS, HTML
 
 from repairs.models.constants import (
@@ -13,7 +17,45 @@ from repairs.models.constants import (
     ProjectSpecification,
     QuickDescription,
     SpecialCase,
+    Stage,
 )
+from repairs.models.instructions import InstructionSpecification
+from repairs.models.projects import Project
+
+SpecificationType = InstructionSpecification.SpecificationType
+
+
+@functools.cache
+def find_static(path):
+    """Return the absolute path of the static file (memoized per process)"""
+    return finders.find(path)
+
+
+@functools.cache
+def get_stylesheet(path):
+    """Return the parsed stylesheet (memoized per process)"""
+    return CSS(path)
+
+
+@functools.cache
+def get_data_uri(path, mime_type):
+    """Return the base64 encoded data URI of the file (memoized per process)"""
+    with open(path, "rb") as f:
+        data = b64encode(f.read()).decode("utf-8")
+        return f"data:{mime_type};base64,{data}"
+
+
+@functools.cache
+def get_pdf_reader(path):
+    """Return the parsed PDF reader (memoized per process)"""
+    return PdfReader(path)
+
+
+@functools.cache
+def get_file_digest(path):
+    """Return the SHA-256 digest of the file (memoized per process)"""
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
 
 
 class AbstractDocumentGenerator:
@@ -33,11 +75,38 @@ class BaseInstructionsGenerator(AbstractDocumentGenerator):
     def __init__(self, instruction):
         self.instruction = instruction
 
+        # Load the project (and its related objects) for the template at once
+        instruction.project = Project.objects.select_related(
+            "customer",
+            "territory",
+            "primary_contact",
+            "secondary_contact",
+            "business_development_manager",
+            "business_development_administrator",
+        ).get(pk=instruction.project_id)
+
     def generate(self, file_obj):
-        """Generate the survey instructions PDF"""
+        """
+        Generate the instructions PDF. The PDF is cached by the hash of the
+        rendered HTML, stylesheet and supplements, so an unchanged document
+        is not rendered again.
+        """
+        content = self.render()
+        supplements = self.get_supplemental_files()
+        key = self.get_cache_key(content, supplements)
+        cache = caches["documents"]
+        document = cache.get(key)
+
+        if document is None:
+            document = self.build(content, supplements)
+            cache.set(key, document)
+
+        file_obj.write(document)
+
+    def build(self, content, supplements):
+        """Build the PDF from the rendered HTML and supplemental files"""
         with io.BytesIO() as document:
-            content = self.render()
-            css = CSS(self.stylesheet)
+            css = get_stylesheet(self.stylesheet)
             html = HTML(string=content)
             html.write_pdf(document, stylesheets=[css])
 
@@ -45,11 +114,22 @@ class BaseInstructionsGenerator(AbstractDocumentGenerator):
             merger = PdfWriter()
             merger.append(fileobj=document)
 
-            for supplement in self.get_supplemental_files():
-                merger.append(supplement)
+            for supplement in supplements:
+                merger.append(get_pdf_reader(supplement))
+
+            with io.BytesIO() as f:
+                merger.write(f)
+                merger.close()
+                return f.getvalue()
+
+    def get_cache_key(self, content, supplements):
+        """Return the cache key of the rendered HTML and supplemental files"""
+        digest = hashlib.sha256(content.encode())
+
+        for path in (self.stylesheet, *supplements):
+            digest.update(get_file_digest(path).encode())
 
-            merger.write(file_obj)
-            merger.close()
+        return f"instructions:{digest.hexdigest()}"
 
     def render(self):
         """Render the template to HTML"""
@@ -60,17 +140,36 @@ class BaseInstructionsGenerator(AbstractDocumentGenerator):
 
     def get_context_data(self):
         """Return the context data to render"""
+        project = self.instruction.project
+        contact_notes = list(self.instruction.contact_notes.order_by("created_at"))
+
         return {
             "instruction": self.instruction,
             "logo": self.get_logo(),
+            "primary_contact_notes": [
+                note
+                for note in contact_notes
+                if note.contact_id == project.primary_contact_id
+            ],
+            "secondary_contact_notes": [
+                note
+                for note in contact_notes
+                if note.contact_id == project.secondary_contact_id
+            ],
+            "notes": list(self.instruction.get_notes()),
         }
 
     def get_logo(self):
         """Return the base64 encoded logo"""
-        with open("static/logos/pss_logo.png", "rb") as f:
-            image = f.read()
-            data = b64encode(image).decode("utf-8")
-            return f"data:image/png;base64,{data}"
+        return get_data_uri("static/logos/pss_logo.png", "image/png")
+
+    @cached_property
+    def specifications(self):
+        """Return the instruction specifications by (type, specification)"""
+        return {
+            (spec.specification_type, spec.specification): spec
+            for spec in self.instruction.specifications.all()
+        }
 
     def get_specification(self, spec_type, choices):
         """Return the specification data"""
@@ -78,9 +177,7 @@ class BaseInstructionsGenerator(AbstractDocumentGenerator):
 
         for key, label in choices:
             data[key] = {"label": label}
-            data[key]["obj"] = self.instruction.specifications.filter(
-                specification_type=spec_type, specification=key
-            ).first()
+            data[key]["obj"] = self.specifications.get((spec_type, str(key)))
 
         return data
 
@@ -97,10 +194,18 @@ class SurveyInstructionsGenerator(BaseInstructionsGenerator):
 
     def get_context_data(self):
         context = super().get_context_data()
-        context["hazards"] = self.get_specification("H", Hazard.choices)
-        context["hazard_sizes"] = self.get_specification("HS", QuickDescription.choices)
-        context["special_cases"] = self.get_specification("SC", SpecialCase.choices)
-        context["dr_specs"] = self.get_specification("DR", DRSpecification.choices)
+        context["hazards"] = self.get_specification(
+            SpecificationType.HAZARD, Hazard.choices
+        )
+        context["hazard_sizes"] = self.get_specification(
+            SpecificationType.HAZARD_SIZE, QuickDescription.choices
+        )
+        context["special_cases"] = self.get_specification(
+            SpecificationType.SPECIAL_CASE, SpecialCase.choices
+        )
+        context["dr_specs"] = self.get_specification(
+            SpecificationType.DR, DRSpecification.choices
+        )
         context["notes_placeholder"] = list(range(3))
         return context
 
@@ -109,7 +214,7 @@ class SurveyInstructionsGenerator(BaseInstructionsGenerator):
         supplements = []
 
         if self.instruction.include_fieldmaps_supplement:
-            supplements.append(finders.find(self.instructions_fieldmaps))
+            supplements.append(find_static(self.instructions_fieldmaps))
 
         return supplements
 
@@ -124,16 +229,29 @@ class ProjectInstructionsGenerator(BaseInstructionsGenerator):
     def get_context_data(self):
         context = super().get_context_data()
         context["hazards"] = self.get_hazards()
-        context["hazard_sizes"] = self.get_specification("HS", QuickDescription.choices)
+        context["hazard_sizes"] = self.get_specification(
+            SpecificationType.HAZARD_SIZE, QuickDescription.choices
+        )
         context["project_specifications"] = self.get_specification(
-            "P", ProjectSpecification.choices
+            SpecificationType.PROJECT, ProjectSpecification.choices
+        )
+        context["special_cases"] = self.get_specification(
+            SpecificationType.SPECIAL_CASE, SpecialCase.choices
+        )
+        context["dr_specs"] = self.get_specification(
+            SpecificationType.DR, DRSpecification.choices
         )
-        context["special_cases"] = self.get_specification("SC", SpecialCase.choices)
-        context["dr_specs"] = self.get_specification("DR", DRSpecification.choices)
         context["notes_placeholder"] = list(range(3))
         context[
             "linear_feet_curb_note"
         ] = f"{self.instruction.linear_feet_curb:g} linear feet."
+        context["checklist"] = list(
+            self.instruction.get_checklist().select_related("question")
+        )
+        context["checklist_visible"] = (
+            SpecificationType.PROJECT,
+            str(ProjectSpecification.NTE),
+        ) in self.specifications
         return context
 
     def get_hazards(self):
@@ -172,9 +290,17 @@ class ProjectInstructionsGenerator(BaseInstructionsGenerator):
         supplements = []
 
         if self.instruction.include_fieldmaps_supplement:
-            supplements.append(finders.find(self.instructions_fieldmaps))
+            supplements.append(find_static(self.instructions_fieldmaps))
 
         if self.instruction.include_bidboss_supplement:
-            supplements.append(finders.find(self.instructions_bidboss))
+            supplements.append(find_static(self.instructions_bidboss))
 
         return supplements
+
+
+def get_instructions_generator_class(stage):
+    """Return the instructions generator class for the stage"""
+    if stage == Stage.SURVEY:
+        return SurveyInstructionsGenerator
+
+    return ProjectInstructionsGenerator
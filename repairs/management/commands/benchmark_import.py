@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from lib.benchmarks import measure, rollback, scale_csv
+from repairs.models import Measurement
+from repairs.models.constants import Stage
+from repairs.parsers import get_parser_class
+
+FIXTURES = {
+    Stage.SURVEY: "repairs/tests/fixtures/survey_template.csv",
+    Stage.PRODUCTION: "repairs/tests/fixtures/production_template.csv",
+}
+
+
+def get_measurements(file_obj, project, stage):
+    """Parse the CSV into unsaved Measurements"""
+    file_obj.seek(0)
+    parser_cls = get_parser_class(stage)
+
+    for data in parser_cls.from_csv(file_obj):
+        kwargs = data.model_dump(exclude_none=True, exclude={"long", "lat"})
+        yield Measurement(project=project, stage=stage, **kwargs)
+
+
+def load_per_row(file_obj, project, stage):
+    """Previous import path (one INSERT per measurement)"""
+    with transaction.atomic():
+        Measurement.objects.filter(project=project, stage=stage).delete()
+
+        for measurement in get_measurements(file_obj, project, stage):
+            measurement.save()
+
+
+def load_bulk(file_obj, project, stage):
+    """Bulk import path (COPY into a staging table)"""
+    with transaction.atomic():
+        measurements = get_measurements(file_obj, project, stage)
+        Measurement.bulk_replace(project, stage, measurements)
+
+
+class Command(BaseCommand):
+    help = "Benchmark the measurement CSV import (rows/sec)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--stage", default=Stage.SURVEY, choices=Stage.values)
+        parser.add_argument("--scale", type=int, default=100)
+
+    def handle(self, *args, **options):
+        from repairs.factories import ProjectFactory
+
+        stage = options["stage"]
+        file_obj = scale_csv(FIXTURES[stage], options["scale"])
+        rows = sum(1 for _ in file_obj) - 1
+
+        for name, func in (("per-row", load_per_row), ("bulk", load_bulk)):
+            with rollback():
+                project = ProjectFactory()
+                result = measure(func, file_obj, project, stage)
+
+            rate = rows / result["seconds"]
+            self.stdout.write(
+                f"{name:>8}: {rows} rows in {result['seconds']:.2f}s "
+                f"({rate:,.0f} rows/sec, {result['queries']} queries)"
+            )
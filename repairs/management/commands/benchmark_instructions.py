@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+
+from lib.benchmarks import measure, rollback
+from repairs.documents import get_instructions_generator_class
+from repairs.models.constants import Stage
+
+
+class Command(BaseCommand):
+    help = "Benchmark the survey/project instructions render (time and queries)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=10)
+        parser.add_argument(
+            "--pdf",
+            action="store_true",
+            help="Also benchmark the (uncached) PDF build",
+        )
+
+    def handle(self, *args, **options):
+        # The test helpers (and factories) are dev-only dependencies
+        from lib.test_helpers import create_instructions
+
+        iterations = options["iterations"]
+
+        with rollback():
+            project = create_instructions()
+
+            for stage in (Stage.SURVEY, Stage.PRODUCTION):
+                instruction = project.instructions.get(stage=stage)
+                generator_class = get_instructions_generator_class(stage)
+
+                def render():
+                    generator_class(instruction).render()
+
+                results = [measure(render) for _ in range(iterations)]
+                seconds = sum(r["seconds"] for r in results) / iterations
+                self.stdout.write(
+                    f"{stage:>10} render: {seconds * 1000:.1f}ms "
+                    f"({results[-1]['queries']} queries)"
+                )
+
+                if options["pdf"]:
+                    generator = generator_class(instruction)
+                    content = generator.render()
+                    supplements = generator.get_supplemental_files()
+                    result = measure(generator.build, content, supplements)
+                    self.stdout.write(
+                        f"{stage:>10}    pdf: {result['seconds'] * 1000:.1f}ms"
+                    )
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+
+from lib.benchmarks import measure, scale_csv
+from repairs.models.constants import Stage
+from repairs.parsers import get_parser_class
+
+FIXTURES = {
+    Stage.SURVEY: "repairs/tests/fixtures/survey_template.csv",
+    Stage.PRODUCTION: "repairs/tests/fixtures/production_template.csv",
+}
+
+
+def parse_models(parser_cls, file_obj):
+    """Validated path (a pydantic model per row)"""
+    file_obj.seek(0)
+    parser_cls.from_csv(file_obj)
+
+
+def parse_rows(parser_cls, file_obj):
+    """Fast path (the converted rows)"""
+    file_obj.seek(0)
+
+    for _ in parser_cls.iter_rows(file_obj):
+        pass
+
+
+class Command(BaseCommand):
+    help = "Benchmark the measurement CSV parsers (rows/sec)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--stage", default=Stage.SURVEY, choices=Stage.values)
+        parser.add_argument("--scale", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        stage = options["stage"]
+        parser_cls = get_parser_class(stage)
+        file_obj = scale_csv(FIXTURES[stage], options["scale"])
+        rows = sum(1 for _ in file_obj) - 1
+
+        for name, func in (("models", parse_models), ("rows", parse_rows)):
+            result = measure(func, parser_cls, file_obj)
+            rate = rows / result["seconds"]
+            self.stdout.write(
+                f"{name:>8}: {rows} rows in {result['seconds']:.2f}s "
+                f"({rate:,.0f} rows/sec)"
+            )
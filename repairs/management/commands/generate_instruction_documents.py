@@ -0,0 +1,56 @@
+import io
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from repairs.documents import get_instructions_generator_class
+from repairs.models import InstructionDocumentRequest
+
+LOGGER = logging.getLogger(__name__)
+
+
+def generate_document(req):
+    """Generate the requested instructions document"""
+    instruction = req.instruction
+    generator = get_instructions_generator_class(instruction.stage)(instruction)
+
+    try:
+        with io.BytesIO() as f:
+            generator.generate(f)
+            req.complete(f.getvalue())
+    except Exception as exc:
+        LOGGER.exception(f"Error generating instructions {instruction.pk}: {exc}")
+        req.fail(exc)
+
+
+class Command(BaseCommand):
+    help = "Generate the requested survey/project instruction documents (worker)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once there are no pending requests",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait between polls for pending requests",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            req = InstructionDocumentRequest.claim_next()
+
+            if req is not None:
+                generate_document(req)
+                continue
+
+            if options["once"]:
+                break
+
+            time.sleep(options["interval"])
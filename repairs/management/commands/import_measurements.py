@@ -0,0 +1,51 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from repairs.models import MeasurementImport
+from repairs.parsers import MeasurementParseError
+
+LOGGER = logging.getLogger(__name__)
+
+
+def import_measurements(job):
+    """Run the measurements import job"""
+    try:
+        job.run()
+    except (MeasurementParseError, UnicodeDecodeError) as exc:
+        LOGGER.warning(f"Error importing measurements {job.request_id}: {exc}")
+    except Exception as exc:
+        LOGGER.exception(f"Error importing measurements {job.request_id}: {exc}")
+
+
+class Command(BaseCommand):
+    help = "Run the queued measurement CSV imports (worker)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once there are no pending imports",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait between polls for pending imports",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            job = MeasurementImport.claim_next()
+
+            if job is not None:
+                import_measurements(job)
+                continue
+
+            if options["once"]:
+                break
+
+            time.sleep(options["interval"])
@@ -1,12 +1,26 @@
 from django.core.management.base import BaseCommand
 
-from lib.pg_views import create_or_replace_views
-from repairs.models import ProjectManagementDashboardView
+from lib.pg_views import create_or_replace_views, refresh_materialized_view
+from repairs.models import ProjectManagementDashboardView, ProjectMeasurementSummaryView
 
 
 class Command(BaseCommand):
     help = "Sync registered PostgreSQL views"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--refresh",
+            action="store_true",
+            help="Only refresh the materialized views",
+        )
+
     def handle(self, *args, **options):
-        models = (ProjectManagementDashboardView,)
+        models = (ProjectMeasurementSummaryView, ProjectManagementDashboardView)
+
+        if options["refresh"]:
+            for model in models:
+                if getattr(model, "materialized", False):
+                    refresh_materialized_view(model)
+            return
+
         create_or_replace_views(models)
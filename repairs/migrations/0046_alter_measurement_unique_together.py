@@ -0,0 +1,67 @@
+# Generated by Django 4.2.4 on 2026-10-18 09:00
+
+import logging
+
+from django.db import migrations
+
+LOGGER = logging.getLogger(__name__)
+
+# The removed duplicates are kept in this table (dropped by hand once reviewed)
+BACKUP_TABLE = "repairs_measurement_duplicates"
+
+
+def remove_duplicates(apps, schema_editor):
+    """
+    Remove any duplicate (project, stage, object_id) measurements, keeping the
+    most recently created, before adding the constraint. The removed rows are
+    copied to the backup table and logged.
+    """
+    duplicates = """
+        FROM repairs_measurement m
+        WHERE EXISTS (
+            SELECT 1 FROM repairs_measurement d
+            WHERE m.project_id = d.project_id
+                AND m.stage = d.stage
+                AND m.object_id = d.object_id
+                AND m.id < d.id
+        )
+    """
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+                CREATE TABLE IF NOT EXISTS {BACKUP_TABLE}
+                    AS SELECT * FROM repairs_measurement WITH NO DATA
+            """
+        )
+        cursor.execute(f"INSERT INTO {BACKUP_TABLE} SELECT m.* {duplicates}")
+        cursor.execute(
+            f"""
+                SELECT m.project_id, m.stage, m.object_id, count(*)
+                {duplicates}
+                GROUP BY m.project_id, m.stage, m.object_id
+                ORDER BY m.project_id, m.stage, m.object_id
+            """
+        )
+
+        for project_id, stage, object_id, count in cursor.fetchall():
+            LOGGER.warning(
+                f"Removed {count} duplicate measurement(s) of project {project_id} "
+                f"{stage} object id {object_id} (backed up to {BACKUP_TABLE})"
+            )
+
+        cursor.execute(f"DELETE {duplicates}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("repairs", "0045_delete_measurementimage"),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name="measurement",
+            unique_together={("project", "stage", "object_id")},
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.4 on 2026-10-18 09:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("repairs", "0046_alter_measurement_unique_together"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="projectlayer",
+            name="last_edited_at",
+            field=models.DateTimeField(
+                blank=True, help_text="Latest feature EditDate synced", null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="projectlayer",
+            name="last_object_id",
+            field=models.IntegerField(
+                blank=True, help_text="Latest feature OBJECTID synced", null=True
+            ),
+        ),
+    ]
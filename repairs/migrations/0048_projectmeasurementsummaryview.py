@@ -0,0 +1,29 @@
+# Generated by Django 4.2.4 on 2026-10-18 10:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("repairs", "0047_projectlayer_last_edited_at_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProjectMeasurementSummaryView",
+            fields=[
+                ("project_id", models.IntegerField(primary_key=True, serialize=False)),
+                ("techs", models.TextField(blank=True, null=True)),
+                ("start_date", models.DateTimeField(blank=True, null=True)),
+                ("last_date", models.DateTimeField(blank=True, null=True)),
+                ("hazards_repaired", models.IntegerField()),
+                ("curb_length_repaired", models.FloatField()),
+                ("inch_feet_repaired", models.FloatField()),
+                ("square_feet_repaired", models.FloatField()),
+            ],
+            options={
+                "db_table": "repairs_project_measurement_summary",
+                "managed": False,
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.4 on 2026-10-18 11:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("repairs", "0048_projectmeasurementsummaryview"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="measurement",
+            index=models.Index(
+                fields=["stage", "measured_at", "tech"],
+                name="measurement_stage_at_tech_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="measurement",
+            index=models.Index(
+                condition=models.Q(("geocoded_address__isnull", True)),
+                fields=["project", "stage"],
+                name="measurement_not_geocoded_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.4 on 2026-10-18 12:00
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("repairs", "0049_measurement_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="measurement",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+    ]
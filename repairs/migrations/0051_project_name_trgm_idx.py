@@ -0,0 +1,25 @@
+# Generated by Django 4.2.4 on 2026-10-18 13:00
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("repairs", "0050_measurement_updated_at"),
+        ("core", "0003_trigram_extension"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="project",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("name"),
+                    name="gin_trgm_ops",
+                ),
+                name="project_name_trgm_idx",
+            ),
+        ),
+    ]
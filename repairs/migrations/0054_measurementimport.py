@@ -0,0 +1,83 @@
+# Generated by Django 4.2.4 on 2026-10-18 17:00
+
+import uuid
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("repairs", "0053_pricingsheet_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MeasurementImport",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "stage",
+                    models.CharField(
+                        choices=[("SURVEY", "Survey"), ("PRODUCTION", "Production")],
+                        max_length=25,
+                    ),
+                ),
+                (
+                    "request_id",
+                    models.UUIDField(default=uuid.uuid4, editable=False, unique=True),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "Pending"),
+                            ("IN_PROGRESS", "In Progress"),
+                            ("COMPLETE", "Complete"),
+                            ("FAILED", "Failed"),
+                        ],
+                        default="PENDING",
+                        max_length=25,
+                    ),
+                ),
+                ("file", models.BinaryField(blank=True, null=True)),
+                (
+                    "rows_total",
+                    models.IntegerField(
+                        blank=True,
+                        help_text="Approximate (the CSV line count)",
+                        null=True,
+                    ),
+                ),
+                ("rows_processed", models.IntegerField(default=0)),
+                ("error", models.TextField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "project",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="measurement_imports",
+                        to="repairs.project",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("status", "PENDING")),
+                        fields=["created_at"],
+                        name="measurement_import_pending_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.4 on 2026-10-18 19:00
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("repairs", "0054_measurementimport"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="instructiondocumentrequest",
+            name="requested_at",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now,
+                help_text="Last requested (the start of the polling)",
+            ),
+        ),
+    ]
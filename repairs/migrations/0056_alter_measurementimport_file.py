@@ -0,0 +1,23 @@
+# Generated by Django 4.2.4 on 2026-10-18 19:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("repairs", "0055_instructiondocumentrequest_requested_at"),
+    ]
+
+    # The uploaded data (bytea) cannot be converted to a file path, so the
+    # column is replaced (any pending imports have to be uploaded again)
+    operations = [
+        migrations.RemoveField(
+            model_name="measurementimport",
+            name="file",
+        ),
+        migrations.AddField(
+            model_name="measurementimport",
+            name="file",
+            field=models.FileField(blank=True, null=True, upload_to="imports/"),
+        ),
+    ]
@@ -1,5 +1,9 @@
+import uuid
+from datetime import timedelta
+
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 
 from customers.models import Contact
 from repairs.models.constants import (
@@ -61,20 +65,8 @@ class Instruction(models.Model):
         if self.stage != Stage.PRODUCTION:
             return {}
 
-        hazards = {}
-        queryset = self.project.measurements.filter(stage=Stage.SURVEY)
-
-        for value, name in Hazard.choices:
-            hazard_size = Hazard.get_size(value)
-            data = queryset.filter(hazard_size=hazard_size)
-
-            count = data.count()
-            sqft = sum([m.length * m.width for m in data if m.length and m.width])
-            inft = sum([m.inch_feet for m in data if m.inch_feet])
-
-            hazards[value] = {"count": count, "square_feet": sqft, "inch_feet": inft}
-
-        return hazards
+        stats = self.project.get_hazard_stats(Stage.SURVEY)
+        return {value: stats[Hazard.get_size(value)] for value in Hazard.values}
 
     def get_needed_by_display(self):
         """Return the needed_by date for display"""
@@ -199,3 +191,134 @@ class InstructionChecklist(models.Model):
     response = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+
+class InstructionDocumentRequest(models.Model):
+    """Survey/Project instructions document generation/download request"""
+
+    class Status(models.TextChoices):
+        """Document generation status"""
+
+        PENDING = ("PENDING", "Pending")
+        IN_PROGRESS = ("IN_PROGRESS", "In Progress")
+        COMPLETE = ("COMPLETE", "Complete")
+        FAILED = ("FAILED", "Failed")
+
+    # A pending or in progress request that has not been updated for this
+    # long is assumed to have been abandoned (i.e. the worker stopped)
+    STALE_AFTER = timedelta(minutes=5)
+
+    instruction = models.ForeignKey(
+        Instruction, on_delete=models.CASCADE, related_name="document_requests"
+    )
+    request_id = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
+    version = models.DateTimeField(help_text="Instruction updated_at rendered")
+    requested_at = models.DateTimeField(
+        default=timezone.now, help_text="Last requested (the start of the polling)"
+    )
+    status = models.CharField(
+        max_length=25, choices=Status.choices, default=Status.PENDING
+    )
+    document = models.BinaryField(blank=True, null=True)
+    error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["created_at"],
+                name="instruction_doc_pending_idx",
+                condition=models.Q(status="PENDING"),
+            ),
+        ]
+
+    @classmethod
+    def get_or_request(cls, instruction):
+        """
+        Return the request for the current version of the instructions. An
+        unchanged document is never re-rendered, so an existing (complete, or
+        pending and not stale) request for the version is returned if there
+        is one.
+        """
+        stale = timezone.now() - cls.STALE_AFTER
+        req = (
+            cls.objects.filter(instruction=instruction, version=instruction.updated_at)
+            .filter(
+                models.Q(status=cls.Status.COMPLETE)
+                | models.Q(
+                    status__in=[cls.Status.PENDING, cls.Status.IN_PROGRESS],
+                    updated_at__gte=stale,
+                )
+            )
+            .defer("document")
+            .order_by("-created_at")
+            .first()
+        )
+
+        if req is None:
+            return cls.objects.create(
+                instruction=instruction, version=instruction.updated_at
+            )
+
+        # The client polls the reused request from now
+        req.requested_at = timezone.now()
+        req.save(update_fields=["requested_at"])
+
+        return req
+
+    @classmethod
+    def fail_stale(cls):
+        """Mark the abandoned (stale) pending and in progress requests failed"""
+        stale = timezone.now() - cls.STALE_AFTER
+        cls.objects.filter(
+            status__in=[cls.Status.PENDING, cls.Status.IN_PROGRESS],
+            updated_at__lt=stale,
+        ).update(status=cls.Status.FAILED, error="The request was abandoned.")
+
+    @classmethod
+    def claim_next(cls):
+        """
+        Claim the oldest pending request (or None), skipping any locked by
+        another worker so that several workers can run concurrently
+        """
+        cls.fail_stale()
+
+        with transaction.atomic():
+            req = (
+                cls.objects.select_for_update(skip_locked=True)
+                .filter(status=cls.Status.PENDING)
+                .select_related("instruction__project")
+                .defer("document")
+                .order_by("created_at")
+                .first()
+            )
+
+            if req is not None:
+                req.status = cls.Status.IN_PROGRESS
+                req.save(update_fields=["status", "updated_at"])
+
+        return req
+
+    def complete(self, document):
+        """Store the generated document and remove the outdated versions"""
+        self.document = document
+        self.status = self.Status.COMPLETE
+        self.save(update_fields=["document", "status", "updated_at"])
+
+        InstructionDocumentRequest.objects.filter(
+            instruction_id=self.instruction_id,
+            version__lt=self.version,
+            status__in=[self.Status.COMPLETE, self.Status.FAILED],
+        ).delete()
+
+    def fail(self, error):
+        """Mark the request as failed"""
+        self.error = str(error)
+        self.status = self.Status.FAILED
+        self.save(update_fields=["error", "status", "updated_at"])
+
+    def get_filename(self):
+        """Return the document download filename"""
+        prefix = "SI" if self.instruction.stage == Stage.SURVEY else "PI"
+        return f"{prefix} - {self.instruction.project.name}.pdf"
@@ -1,11 +1,20 @@
 import csv
-from datetime import timedelta
+import io
+import json
+import uuid
+from datetime import datetime, time, timedelta, timezone
+from itertools import islice
 
 from dateutil.parser import parse as parse_dt
 from django.contrib.auth import get_user_model
 from django.contrib.gis.db.models.fields import PointField
-from django.db import connection, models, transaction
+from django.contrib.gis.geos import Point
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connection, connections, models, transaction
+from django.db.models import Exists, OuterRef
 
+from lib.pg_bulk import copy_rows, create_staging_table, get_bulk_fields, get_bulk_row
+from lib.uploads import open_text
 from repairs.models.constants import (
     SYMBOL_COLORS,
     SYMBOLS,
@@ -15,11 +24,42 @@ from repairs.models.constants import (
     Stage,
 )
 from repairs.models.projects import Project
+from repairs.models.views import ProjectMeasurementSummaryView
 from repairs.parsers import get_parser_class
-from utils.aws import invoke_lambda_function
+from utils.dispatch import dispatch
 
 User = get_user_model()
 
+# Cache key of the version of the cached Measurement tiles
+TILES_VERSION_KEY = "measurement-tiles-version"
+
+# Number of rows between the import progress updates
+PROGRESS_ROWS = 1000
+
+# SQL expressions of the Measurement display values and symbology (matching
+# the get_*_display, get_symbol, and get_color methods), using the jsonb
+# lookups from Measurement._get_display_params
+DISPLAY_COLUMNS = {
+    "stage": "COALESCE(%(stages)s::jsonb ->> stage, stage)",
+    "symbol": """
+        COALESCE(
+            %(symbols)s::jsonb ->> COALESCE(special_case, 'null'),
+            'location_on'
+        )
+    """,
+    "color": """
+        COALESCE(
+            %(colors)s::jsonb ->> COALESCE(special_case, 'null'),
+            %(colors)s::jsonb ->> hazard_size,
+            'black'
+        )
+    """,
+    "special_case": """
+        COALESCE(%(special_cases)s::jsonb ->> special_case, special_case)
+    """,
+    "hazard_size": "COALESCE(%(hazard_sizes)s::jsonb ->> hazard_size, hazard_size)",
+}
+
 
 class Measurement(models.Model):
     """Survey measurement GIS data and metadata"""
@@ -54,102 +94,280 @@ class Measurement(models.Model):
     inch_feet = models.FloatField(default=0)
     measured_at = models.DateTimeField()
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # The unique constraint also indexes the (project, stage, object_id)
+        # lookups and the coordinate has a GiST (spatial) index
+        unique_together = ("project", "stage", "object_id")
+        indexes = [
+            models.Index(
+                fields=["stage", "measured_at", "tech"],
+                name="measurement_stage_at_tech_idx",
+            ),
+            models.Index(
+                fields=["project", "stage"],
+                name="measurement_not_geocoded_idx",
+                condition=models.Q(geocoded_address__isnull=True),
+            ),
+        ]
 
     def __str__(self):
         (x, y) = self.coordinate.coords
         return f"{self.project.name} - {self.object_id} - ({x}, {y})"
 
     def save(self, *args, **kwargs):
+        self.apply_rules()
+        super().save(*args, **kwargs)
+
+    def apply_rules(self):
+        """Apply the special case rules to the measurement values"""
         if self.special_case == SpecialCase.CURB:
             self.measured_hazard_length = self.curb_length * 12
 
             if self.stage == Stage.PRODUCTION:
                 self.length = 0.5
 
-        super().save(*args, **kwargs)
-
     @staticmethod
-    def import_from_csv(file_obj, project, stage):
-        """Import the Measurements from CSV (replaces any existing)"""
+    def import_from_csv(file_obj, project, stage, progress=None):
+        """
+        Import the Measurements from CSV (replaces any existing). The progress
+        callback (if any) is called with the number of rows processed, every
+        PROGRESS_ROWS rows and between the phases of the import.
+        """
         file_obj.seek(0)
         parser_cls = get_parser_class(stage)
+        rows = 0
+
+        def report():
+            if progress:
+                progress(rows)
+
+        def get_measurements():
+            nonlocal rows
+
+            for data in parser_cls.iter_rows(file_obj):
+                kwargs = {k: v for k, v in data.items() if v is not None}
+                coordinate = Point(kwargs.pop("long"), kwargs.pop("lat"))
+                yield Measurement(
+                    project=project, stage=stage, coordinate=coordinate, **kwargs
+                )
+
+                rows += 1
+
+                if rows % PROGRESS_ROWS == 0:
+                    report()
+
+            # The rows have been staged, before they are swapped in
+            report()
 
         with transaction.atomic():
-            Measurement.objects.filter(project=project, stage=stage).delete()
+            Measurement.bulk_replace(project, stage, get_measurements())
+            Measurement.schedule_changed()
 
-            for data in parser_cls.from_csv(file_obj):
-                kwargs = data.model_dump(exclude_none=True, exclude={"long", "lat"})
-                Measurement.objects.create(project=project, stage=stage, **kwargs)
+        report()
 
         # For square foot pricing models, calculate the estimated sidewalk
         # miles from the measurements.
         if project.pricing_model == PricingModel.SQUARE_FOOT:
             project.pricing_sheet.calculate_sidewalk_miles()
+            report()
 
         # Trigger the Lambda function to reverse geocode the addresses
         # based on the coordinates by adding the (project_id, stage) to
         # the SQS queue
         payload = {"project_id": project.pk, "stage": stage}
-        invoke_lambda_function("geocoding", payload)
+        dispatch("geocoding", payload)
 
         return Measurement.objects.filter(project=project, stage=stage)
 
     @staticmethod
-    def export_to_csv(file_obj, project, stage):
-        """Export the Measurements to CSV"""
-        parser_cls = get_parser_class(stage)
-        columns = list(parser_cls.model_fields)
-        columns.remove("coordinate")
-        aliases = {key: field.alias for key, field in parser_cls.model_fields.items()}
+    def bulk_replace(project, stage, measurements):
+        """
+        Replace the project/stage Measurements with the (unsaved) Measurements.
+        The rows are streamed into a staging table with COPY and swapped in
+        with a single DELETE and INSERT, so the live table is only locked
+        once the data has been fully parsed. Must be called in a transaction.
+        """
+        table = Measurement._meta.db_table
 
-        measurements = list(
-            Measurement.objects.filter(project=project, stage=stage)
-            .annotate(
-                long=models.ExpressionWrapper(
-                    models.Func("coordinate", function="ST_X"),
-                    output_field=models.FloatField(),
-                )
+        with connection.cursor() as cursor:
+            staging, columns = Measurement._stage(cursor, measurements)
+
+            Measurement.objects.filter(project=project, stage=stage).delete()
+            cursor.execute(
+                f"""
+                    INSERT INTO {table} ({", ".join(columns)})
+                        SELECT {", ".join(columns)} FROM {staging}
+                """
             )
-            .annotate(
-                lat=models.ExpressionWrapper(
-                    models.Func("coordinate", function="ST_Y"),
-                    output_field=models.FloatField(),
-                )
+
+    @staticmethod
+    def bulk_upsert(
+        project, stage, measurements, fields, object_ids=None, keep_existing=()
+    ):
+        """
+        Upsert the project/stage Measurements by object_id and delete any that
+        are not in the set (or not in object_ids, if given, for incremental
+        updates). Only the listed fields are updated on existing rows (e.g.
+        the geocoded address is kept, unless the coordinate moved) and null
+        values of the keep_existing fields do not overwrite. Rows whose values
+        are unchanged are not rewritten (and keep their updated_at). Must be
+        called in a transaction.
+        """
+        table = Measurement._meta.db_table
+        key = ("project_id", "stage", "object_id")
+        columns, values = [], []
+
+        for name in fields:
+            column = Measurement._meta.get_field(name).column
+            columns.append(column)
+
+            if name in keep_existing:
+                values.append(f"COALESCE(EXCLUDED.{column}, m.{column})")
+            else:
+                values.append(f"EXCLUDED.{column}")
+
+        updates = [f"{c} = {v}" for c, v in zip(columns, values)]
+        updates.append("updated_at = EXCLUDED.updated_at")
+
+        # A moved coordinate needs to be geocoded again
+        if "coordinate" in fields and "geocoded_address" not in fields:
+            coordinate = values[list(fields).index("coordinate")]
+            updates.append(
+                f"""
+                    geocoded_address = CASE
+                        WHEN m.coordinate IS DISTINCT FROM {coordinate} THEN NULL
+                        ELSE m.geocoded_address
+                    END
+                """
             )
-            .order_by("object_id")
-            .values(*columns)
+        changed = "({}) IS DISTINCT FROM ({})".format(
+            ", ".join(f"m.{c}" for c in columns), ", ".join(values)
         )
 
-        encoders = {
+        with connection.cursor() as cursor:
+            staging, staged = Measurement._stage(cursor, measurements)
+
+            cursor.execute(
+                f"""
+                    INSERT INTO {table} AS m ({", ".join(staged)})
+                        SELECT {", ".join(staged)} FROM {staging}
+                    ON CONFLICT ({", ".join(key)}) DO UPDATE SET
+                        {", ".join(updates)}
+                    WHERE {changed}
+                """
+            )
+
+            params = {"project_id": project.pk, "stage": stage}
+
+            if object_ids is None:
+                condition = f"""
+                    NOT EXISTS (
+                        SELECT 1 FROM {staging} s
+                        WHERE s.object_id = m.object_id
+                    )
+                """
+            else:
+                condition = "m.object_id <> ALL(%(object_ids)s)"
+                params["object_ids"] = list(object_ids)
+
+            cursor.execute(
+                f"""
+                    DELETE FROM {table} m
+                    WHERE m.project_id = %(project_id)s
+                        AND m.stage = %(stage)s
+                        AND {condition}
+                """,
+                params,
+            )
+
+    @staticmethod
+    def _stage(cursor, measurements):
+        """Stream the (unsaved) Measurements into a staging table"""
+        fields = get_bulk_fields(Measurement)
+        columns = [field.column for field in fields]
+
+        def get_rows():
+            for measurement in measurements:
+                measurement.apply_rules()
+                yield get_bulk_row(measurement, fields)
+
+        staging = create_staging_table(cursor, Measurement, columns)
+        copy_rows(cursor, staging, columns, get_rows())
+
+        return staging, columns
+
+    @staticmethod
+    def export_to_csv(file_obj, project, stage):
+        """Export the Measurements to CSV"""
+        for chunk in Measurement.iter_csv(project, stage):
+            file_obj.write(chunk)
+
+        file_obj.seek(0)
+
+    @staticmethod
+    def iter_csv(project, stage, chunk_size=2000):
+        """
+        Yield the Measurements CSV in chunks of rows. The choice labels are
+        decoded in the query and the rows are read with a server-side cursor,
+        so the memory used does not grow with the number of Measurements.
+        """
+        parser_cls = get_parser_class(stage)
+        columns = parser_cls.order()
+        aliases = {key: field.alias for key, field in parser_cls.model_fields.items()}
+        labels = {
             "special_case": SpecialCase,
             "hazard_size": QuickDescription,
         }
 
-        for i, measurement in enumerate(measurements):
-            for column, encoding in encoders.items():
-                value = measurement[column]
+        annotations = {
+            "long": models.ExpressionWrapper(
+                models.Func("coordinate", function="ST_X"),
+                output_field=models.FloatField(),
+            ),
+            "lat": models.ExpressionWrapper(
+                models.Func("coordinate", function="ST_Y"),
+                output_field=models.FloatField(),
+            ),
+        }
+
+        for column, choices in labels.items():
+            annotations[f"{column}_label"] = models.Case(
+                *[
+                    models.When(**{column: value}, then=models.Value(label))
+                    for value, label in choices.choices
+                ],
+                default=models.F(column),
+                output_field=models.CharField(),
+            )
 
-                if value and column in measurement:
-                    measurement[column] = encoding(value).label
+        rows = (
+            Measurement.objects.filter(project=project, stage=stage)
+            .annotate(**annotations)
+            .order_by("object_id")
+            .values_list(*[f"{c}_label" if c in labels else c for c in columns])
+            .iterator(chunk_size=chunk_size)
+        )
 
-            ordered = {}
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow([aliases.get(column, column) for column in columns])
 
-            for column in parser_cls.order():
-                value = measurement.get(column)
-                alias = aliases.get(column, column)
-                ordered[alias] = value
+        while True:
+            writer.writerows(islice(rows, chunk_size))
+            chunk = buffer.getvalue()
 
-            measurements[i] = ordered
+            if not chunk:
+                break
 
-        fieldnames = [aliases.get(key, key) for key in parser_cls.order()]
-        writer = csv.DictWriter(file_obj, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(measurements)
-        file_obj.seek(0)
+            yield chunk
+            buffer.seek(0)
+            buffer.truncate()
 
     @classmethod
-    def get_tech_production(cls, start_date, end_date, techs=[]):
-        """Get the tech production in the date range"""
+    def get_tech_production(cls, start_date, end_date, techs=None):
+        """Get the tech production in the date range (inclusive)"""
         if isinstance(start_date, str):
             start_date = parse_dt(start_date).date()
 
@@ -161,81 +379,273 @@ class Measurement(models.Model):
                 "arcgis_username", flat=True
             )
             techs = sorted(techs)
-            filter_techs = ""
-
-        days = (end_date - start_date).days
-        dates = [start_date + timedelta(days=d) for d in range(days)]
-        params = {"start_date": start_date, "end_date": end_date}
-
-        columns = [
-            "tech",
-            "COALESCE(COUNT(id), 0) AS total_records",
-            "COALESCE(COUNT(DISTINCT(DATE(measured_at))), 0) AS total_days",
-            "COALESCE(SUM(inch_feet), 0) AS total_inch_feet",
-        ]
-
-        for i, date in enumerate(dates):
-            column = f"SUM(inch_feet) FILTER (WHERE DATE(measured_at) = '{date}') AS \"{date}\""
-            columns.append(column)
 
-        if techs:
-            selected_techs = ", ".join([f"'{tech}'" for tech in techs])
-            filter_techs = f"AND tech IN ({selected_techs})"
+        days = (end_date - start_date).days + 1
+        dates = [str(start_date + timedelta(days=d)) for d in range(days)]
+
+        # Compare measured_at against a half-open datetime range (rather than
+        # its DATE) so that the measured_at index can be used
+        params = {
+            "start": datetime.combine(start_date, time.min, tzinfo=timezone.utc),
+            "end": datetime.combine(
+                end_date + timedelta(days=1), time.min, tzinfo=timezone.utc
+            ),
+            "techs": list(techs),
+        }
 
-        query = f"""
+        query = """
             SELECT
-                {", ".join(columns)}
+                tech,
+                DATE(measured_at) AS day,
+                COUNT(id) AS records,
+                SUM(inch_feet) AS inch_feet
             FROM repairs_measurement
             WHERE stage = 'PRODUCTION'
-                AND DATE(measured_at) >= '{start_date}'
-                AND DATE(measured_at) <= '{end_date}'
-                {filter_techs}
-            GROUP BY tech
-            ORDER BY tech
+                AND measured_at >= %(start)s
+                AND measured_at < %(end)s
+                AND tech = ANY(%(techs)s)
+            GROUP BY tech, day
         """
 
         with connection.cursor() as cursor:
-            cursor.execute(query, params=params)
-            columns = [column.name for column in cursor.description]
-            results = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            cursor.execute(query, params)
+            results = cursor.fetchall()
 
+        def get_empty_row():
+            row = {"tech": None, "total_records": 0, "total_days": 0}
+            row["total_inch_feet"] = 0
+            row.update({date: None for date in dates})
+            return row
+
+        # Pivot the daily production into a row per tech
         index = {}
 
-        for row in results:
-            if row["total_days"]:
-                row["average_per_day"] = row["total_inch_feet"] / row["total_days"]
-            else:
-                row["average_per_day"] = None
+        for tech, day, records, inch_feet in results:
+            if tech not in index:
+                index[tech] = get_empty_row()
+
+            row = index[tech]
 
-            tech = row["tech"]
-            index[tech] = row
+            row[str(day)] = inch_feet
+            row["total_records"] += records
+            row["total_days"] += 1
+            row["total_inch_feet"] += inch_feet or 0
+
+        users = {}
+
+        for user in User.objects.filter(arcgis_username__in=params["techs"]):
+            users.setdefault(user.arcgis_username, user)
 
         # Ensure that each tech in the list has a row of data. If no data is
         # available from the query, fill with None.
         data = []
 
         for tech in techs:
-            user = User.objects.filter(arcgis_username=tech).first()
+            user = users.get(tech)
 
             if user is None:
                 continue
 
-            row = index.get(user.arcgis_username)
+            row = index.get(tech) or get_empty_row()
 
-            if row is None:
-                row = {column: None for column in columns}
-                row["tech"] = f"{user.first_name[0]}. {user.last_name}"
-                row["total_records"] = 0
-                row["total_days"] = 0
-                row["total_inch_feet"] = 0
-                row["average_per_day"] = None
+            if row["total_days"]:
+                row["average_per_day"] = row["total_inch_feet"] / row["total_days"]
             else:
-                row["tech"] = f"{user.first_name[0]}. {user.last_name}"
+                row["average_per_day"] = None
 
+            row["tech"] = f"{user.first_name[0]}. {user.last_name}"
             data.append(row)
 
         return data
 
+    @classmethod
+    def get_geojson_version(cls, project, stage=None):
+        """
+        Return the (count, max id, last modified) of the project Measurements
+        to identify the version of the GeoJSON features
+        """
+        queryset = cls.objects.filter(project=project)
+
+        if stage:
+            queryset = queryset.filter(stage=stage)
+
+        result = queryset.aggregate(
+            count=models.Count("id"),
+            max_id=models.Max("id"),
+            last_modified=models.Max("updated_at"),
+        )
+
+        return result["count"], result["max_id"], result["last_modified"]
+
+    @classmethod
+    def iter_geojson_features(cls, project, stage=None, chunk_size=2000):
+        """
+        Yield the project Measurements as GeoJSON Feature strings. The
+        features (including the symbol, color, and display values) are built
+        by PostGIS and streamed from a server-side cursor.
+        """
+
+        params = {
+            "project_id": project.pk,
+            "stage": stage,
+            **cls._get_display_params(),
+        }
+
+        query = f"""
+            SELECT
+                json_build_object(
+                    'id', id,
+                    'type', 'Feature',
+                    'geometry', ST_AsGeoJSON(coordinate)::json,
+                    'properties', json_build_object(
+                        'stage', {DISPLAY_COLUMNS["stage"]},
+                        'symbol', {DISPLAY_COLUMNS["symbol"]},
+                        'color', {DISPLAY_COLUMNS["color"]},
+                        'object_id', object_id,
+                        'special_case', {DISPLAY_COLUMNS["special_case"]},
+                        'hazard_size', {DISPLAY_COLUMNS["hazard_size"]},
+                        'length', length,
+                        'width', width,
+                        'measured_hazard_length', measured_hazard_length,
+                        'curb_length', curb_length,
+                        'h1', h1,
+                        'h2', h2,
+                        'area', area,
+                        'tech', tech,
+                        'geocoded_address', geocoded_address,
+                        'note', note,
+                        'slope', slope,
+                        'inch_feet', inch_feet,
+                        'measured_at', measured_at,
+                        'created_at', created_at
+                    )
+                )::text
+            FROM {cls._meta.db_table}
+            WHERE project_id = %(project_id)s
+                AND (%(stage)s::text IS NULL OR stage = %(stage)s::text)
+            ORDER BY id
+        """
+
+        with connection.chunked_cursor() as cursor:
+            cursor.execute(query, params)
+
+            while rows := cursor.fetchmany(chunk_size):
+                for (feature,) in rows:
+                    yield feature
+
+    @classmethod
+    def get_tile(
+        cls, z, x, y, projects=None, stages=None, territories=None, statuses=None
+    ):
+        """
+        Return the Mapbox vector tile (MVT) of the Measurements, optionally
+        filtered by the projects, stages, and project territories/statuses
+        """
+        params = {"z": z, "x": x, "y": y, **cls._get_display_params()}
+        conditions = []
+        project_conditions = []
+
+        if projects:
+            conditions.append("m.project_id = ANY(%(projects)s)")
+            params["projects"] = list(projects)
+
+        if stages:
+            conditions.append("m.stage = ANY(%(stages_filter)s)")
+            params["stages_filter"] = list(stages)
+
+        if territories:
+            project_conditions.append("p.territory_id = ANY(%(territories)s)")
+            params["territories"] = list(territories)
+
+        if statuses:
+            project_conditions.append("p.status = ANY(%(statuses)s)")
+            params["statuses"] = list(statuses)
+
+        if project_conditions:
+            conditions.append(
+                f"""
+                    m.project_id IN (
+                        SELECT p.id FROM {Project._meta.db_table} p
+                        WHERE {" AND ".join(project_conditions)}
+                    )
+                """
+            )
+
+        filters = "".join(f" AND {condition}" for condition in conditions)
+
+        # The bounds are buffered (by the same 64 pixels as the geometries)
+        # so that symbols near the edges are drawn on the adjacent tiles
+        query = f"""
+            WITH tile AS (
+                SELECT
+                    ST_AsMVTGeom(
+                        ST_Transform(m.coordinate, 3857),
+                        ST_TileEnvelope(%(z)s, %(x)s, %(y)s),
+                        4096,
+                        64,
+                        true
+                    ) AS geom,
+                    m.id,
+                    m.project_id,
+                    m.object_id,
+                    {DISPLAY_COLUMNS["stage"]} AS stage,
+                    {DISPLAY_COLUMNS["symbol"]} AS symbol,
+                    {DISPLAY_COLUMNS["color"]} AS color,
+                    {DISPLAY_COLUMNS["special_case"]} AS special_case,
+                    {DISPLAY_COLUMNS["hazard_size"]} AS hazard_size
+                FROM {cls._meta.db_table} m
+                WHERE m.coordinate && ST_Transform(
+                    ST_TileEnvelope(%(z)s, %(x)s, %(y)s, margin => 64.0 / 4096),
+                    4326
+                )
+                {filters}
+            )
+            SELECT ST_AsMVT(tile, 'measurements', 4096, 'geom') FROM tile
+        """
+
+        with connection.cursor() as cursor:
+            cursor.execute(query, params)
+            return bytes(cursor.fetchone()[0] or b"")
+
+    @staticmethod
+    def get_tiles_version():
+        """Return the version of the cached tiles"""
+        return cache.get_or_set(TILES_VERSION_KEY, lambda: uuid.uuid4().hex, None)
+
+    @staticmethod
+    def invalidate_tiles():
+        """Invalidate the cached tiles (by changing the version)"""
+        cache.set(TILES_VERSION_KEY, uuid.uuid4().hex, None)
+
+    @staticmethod
+    def schedule_changed():
+        """
+        Refresh the dashboard summary and invalidate the cached tiles once
+        the transaction (that changed the Measurements) commits
+        """
+        ProjectMeasurementSummaryView.schedule_refresh()
+        transaction.on_commit(Measurement.invalidate_tiles)
+
+    @staticmethod
+    def _get_display_params():
+        """Return the jsonb lookup parameters for the DISPLAY_COLUMNS"""
+
+        def get_mapping(mapping):
+            return json.dumps(
+                {
+                    "null" if key is None else key: value
+                    for key, value in mapping.items()
+                }
+            )
+
+        return {
+            "stages": get_mapping(dict(Stage.choices)),
+            "special_cases": get_mapping(dict(SpecialCase.choices)),
+            "hazard_sizes": get_mapping(dict(QuickDescription.choices)),
+            "symbols": get_mapping(SYMBOLS),
+            "colors": get_mapping(SYMBOL_COLORS),
+        }
+
     def get_symbol(self):
         """Return the symbol to represent the measurement"""
         return SYMBOLS.get(self.special_case, "location_on")
@@ -249,3 +659,203 @@ class Measurement(models.Model):
             return color
 
         return "black"
+
+
+class MeasurementImport(models.Model):
+    """Measurements CSV import job (run by the import worker)"""
+
+    class Status(models.TextChoices):
+        """Import status"""
+
+        PENDING = ("PENDING", "Pending")
+        IN_PROGRESS = ("IN_PROGRESS", "In Progress")
+        COMPLETE = ("COMPLETE", "Complete")
+        FAILED = ("FAILED", "Failed")
+
+    # An in progress import that has not been updated for this long is
+    # assumed to have been abandoned (i.e. the worker stopped)
+    STALE_AFTER = timedelta(minutes=10)
+
+    # Separate connection for the progress updates (see set_progress)
+    _progress_connection = None
+
+    project = models.ForeignKey(
+        Project, on_delete=models.CASCADE, related_name="measurement_imports"
+    )
+    stage = models.CharField(max_length=25, choices=Stage.choices)
+    request_id = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
+    status = models.CharField(
+        max_length=25, choices=Status.choices, default=Status.PENDING
+    )
+    file = models.FileField(upload_to="imports/", blank=True, null=True)
+    rows_total = models.IntegerField(
+        blank=True, null=True, help_text="Approximate (the CSV line count)"
+    )
+    rows_processed = models.IntegerField(default=0)
+    error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["created_at"],
+                name="measurement_import_pending_idx",
+                condition=models.Q(status="PENDING"),
+            ),
+        ]
+
+    @classmethod
+    def request(cls, project, stage, upload):
+        """
+        Queue the import of the uploaded CSV file, which is copied (streamed)
+        to the storage. Each import replaces the stage's Measurements, so a
+        pending import for the project/stage (e.g. a retried upload) is
+        updated with the file rather than queued twice.
+        """
+        rows_total = cls.count_rows(upload)
+
+        with transaction.atomic():
+            job = (
+                cls.objects.select_for_update()
+                .filter(project=project, stage=stage, status=cls.Status.PENDING)
+                .order_by("created_at")
+                .first()
+            )
+
+            if job is None:
+                job = cls(project=project, stage=stage)
+            elif job.file:
+                job.file.delete(save=False)
+
+            job.rows_total = rows_total
+            job.file.save(f"{uuid.uuid4()}.csv", upload, save=False)
+            job.save()
+
+        return job
+
+    @staticmethod
+    def count_rows(upload):
+        """Return the approximate rows of the CSV file (the lines less the header)"""
+        lines = 0
+        last = b""
+
+        for chunk in upload.chunks():
+            lines += chunk.count(b"\n")
+            last = chunk[-1:] or last
+
+        if last and last != b"\n":
+            lines += 1
+
+        upload.seek(0)
+        return max(lines - 1, 0)
+
+    @classmethod
+    def claim_next(cls):
+        """
+        Claim the oldest pending import (or None), skipping any locked by
+        another worker and any whose project/stage is already being imported
+        """
+        stale = datetime.now(timezone.utc) - cls.STALE_AFTER
+        cls.objects.filter(status=cls.Status.IN_PROGRESS, updated_at__lt=stale).update(
+            status=cls.Status.FAILED, error="The import was interrupted."
+        )
+
+        in_progress = cls.objects.filter(
+            project=OuterRef("project"),
+            stage=OuterRef("stage"),
+            status=cls.Status.IN_PROGRESS,
+        )
+
+        with transaction.atomic():
+            job = (
+                cls.objects.select_for_update(skip_locked=True)
+                .filter(status=cls.Status.PENDING)
+                .exclude(Exists(in_progress))
+                .select_related("project")
+                .order_by("created_at")
+                .first()
+            )
+
+            if job is not None:
+                job.status = cls.Status.IN_PROGRESS
+                job.save(update_fields=["status", "updated_at"])
+
+        return job
+
+    def set_progress(self, rows_processed):
+        """
+        Record the rows processed. The import runs in a transaction, so the
+        progress is written on a separate connection (to be visible to the
+        status polls before it commits).
+        """
+        self.rows_processed = rows_processed
+
+        if self._progress_connection is None:
+            self._progress_connection = connections.create_connection(DEFAULT_DB_ALIAS)
+
+        with self._progress_connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                    UPDATE {self._meta.db_table}
+                    SET rows_processed = %s, updated_at = now()
+                    WHERE id = %s
+                """,
+                [rows_processed, self.pk],
+            )
+
+    def run(self):
+        """Import the CSV file (the job must have been claimed)"""
+        try:
+            with self.file.open("rb") as f, open_text(f) as file_obj:
+                measurements = Measurement.import_from_csv(
+                    file_obj, self.project, self.stage, progress=self.set_progress
+                )
+
+            self.complete(measurements.count())
+        except Exception as exc:
+            self.fail(exc)
+            raise
+        finally:
+            if self._progress_connection is not None:
+                self._progress_connection.close()
+                self._progress_connection = None
+
+    def _finish(self, **values):
+        """
+        Update the finished (claimed) import, unless it is no longer in
+        progress (i.e. it has been marked as abandoned)
+        """
+        updated = MeasurementImport.objects.filter(
+            pk=self.pk, status=self.Status.IN_PROGRESS
+        ).update(updated_at=datetime.now(timezone.utc), **values)
+
+        if updated:
+            for name, value in values.items():
+                setattr(self, name, value)
+
+        return bool(updated)
+
+    def complete(self, rows_processed):
+        """Mark the import as complete and remove the previous imports"""
+        if not self._finish(rows_processed=rows_processed, status=self.Status.COMPLETE):
+            return
+
+        self.file.delete(save=False)
+        MeasurementImport.objects.filter(pk=self.pk).update(file=None)
+
+        previous = MeasurementImport.objects.filter(
+            project_id=self.project_id,
+            stage=self.stage,
+            created_at__lt=self.created_at,
+            status__in=[self.Status.COMPLETE, self.Status.FAILED],
+        )
+
+        for job in previous:
+            job.file.delete(save=False)
+
+        previous.delete()
+
+    def fail(self, error):
+        """Mark the import as failed"""
+        self._finish(error=str(error), status=self.Status.FAILED)
@@ -1,12 +1,11 @@
 import uuid
 
 import boto3
-import pyproj
-from django.db import models
+from django.db import connection, models
 
 from core.models.constants import States
 from lib.constants import CONVERT_METERS_TO_MILES
-from repairs.models.constants import HazardDensity, HazardTier, PanelSize
+from repairs.models.constants import HazardDensity, HazardTier, PanelSize, Stage
 from repairs.models.projects import Project
 
 
@@ -51,29 +50,59 @@ class PricingSheet(models.Model):
     base_rate = models.FloatField(default=0, help_text="Base cost/square foot")
     number_of_technicians = models.PositiveIntegerField(default=0)
     clins = models.JSONField(default=get_default_clins)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def calculate_sidewalk_miles(self):
         """
         Calculate the sidewalk miles from the survey data. This is only
         used for square foot pricing models.
         """
-        distance = 0
-        previous = None
-        geod = pyproj.Geod(ellps="WGS84")
-
-        for item in self.project.get_survey_measurements().order_by("object_id"):
-            current = item.coordinate
-
-            if previous is not None:
-                _, _, dist = geod.inv(previous.x, previous.y, current.x, current.y)
-                distance += dist
-
-            previous = current
-
-        miles = distance * CONVERT_METERS_TO_MILES
+        miles = self.get_survey_distance() * CONVERT_METERS_TO_MILES
         self.estimated_sidewalk_miles = round(miles, 3)
         self.save()
 
+    def get_survey_distance(self):
+        """
+        Return the (geodesic) distance in meters along the survey
+        measurements, in object id order. The measurements are split into
+        segments where the survey group changes, so that the gaps between
+        streets/areas are not included.
+        """
+        query = """
+            WITH ordered AS (
+                SELECT
+                    object_id,
+                    coordinate,
+                    CASE
+                        WHEN survey_group IS DISTINCT FROM
+                            LAG(survey_group) OVER (ORDER BY object_id)
+                        THEN 1 ELSE 0
+                    END AS is_start
+                FROM repairs_measurement
+                WHERE project_id = %(project_id)s
+                    AND stage = %(stage)s
+            ), segments AS (
+                SELECT
+                    object_id,
+                    coordinate,
+                    SUM(is_start) OVER (ORDER BY object_id) AS segment
+                FROM ordered
+            )
+            SELECT COALESCE(SUM(ST_Length(line::geography)), 0)
+            FROM (
+                SELECT ST_MakeLine(coordinate ORDER BY object_id) AS line
+                FROM segments
+                GROUP BY segment
+                HAVING COUNT(*) > 1
+            ) lines
+        """
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                query, {"project_id": self.project_id, "stage": Stage.SURVEY}
+            )
+            return cursor.fetchone()[0]
+
     def get_contact(self):
         """Return the pricing sheet contact"""
         try:
@@ -109,6 +138,7 @@ class PricingSheetContact(models.Model):
     email = models.EmailField(max_length=255, blank=True, null=True)
     phone_number = models.CharField(max_length=25, blank=True, null=True)
     address = models.TextField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def save(self, *args, **kwargs):
         self.address = self.format_address()
@@ -1,10 +1,14 @@
+import hashlib
+
 from django.contrib.auth import get_user_model
 from django.contrib.gis.db.models.aggregates import Union
 from django.db import models, transaction
+from django.db.models import Count, Max, OuterRef, Subquery
 from django.utils.text import slugify
 
 from customers.models import Contact, Customer
-from repairs.models.constants import PricingModel, Stage
+from lib.search import get_trigram_index
+from repairs.models.constants import PricingModel, QuickDescription, Stage
 from third_party.models import ArcGISItem
 
 User = get_user_model()
@@ -65,6 +69,9 @@ class Project(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [get_trigram_index("name", "project_name_trgm_idx")]
+
     def __str__(self):
         return self.name
 
@@ -136,6 +143,83 @@ class Project(models.Model):
         """Return the production measurements queryset"""
         return self.measurements.filter(stage=Stage.PRODUCTION).order_by("object_id")
 
+    def get_data_version(self):
+        """
+        Return the version of the project's document (pricing sheet/project
+        summary) data: a hash of the last updated times of the project and
+        its related rows, and of the measurement count (for the deletes)
+        """
+        from repairs.models import Instruction, Measurement
+
+        instructions = (
+            Instruction.objects.filter(project=OuterRef("pk"))
+            .order_by()
+            .values("project")
+        )
+        measurements = (
+            Measurement.objects.filter(project=OuterRef("pk"))
+            .order_by()
+            .values("project")
+        )
+
+        values = (
+            Project.objects.filter(pk=self.pk)
+            .annotate(
+                instructions_updated_at=Subquery(
+                    instructions.annotate(value=Max("updated_at")).values("value")
+                ),
+                measurements_updated_at=Subquery(
+                    measurements.annotate(value=Max("updated_at")).values("value")
+                ),
+                measurements_count=Subquery(
+                    measurements.annotate(value=Count("pk")).values("value")
+                ),
+            )
+            .values_list(
+                "updated_at",
+                "customer__updated_at",
+                "territory__updated_at",
+                "pricing_sheet__updated_at",
+                "pricing_sheet__contact__updated_at",
+                "instructions_updated_at",
+                "measurements_updated_at",
+                "measurements_count",
+            )
+            .get()
+        )
+
+        return hashlib.md5(str(values).encode()).hexdigest()
+
+    def get_hazard_stats(self, stage=Stage.SURVEY):
+        """
+        Return the count, square feet, and inch feet of the stage measurements
+        by hazard size (aggregated in a single query)
+        """
+        stats = {
+            size: {"count": 0, "square_feet": 0, "inch_feet": 0}
+            for size in QuickDescription.values
+        }
+
+        queryset = (
+            self.measurements.filter(stage=stage, hazard_size__isnull=False)
+            .values("hazard_size")
+            .annotate(
+                count=models.Count("id"),
+                square_feet=models.Sum(models.F("length") * models.F("width")),
+                inch_feet=models.Sum("inch_feet"),
+            )
+            .order_by()
+        )
+
+        for row in queryset:
+            stats[row["hazard_size"]] = {
+                "count": row["count"],
+                "square_feet": row["square_feet"] or 0,
+                "inch_feet": row["inch_feet"] or 0,
+            }
+
+        return stats
+
     @property
     def has_production_measurements(self):
         """Return True if the production measurements exist"""
@@ -212,8 +296,26 @@ class ProjectLayer(models.Model):
         max_length=25, choices=Status.choices, default=Status.NOT_SYNCED
     )
     last_synced_at = models.DateTimeField(blank=True, null=True)
+    last_edited_at = models.DateTimeField(
+        blank=True, null=True, help_text="Latest feature EditDate synced"
+    )
+    last_object_id = models.IntegerField(
+        blank=True, null=True, help_text="Latest feature OBJECTID synced"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ("project", "stage")
+
+    def set_high_water_mark(self, last_edited_at, last_object_id):
+        """Advance the high-water mark used for incremental syncs"""
+        if last_edited_at and (
+            self.last_edited_at is None or last_edited_at > self.last_edited_at
+        ):
+            self.last_edited_at = last_edited_at
+
+        if last_object_id and (
+            self.last_object_id is None or last_object_id > self.last_object_id
+        ):
+            self.last_object_id = last_object_id
@@ -1,8 +1,13 @@
-from django.db import models
+from django.db import models, transaction
 
+from lib.pg_views import refresh_materialized_view
 
-class ProjectManagementDashboardView(models.Model):
-    """PostgreSQL view for the project management dashboard"""
+
+class ProjectMeasurementSummaryView(models.Model):
+    """PostgreSQL materialized view of the production measurement aggregates"""
+
+    materialized = True
+    unique_key = ("project_id",)
 
     sql = """
         WITH measurement_dates AS (
@@ -27,15 +32,6 @@ class ProjectManagementDashboardView(models.Model):
                 ORDER BY initials
             ) techs
             GROUP BY project_id
-        ), measurement_expected AS (
-            SELECT
-                project_id,
-                linear_feet_curb,
-                COALESCE((hazards->'S'->'count')::int, 0) + COALESCE((hazards->'LS'->'count')::int, 0) + COALESCE((hazards->'MS'->'count')::int, 0) total,
-                COALESCE((hazards->'S'->'inch_feet')::float, 0) + COALESCE((hazards->'LS'->'inch_feet')::float, 0) + COALESCE((hazards->'MS'->'inch_feet')::float, 0) inch_feet,
-                COALESCE((hazards->'S'->'square_feet')::float, 0) + COALESCE((hazards->'LS'->'square_feet')::float, 0) + COALESCE((hazards->'MS'->'square_feet')::float, 0) square_feet
-            FROM repairs_instruction
-                WHERE stage = 'PRODUCTION'
         ), measurement_repaired AS (
             SELECT
                 project_id,
@@ -47,6 +43,57 @@ class ProjectManagementDashboardView(models.Model):
                 AND special_case != 'C'
             GROUP BY project_id
         )
+        SELECT
+            md.project_id,
+            mt.techs,
+            md.start_date,
+            md.last_date,
+            COALESCE(mr.total, 0) AS hazards_repaired,
+            COALESCE(md.curb_length, 0) AS curb_length_repaired,
+            COALESCE(mr.inch_feet, 0) AS inch_feet_repaired,
+            COALESCE(mr.area, 0) AS square_feet_repaired
+        FROM measurement_dates md
+            LEFT JOIN measurement_techs mt ON md.project_id = mt.project_id
+            LEFT JOIN measurement_repaired mr ON md.project_id = mr.project_id
+    """
+
+    project_id = models.IntegerField(primary_key=True)
+    techs = models.TextField(blank=True, null=True)
+    start_date = models.DateTimeField(blank=True, null=True)
+    last_date = models.DateTimeField(blank=True, null=True)
+    hazards_repaired = models.IntegerField()
+    curb_length_repaired = models.FloatField()
+    inch_feet_repaired = models.FloatField()
+    square_feet_repaired = models.FloatField()
+
+    class Meta:
+        app_label = "repairs"
+        db_table = "repairs_project_measurement_summary"
+        managed = False
+
+    @classmethod
+    def schedule_refresh(cls):
+        """
+        Refresh the view once the current transaction commits. The data has
+        been committed by then, so a failed refresh is only logged.
+        """
+        transaction.on_commit(lambda: refresh_materialized_view(cls), robust=True)
+
+
+class ProjectManagementDashboardView(models.Model):
+    """PostgreSQL view for the project management dashboard"""
+
+    sql = """
+        WITH measurement_expected AS (
+            SELECT
+                project_id,
+                linear_feet_curb,
+                COALESCE((hazards->'S'->'count')::int, 0) + COALESCE((hazards->'LS'->'count')::int, 0) + COALESCE((hazards->'MS'->'count')::int, 0) total,
+                COALESCE((hazards->'S'->'inch_feet')::float, 0) + COALESCE((hazards->'LS'->'inch_feet')::float, 0) + COALESCE((hazards->'MS'->'inch_feet')::float, 0) inch_feet,
+                COALESCE((hazards->'S'->'square_feet')::float, 0) + COALESCE((hazards->'LS'->'square_feet')::float, 0) + COALESCE((hazards->'MS'->'square_feet')::float, 0) square_feet
+            FROM repairs_instruction
+                WHERE stage = 'PRODUCTION'
+        )
         SELECT
             p.id AS project_id,
             p.name,
@@ -54,17 +101,17 @@ class ProjectManagementDashboardView(models.Model):
             c.id AS customer_id,
             c.name AS customer_name,
             l.last_synced_at,
-            mt.techs,
-            md.start_date,
-            md.last_date,
+            ms.techs,
+            ms.start_date,
+            ms.last_date,
             me.total AS hazards_expected,
             me.linear_feet_curb AS curb_length_expected,
             me.inch_feet AS inch_feet_expected,
             me.square_feet AS square_feet_expected,
-            COALESCE(mr.total, 0) AS hazards_repaired,
-            COALESCE(md.curb_length, 0) AS curb_length_repaired,
-            COALESCE(mr.inch_feet, 0) AS inch_feet_repaired,
-            COALESCE(mr.area, 0) AS square_feet_repaired,
+            COALESCE(ms.hazards_repaired, 0) AS hazards_repaired,
+            COALESCE(ms.curb_length_repaired, 0) AS curb_length_repaired,
+            COALESCE(ms.inch_feet_repaired, 0) AS inch_feet_repaired,
+            COALESCE(ms.square_feet_repaired, 0) AS square_feet_repaired,
             u.id AS bd_id,
             u.full_name AS bd_name,
             t.id AS territory_id,
@@ -74,10 +121,8 @@ class ProjectManagementDashboardView(models.Model):
             JOIN core_territory t ON p.territory_id = t.id
             LEFT JOIN accounts_user u ON p.business_development_manager_id = u.id
             LEFT JOIN repairs_projectlayer l ON p.id = l.project_id AND l.stage = 'PRODUCTION'
-            LEFT JOIN measurement_techs mt ON p.id = mt.project_id
-            LEFT JOIN measurement_dates md ON p.id = md.project_id
+            LEFT JOIN repairs_project_measurement_summary ms ON p.id = ms.project_id
             LEFT JOIN measurement_expected me ON p.id = me.project_id
-            LEFT JOIN measurement_repaired mr ON p.id = mr.project_id
     """
 
     project_id = models.IntegerField(primary_key=True)
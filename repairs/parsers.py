@@ -1,13 +1,79 @@
 import csv
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Optional, get_args
 
 from dateutil.parser import parse as parse_dt
 from django.contrib.gis.geos import Point
 from pydantic import BaseModel, Field, validator
+from pydantic_core import PydanticUndefined
 
 from repairs.models.constants import QuickDescription, SpecialCase, Stage
 
+# Date formats of the ArcGIS CSV exports (tried before falling back to dateutil)
+DATE_FORMATS = (
+    "%m/%d/%y %H:%M",
+    "%m/%d/%Y %H:%M",
+    "%m/%d/%Y %H:%M:%S",
+    "%m/%d/%Y %I:%M:%S %p",
+)
+
+# Choice keys by the (lowercase) labels of the choice fields
+LABEL_KEYS = {
+    "special_case": {label.lower(): key for key, label in SpecialCase.choices},
+    "hazard_size": {label.lower(): key for key, label in QuickDescription.choices},
+}
+
+
+class MeasurementParseError(ValueError):
+    """Error parsing a row of a measurements CSV file"""
+
+    def __init__(self, row, column, message):
+        self.row = row
+        self.column = column
+        self.message = message
+        super().__init__(f"Row {row} [{column}]: {message}")
+
+
+class DateParser:
+    """
+    Date parser that tries the last matched format first, since a file's
+    dates are all in the same format, then the DATE_FORMATS, ISO 8601, and
+    finally dateutil. The dates are only to the minute, so the parsed values
+    are memoized.
+    """
+
+    def __init__(self):
+        self.date_format = None
+        self.parsed = {}
+
+    def parse(self, value):
+        """Return the parsed datetime"""
+        if value not in self.parsed:
+            self.parsed[value] = self._parse(value)
+
+        return self.parsed[value]
+
+    def _parse(self, value):
+        if self.date_format is not None:
+            try:
+                return datetime.strptime(value, self.date_format)
+            except ValueError:
+                pass
+
+        for date_format in DATE_FORMATS:
+            try:
+                parsed = datetime.strptime(value, date_format)
+            except ValueError:
+                continue
+
+            self.date_format = date_format
+            return parsed
+
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return parse_dt(value)
+
 
 class BaseMeasurement(BaseModel):
     """Base measurement record with common attributes"""
@@ -102,6 +168,102 @@ class BaseMeasurement(BaseModel):
 
         return measurements
 
+    @classmethod
+    def iter_rows(cls, file_obj):
+        """
+        Yield the measurement values (by field name) parsed from a CSV file.
+        This is the fast path of from_csv: the rows are converted without
+        validating a model per row, and the coordinate is not constructed
+        (the long/lat are returned). The errors are raised as a
+        MeasurementParseError with the row number, including a repeated
+        object id (which would violate the unique constraint on import).
+        """
+        fields = []
+        group_alias = None
+        id_alias = cls.model_fields["object_id"].alias
+        object_ids = {}
+        date_parser = DateParser()
+
+        for name, field in cls.model_fields.items():
+            if name == "coordinate":
+                continue
+
+            # The type of the (Optional) field annotation
+            args = [arg for arg in get_args(field.annotation) if arg is not type(None)]
+            dtype = args[0] if args else field.annotation
+            required = field.is_required()
+            nullable = type(None) in get_args(field.annotation)
+            default = None if field.default is PydanticUndefined else field.default
+            fields.append((name, field.alias, dtype, required, nullable, default))
+
+        if "survey_group" in cls.model_fields:
+            group_alias = cls.model_fields["survey_group"].alias
+
+        group = "default"
+
+        # The header is the first row, so the data starts on the second
+        for number, data in enumerate(csv.DictReader(file_obj), start=2):
+            # Blank survey groups are carried forward from the previous row
+            if group_alias:
+                value = data.get(group_alias)
+
+                if value is None or value.strip() == "":
+                    data[group_alias] = group
+
+                group = data[group_alias]
+
+            row = {}
+
+            for name, alias, dtype, required, nullable, default in fields:
+                if alias not in data:
+                    if required:
+                        raise MeasurementParseError(number, alias, "Field required")
+
+                    row[name] = default
+                    continue
+
+                value = data[alias]
+
+                if value is None or value.strip() == "":
+                    if not nullable:
+                        raise MeasurementParseError(number, alias, "Value required")
+
+                    # A blank label is decoded as "None" (as from_csv does)
+                    label_keys = LABEL_KEYS.get(name, {})
+                    row[name] = label_keys.get("none")
+                    continue
+
+                try:
+                    row[name] = cls.convert(name, dtype, value, date_parser)
+                except ValueError as exc:
+                    raise MeasurementParseError(number, alias, str(exc)) from exc
+
+            # The first row number of each object id
+            first = object_ids.setdefault(row["object_id"], number)
+
+            if first != number:
+                message = f"Duplicate {row['object_id']} (first on row {first})"
+                raise MeasurementParseError(number, id_alias, message)
+
+            yield row
+
+    @staticmethod
+    def convert(name, dtype, value, date_parser):
+        """Return the converted CSV value of the field"""
+        if name in LABEL_KEYS:
+            try:
+                return LABEL_KEYS[name][value.lower().strip()]
+            except KeyError:
+                raise ValueError(f"Invalid {name}: {value}") from None
+
+        if name == "measured_at":
+            return date_parser.parse(value).replace(tzinfo=timezone.utc)
+
+        if dtype is str:
+            return value
+
+        return dtype(value)
+
     @classmethod
     def order(cls) -> list[str]:
         """Return the field order"""
@@ -1,4 +1,5 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
 from customers.models import Customer
@@ -6,13 +7,14 @@ from repairs.models import (
     Instruction,
     InstructionChecklist,
     InstructionChecklistQuestion,
+    Measurement,
     PricingSheet,
     PricingSheetRequest,
     Project,
     ProjectSummaryRequest,
 )
 from repairs.models.constants import Stage
-from utils.aws import invoke_lambda_function
+from utils.dispatch import dispatch
 
 
 @receiver(post_save, sender=Project)
@@ -28,6 +30,36 @@ def initialize_instructions(sender, instance, created, **kwargs):
     PricingSheet.objects.get_or_create(project=instance)
 
 
+@receiver(pre_save, sender=Project)
+def track_tile_fields(sender, instance, update_fields=None, **kwargs):
+    """Record the saved project status/territory (the tile filters)"""
+    instance._tile_fields = None
+
+    if instance.pk and (
+        update_fields is None or {"status", "territory"} & set(update_fields)
+    ):
+        instance._tile_fields = (
+            Project.objects.filter(pk=instance.pk)
+            .values_list("status", "territory_id")
+            .first()
+        )
+
+
+@receiver(post_save, sender=Project)
+def invalidate_project_tiles(sender, instance, **kwargs):
+    """Invalidate the cached tiles if the project status/territory changed"""
+    saved = getattr(instance, "_tile_fields", None)
+
+    if saved is not None and saved != (instance.status, instance.territory_id):
+        transaction.on_commit(Measurement.invalidate_tiles)
+
+
+@receiver(post_delete, sender=Project)
+def invalidate_deleted_project_tiles(sender, instance, **kwargs):
+    """Invalidate the cached tiles of the deleted project's Measurements"""
+    transaction.on_commit(Measurement.invalidate_tiles)
+
+
 @receiver(post_save, sender=PricingSheetRequest)
 def generate_pricing_sheet(sender, instance, created, **kwargs):
     """Trigger the pricing sheet generation Lambda function"""
@@ -37,7 +69,7 @@ def generate_pricing_sheet(sender, instance, created, **kwargs):
             "request_id": instance.request_id,
             "project_id": instance.pricing_sheet.project_id,
         }
-        invoke_lambda_function("pricing_sheet", payload=payload)
+        dispatch("pricing_sheet", payload=payload)
 
 
 @receiver(post_save, sender=ProjectSummaryRequest)
@@ -49,7 +81,7 @@ def generate_project_summary(sender, instance, created, **kwargs):
             "request_id": instance.request_id,
             "project_id": instance.project_id,
         }
-        invoke_lambda_function("project_summary", payload=payload)
+        dispatch("project_summary", payload=payload)
 
 
 @receiver(post_save, sender=Customer)
@@ -0,0 +1,62 @@
+import io
+
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from lib.test_helpers import IntegrationTestBase, create_instructions
+from repairs.documents import ProjectInstructionsGenerator, SurveyInstructionsGenerator
+from repairs.factories import ProjectFactory
+from repairs.models.constants import Stage
+
+
+class TestInstructionsGenerator(IntegrationTestBase):
+    """Tests for the instructions document generators"""
+
+    def setUp(self):
+        super().setUp()
+        project = ProjectFactory()
+        self.instruction = project.instructions.get(stage=Stage.SURVEY)
+        self.generator = SurveyInstructionsGenerator(self.instruction)
+
+    def get_cache_key(self):
+        """Return the generator's cache key for the current instructions"""
+        content = self.generator.render()
+        supplements = self.generator.get_supplemental_files()
+        return self.generator.get_cache_key(content, supplements)
+
+    def test_generate_cached(self):
+        """Test the generated PDF is cached by the rendered content"""
+        with io.BytesIO() as f:
+            self.generator.generate(f)
+            document = f.getvalue()
+
+        key = self.get_cache_key()
+        self.assertTrue(document.startswith(b"%PDF"))
+        self.assertEqual(caches["documents"].get(key), document)
+
+        self.instruction.details = "Updated details"
+        self.instruction.save()
+        self.assertNotEqual(self.get_cache_key(), key)
+
+    def test_render_num_queries(self):
+        """Test the render queries do not depend on the specifications set"""
+        project = create_instructions()
+
+        for stage, generator_class in (
+            (Stage.SURVEY, SurveyInstructionsGenerator),
+            (Stage.PRODUCTION, ProjectInstructionsGenerator),
+        ):
+            empty = create_instructions(specifications=False).instructions.get(
+                stage=stage
+            )
+            instruction = project.instructions.get(stage=stage)
+
+            with CaptureQueriesContext(connection) as expected:
+                generator_class(empty).render()
+
+            with CaptureQueriesContext(connection) as queries:
+                content = generator_class(instruction).render()
+
+            self.assertEqual(len(queries), len(expected))
+            self.assertIn("Note for", content)
@@ -1,7 +1,26 @@
-from lib.test_helpers import IntegrationTestBase
+import csv
+import io
+from datetime import date, datetime, timezone
+from unittest import mock
+
+import pyproj
+from django.contrib.gis.geos import Point
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from accounts.factories import UserFactory
+from accounts.models import UserRole
+from lib.constants import CONVERT_METERS_TO_MILES
+from lib.test_helpers import IntegrationTestBase, QueryPlanMixin
 from repairs.factories import ProjectFactory
-from repairs.models import Measurement
-from repairs.models.constants import SpecialCase, Stage
+from repairs.models import (
+    Instruction,
+    Measurement,
+    ProjectManagementDashboardView,
+    ProjectMeasurementSummaryView,
+)
+from repairs.models.constants import Hazard, SpecialCase, Stage
 
 
 class TestMeasurement(IntegrationTestBase):
@@ -36,3 +55,246 @@ class TestMeasurement(IntegrationTestBase):
 
             for curb in curbs:
                 self.assertEqual(curb.length, 0.5)
+
+    @mock.patch("repairs.models.measurements.PROGRESS_ROWS", 50)
+    def test_import_from_csv_progress(self):
+        """Test the import progress is reported by the rows processed"""
+
+        project = ProjectFactory()
+        progress = []
+
+        filename = "repairs/tests/fixtures/survey_template.csv"
+
+        with open(filename, "r", encoding="utf-8-sig") as f:
+            Measurement.import_from_csv(
+                f, project, Stage.SURVEY, progress=progress.append
+            )
+
+        # Every PROGRESS_ROWS rows, then the total between the import phases
+        self.assertEqual(progress[:3], [50, 100, 150])
+        self.assertTrue(progress[3:])
+        self.assertEqual(set(progress[3:]), {165})
+
+    def test_import_from_csv_replaces_existing(self):
+        """Test re-importing the measurements replaces the existing"""
+
+        project = ProjectFactory()
+        stage = Stage.SURVEY
+
+        filename = "repairs/tests/fixtures/survey_template.csv"
+
+        with open(filename, "r", encoding="utf-8-sig") as f:
+            Measurement.import_from_csv(f, project, stage)
+            measurements = Measurement.import_from_csv(f, project, stage)
+            self.assertEqual(measurements.count(), 165)
+
+            curbs = measurements.filter(special_case=SpecialCase.CURB)
+
+            for curb in curbs:
+                self.assertEqual(curb.measured_hazard_length, curb.curb_length * 12)
+
+    def test_get_tech_production(self):
+        """Test the tech production is pivoted by tech and day"""
+
+        project = ProjectFactory()
+        UserFactory.create_with_roles(
+            roles=[UserRole.Role.TECH],
+            first_name="Jane",
+            last_name="Doe",
+            arcgis_username="jdoe",
+        )
+        UserFactory.create_with_roles(
+            roles=[UserRole.Role.TECH],
+            first_name="John",
+            last_name="Smith",
+            arcgis_username="jsmith",
+        )
+
+        for i, (day, inch_feet) in enumerate([(1, 2.0), (1, 3.0), (3, 4.0), (5, 1.0)]):
+            Measurement.objects.create(
+                project=project,
+                stage=Stage.PRODUCTION,
+                coordinate=Point(0, 0),
+                object_id=i,
+                tech="jdoe",
+                inch_feet=inch_feet,
+                measured_at=datetime(2024, 1, day, 23, 59, tzinfo=timezone.utc),
+            )
+
+        data = Measurement.get_tech_production(date(2024, 1, 1), date(2024, 1, 3))
+        self.assertEqual(len(data), 2)
+
+        (jdoe, jsmith) = data
+        self.assertEqual(jdoe["tech"], "J. Doe")
+        self.assertEqual(jdoe["2024-01-01"], 5.0)
+        self.assertIsNone(jdoe["2024-01-02"])
+        self.assertEqual(jdoe["2024-01-03"], 4.0)
+        self.assertEqual(jdoe["total_records"], 3)
+        self.assertEqual(jdoe["total_days"], 2)
+        self.assertEqual(jdoe["total_inch_feet"], 9.0)
+        self.assertEqual(jdoe["average_per_day"], 4.5)
+
+        self.assertEqual(jsmith["tech"], "J. Smith")
+        self.assertEqual(jsmith["total_records"], 0)
+        self.assertIsNone(jsmith["average_per_day"])
+
+    def test_iter_csv(self):
+        """Test the CSV export is streamed in chunks with the choice labels"""
+        project = ProjectFactory()
+        filename = "repairs/tests/fixtures/survey_template.csv"
+
+        with open(filename, "r", encoding="utf-8-sig") as f:
+            Measurement.import_from_csv(f, project, Stage.SURVEY)
+
+        measurement = project.measurements.exclude(hazard_size=None).first()
+        chunks = list(Measurement.iter_csv(project, Stage.SURVEY, chunk_size=50))
+        self.assertEqual(len(chunks), 4)  # 165 measurements in chunks of 50
+
+        rows = list(csv.DictReader(io.StringIO("".join(chunks))))
+        self.assertEqual(len(rows), 165)
+
+        row = next(r for r in rows if r["OBJECTID"] == str(measurement.object_id))
+        self.assertEqual(row["Hazard Size"], measurement.get_hazard_size_display())
+
+
+class TestInstruction(IntegrationTestBase):
+    """Unit/integration tests for the Instruction model"""
+
+    def test_get_default_hazards(self):
+        """Test the default hazards are aggregated from the survey"""
+
+        project = ProjectFactory()
+        instruction = Instruction.objects.create(
+            project=project, stage=Stage.PRODUCTION
+        )
+
+        filename = "repairs/tests/fixtures/survey_template.csv"
+
+        with open(filename, "r", encoding="utf-8-sig") as f:
+            Measurement.import_from_csv(f, project, Stage.SURVEY)
+
+        with self.assertNumQueries(1):
+            hazards = instruction.get_default_hazards()
+
+        self.assertEqual(list(hazards), [value for value, _ in Hazard.choices])
+
+        for value, data in hazards.items():
+            measurements = project.get_survey_measurements().filter(
+                hazard_size=Hazard.get_size(value)
+            )
+
+            sqft = sum([m.length * m.width for m in measurements])
+            inft = sum([m.inch_feet for m in measurements])
+
+            self.assertEqual(data["count"], len(measurements))
+            self.assertAlmostEqual(data["square_feet"], sqft)
+            self.assertAlmostEqual(data["inch_feet"], inft)
+
+
+class TestPricingSheet(IntegrationTestBase):
+    """Unit/integration tests for the PricingSheet model"""
+
+    def test_calculate_sidewalk_miles(self):
+        """Test the sidewalk miles exclude the gaps between survey groups"""
+
+        project = ProjectFactory()
+        pricing_sheet = project.pricing_sheet
+
+        filename = "repairs/tests/fixtures/survey_template.csv"
+
+        with open(filename, "r", encoding="utf-8-sig") as f:
+            Measurement.import_from_csv(f, project, Stage.SURVEY)
+
+        pricing_sheet.calculate_sidewalk_miles()
+
+        geod = pyproj.Geod(ellps="WGS84")
+        distance = 0
+        previous = None
+
+        for measurement in project.get_survey_measurements():
+            if previous and previous.survey_group == measurement.survey_group:
+                (x0, y0), (x1, y1) = previous.coordinate, measurement.coordinate
+                distance += geod.inv(x0, y0, x1, y1)[2]
+
+            previous = measurement
+
+        miles = round(distance * CONVERT_METERS_TO_MILES, 3)
+        self.assertAlmostEqual(pricing_sheet.estimated_sidewalk_miles, miles, places=2)
+
+
+class TestProjectManagementDashboardView(IntegrationTestBase):
+    """Integration tests for the project management dashboard views"""
+
+    def setUp(self):
+        super().setUp()
+        call_command("sync_pgviews")
+
+    def test_refresh_on_import(self):
+        """Test importing the measurements refreshes the dashboard summary"""
+
+        project = ProjectFactory()
+        stage = Stage.PRODUCTION
+
+        filename = "repairs/tests/fixtures/production_template.csv"
+
+        with open(filename, "r", encoding="utf-8-sig") as f:
+            with self.captureOnCommitCallbacks(execute=True):
+                measurements = Measurement.import_from_csv(f, project, stage)
+
+        dashboard = ProjectManagementDashboardView.objects.get(project_id=project.pk)
+        repaired = measurements.exclude(special_case=SpecialCase.CURB)
+        self.assertEqual(dashboard.hazards_repaired, repaired.count())
+
+    @mock.patch("repairs.models.views.refresh_materialized_view")
+    def test_refresh_error(self, refresh):
+        """Test a failed refresh does not fail the (committed) import"""
+        refresh.side_effect = RuntimeError("Refresh failed")
+        project = ProjectFactory()
+
+        filename = "repairs/tests/fixtures/production_template.csv"
+
+        with open(filename, "r", encoding="utf-8-sig") as f:
+            with self.captureOnCommitCallbacks(execute=True):
+                Measurement.import_from_csv(f, project, Stage.PRODUCTION)
+
+        refresh.assert_called_once()
+        self.assertEqual(project.measurements.count(), 59)
+
+
+class TestMeasurementIndexes(QueryPlanMixin, IntegrationTestBase):
+    """Integration tests for the Measurement query plans"""
+
+    def setUp(self):
+        super().setUp()
+        self.project = ProjectFactory()
+
+    def test_project_measurements(self):
+        """Test the project/stage measurements use the unique index"""
+        queryset = self.project.measurements.filter(stage=Stage.SURVEY).order_by(
+            "object_id"
+        )
+        self.assertUsesIndex("project_id_stage_object_id", queryset)
+
+    def test_not_geocoded(self):
+        """Test the measurements to geocode use the partial index"""
+        queryset = self.project.measurements.filter(
+            stage=Stage.PRODUCTION, geocoded_address__isnull=True
+        ).values("id")
+        self.assertUsesIndex("measurement_not_geocoded_idx", queryset)
+
+    def test_tech_production(self):
+        """Test the tech production report uses the stage/date index"""
+        with CaptureQueriesContext(connection) as context:
+            Measurement.get_tech_production(date(2024, 1, 1), date(2024, 1, 14))
+
+        sql = next(
+            q["sql"]
+            for q in context.captured_queries
+            if "repairs_measurement" in q["sql"]
+        )
+        self.assertUsesIndex("measurement_stage_at_tech_idx", sql)
+
+    def test_dashboard_summary(self):
+        """Test the dashboard summary uses the stage/date index"""
+        sql = ProjectMeasurementSummaryView.sql
+        self.assertUsesIndex("measurement_stage_at_tech_idx", sql)
@@ -1,6 +1,11 @@
+import io
 import unittest
 
-from repairs.parsers import ProductionMeasurement, SurveyMeasurement
+from repairs.parsers import (
+    MeasurementParseError,
+    ProductionMeasurement,
+    SurveyMeasurement,
+)
 
 
 class TestMeasurementParsers(unittest.TestCase):
@@ -23,3 +28,55 @@ class TestMeasurementParsers(unittest.TestCase):
         with open(filename, "r", encoding="utf-8-sig") as f:
             measurements = ProductionMeasurement.from_csv(f)
             self.assertEqual(len(measurements), 59)
+
+    def test_iter_rows(self):
+        """Test the fast path parses the same values as the models"""
+
+        for parser_cls, filename in (
+            (SurveyMeasurement, "repairs/tests/fixtures/survey_template.csv"),
+            (ProductionMeasurement, "repairs/tests/fixtures/production_template.csv"),
+        ):
+            with open(filename, "r", encoding="utf-8-sig") as f:
+                expected = [
+                    m.model_dump(exclude={"coordinate"}) for m in parser_cls.from_csv(f)
+                ]
+                f.seek(0)
+                rows = list(parser_cls.iter_rows(f))
+
+            self.assertEqual(rows, expected)
+
+    def test_iter_rows_error(self):
+        """Test the fast path errors include the row number"""
+
+        filename = "repairs/tests/fixtures/survey_template.csv"
+
+        with open(filename, "r", encoding="utf-8-sig") as f:
+            lines = f.readlines()
+
+        lines[2] = lines[2].replace("Curb", "Unknown")
+        file_obj = io.StringIO("".join(lines))
+
+        with self.assertRaises(MeasurementParseError) as ctx:
+            list(SurveyMeasurement.iter_rows(file_obj))
+
+        self.assertEqual(ctx.exception.row, 3)
+        self.assertEqual(ctx.exception.column, "Special Case")
+
+    def test_iter_rows_duplicate(self):
+        """Test a repeated object id is an error naming both rows"""
+
+        filename = "repairs/tests/fixtures/survey_template.csv"
+
+        with open(filename, "r", encoding="utf-8-sig") as f:
+            lines = f.readlines()
+
+        lines[-1] = lines[-1].rstrip("\n") + "\n"
+        lines.append(lines[1])
+        file_obj = io.StringIO("".join(lines))
+
+        with self.assertRaises(MeasurementParseError) as ctx:
+            list(SurveyMeasurement.iter_rows(file_obj))
+
+        self.assertEqual(ctx.exception.row, len(lines))
+        self.assertEqual(ctx.exception.column, "OBJECTID")
+        self.assertIn("first on row 2", ctx.exception.message)
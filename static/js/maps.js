@@ -202,22 +202,15 @@ class MeasurementsMap {
   // Fetch the GeoJSON Feature Collection containing all of the
   // features for the current project
   async fetchFeatures() {
-    let page = 1
-    let features = []
+    const url = `/api/projects/${this.projectId}/geojson/`
+    const resp = await fetch(url)
 
-    while (page !== null) {
-      const url = `/api/measurements/?project=${this.projectId}&page=${page}`
-      const resp = await fetch(url)
-
-      if (!resp.ok) {
-        throw new Error(`Error fetching project ${this.projectId} data`)
-      }
-
-      const { results, next } = await resp.json()
-      features = [...features, ...results.features]
-      page = !!next ? page + 1 : null
+    if (!resp.ok) {
+      throw new Error(`Error fetching project ${this.projectId} data`)
     }
 
+    const { features } = await resp.json()
+
     const bbox = this.calculateBounds(features)
 
     return {type: "FeatureCollection", bbox, features} 
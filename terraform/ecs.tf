@@ -30,8 +30,8 @@ resource "aws_ecs_task_definition" "default" {
   network_mode             = "awsvpc"
   execution_role_arn       = data.aws_iam_role.ecs_execution.arn
   task_role_arn            = aws_iam_role.ecs_task.arn
-  cpu                      = 1024
-  memory                   = 2048
+  cpu                      = 2048
+  memory                   = 6144
 
   container_definitions = jsonencode([
     {
@@ -45,6 +45,13 @@ resource "aws_ecs_task_definition" "default" {
         for k, v in local.secrets : { name = k, value = v }
       ]
 
+      mountPoints = [
+        {
+          sourceVolume  = "media"
+          containerPath = "/code/media"
+        }
+      ]
+
       portMappings = [
         {
           containerPort = var.backend_port
@@ -61,9 +68,63 @@ resource "aws_ecs_task_definition" "default" {
           "awslogs-stream-prefix" : "backend"
         }
       }
+    },
+    {
+      name      = "${local.project}-${local.env}-worker"
+      image     = "${data.aws_ecr_repository.default.repository_url}:${var.app_version}"
+      command   = ["python3", "manage.py", "generate_instruction_documents"]
+      cpu       = 512
+      memory    = 2048
+      essential = false
+
+      environment = [
+        for k, v in local.secrets : { name = k, value = v }
+      ]
+
+      logConfiguration = {
+        logDriver = "awslogs"
+        options = {
+          "awslogs-group" : aws_cloudwatch_log_group.default.name
+          "awslogs-region" : var.region
+          "awslogs-stream-prefix" : "worker"
+        }
+      }
+    },
+    {
+      name      = "${local.project}-${local.env}-import-worker"
+      image     = "${data.aws_ecr_repository.default.repository_url}:${var.app_version}"
+      command   = ["python3", "manage.py", "import_measurements"]
+      cpu       = 512
+      memory    = 2048
+      essential = false
+
+      environment = [
+        for k, v in local.secrets : { name = k, value = v }
+      ]
+
+      mountPoints = [
+        {
+          sourceVolume  = "media"
+          containerPath = "/code/media"
+        }
+      ]
+
+      logConfiguration = {
+        logDriver = "awslogs"
+        options = {
+          "awslogs-group" : aws_cloudwatch_log_group.default.name
+          "awslogs-region" : var.region
+          "awslogs-stream-prefix" : "import-worker"
+        }
+      }
     }
   ])
 
+  # Shared by the backend (uploads) and the import worker
+  volume {
+    name = "media"
+  }
+
   runtime_platform {
     operating_system_family = "LINUX"
     cpu_architecture        = "X86_64"
@@ -0,0 +1,18 @@
+from django.db import models
+
+
+class GeocodedAddress(models.Model):
+    """Mapbox reverse geocoded address cache (by rounded coordinate)"""
+
+    longitude = models.FloatField()
+    latitude = models.FloatField()
+    address = models.CharField(max_length=255, blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"<GeocodedAddress ({self.longitude}, {self.latitude}) {self.address}>"
+
+    class Meta:
+        app_label = "third_party"
+        db_table = "mapbox_geocoded_address"
+        unique_together = ("longitude", "latitude")
@@ -1,2 +1,3 @@
 # ruff: noqa: F403
 from third_party.arcgis.models import *
+from third_party.mapbox.models import *
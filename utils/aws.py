@@ -1,5 +1,6 @@
 import json
 import logging
+from functools import lru_cache
 
 import boto3
 from django.conf import settings
@@ -7,18 +8,20 @@ from django.conf import settings
 LOGGER = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=None)
+def get_lambda_client(endpoint_url=None):
+    """Return the (shared) AWS Lambda client for the endpoint"""
+    return boto3.client("lambda", endpoint_url=endpoint_url)
+
+
 def invoke_lambda_function(function, payload=None):
-    """Return an invocation function for the AWS Lambda function"""
+    """Invoke the AWS Lambda function asynchronously"""
     params = settings.LAMBDA.get(function)
 
     if not params:
         raise ValueError(f"Invalid function {function}")
 
-    if not params["enabled"]:
-        LOGGER.info(f"Lambda function {function} disabled")
-        return
-
-    client = boto3.client("lambda", endpoint_url=params["endpoint_url"])
+    client = get_lambda_client(params["endpoint_url"])
     client.invoke(
         FunctionName=params["function_name"],
         InvocationType="Event",
@@ -0,0 +1,132 @@
+import importlib
+import json
+import logging
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+
+from utils.aws import invoke_lambda_function
+
+LOGGER = logging.getLogger(__name__)
+
+
+def dispatch(function, payload=None):
+    """
+    Dispatch the (Lambda) function invocation with the DISPATCH_BACKEND.
+    Invocations are only sent once the current transaction (if any) commits,
+    so that the function reads the committed data.
+    """
+    params = settings.LAMBDA.get(function)
+
+    if not params:
+        raise ValueError(f"Invalid function {function}")
+
+    if not params["enabled"]:
+        LOGGER.info(f"Lambda function {function} disabled")
+        return
+
+    backend = get_backend(settings.DISPATCH_BACKEND)
+
+    if backend.on_commit:
+        transaction.on_commit(partial(backend.dispatch, function, payload))
+    else:
+        backend.dispatch(function, payload)
+
+
+@lru_cache(maxsize=None)
+def get_backend(name):
+    """Return the dispatch backend"""
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        raise ImproperlyConfigured(f"Invalid dispatch backend {name}")
+
+
+class LambdaBackend:
+    """Invoke the AWS Lambda functions (asynchronously)"""
+
+    on_commit = True
+
+    def dispatch(self, function, payload, wait=False):
+        invoke_lambda_function(function, payload)
+
+
+class LocalBackend:
+    """
+    Run the Python Lambda handlers in a process pool (one per function, with
+    the function's directory first on the path). The functions without a
+    Python handler (i.e. the Go functions) are invoked on Lambda.
+    """
+
+    on_commit = True
+
+    def dispatch(self, function, payload, wait=False):
+        path = settings.BASE_DIR / "lambdas" / function
+
+        if not (path / "app.py").exists():
+            LambdaBackend().dispatch(function, payload, wait=wait)
+            return
+
+        # The handlers receive the JSON event, as on Lambda
+        event = json.loads(json.dumps(payload, default=str))
+        future = get_executor(str(path)).submit(run_handler, event)
+
+        if wait:
+            future.result()
+        else:
+            future.add_done_callback(partial(log_error, function))
+
+
+class OutboxBackend:
+    """
+    Queue the invocations in the database (in the current transaction) for
+    the dispatch_tasks worker, which retries the failures and collapses the
+    duplicate pending invocations
+    """
+
+    on_commit = False
+
+    def dispatch(self, function, payload, wait=False):
+        from core.models import DispatchTask
+
+        DispatchTask.enqueue(function, payload)
+
+
+BACKENDS = {
+    "lambda": LambdaBackend,
+    "local": LocalBackend,
+    "outbox": OutboxBackend,
+}
+
+
+@lru_cache(maxsize=None)
+def get_executor(path):
+    """Return the process pool for the Lambda function's directory"""
+    return ProcessPoolExecutor(
+        max_workers=settings.DISPATCH_LOCAL_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_handler,
+        initargs=(path,),
+    )
+
+
+def init_handler(path):
+    """Initialize the process to import the Lambda function's modules"""
+    sys.path.insert(0, path)
+
+
+def run_handler(event):
+    """Run the Lambda function's handler"""
+    module = importlib.import_module("app")
+    return module.handler(event, None)
+
+
+def log_error(function, future):
+    """Log the error (if any) of the local function invocation"""
+    if exc := future.exception():
+        LOGGER.error(f"Error running {function}: {exc}")